@@ -1,273 +1,391 @@
 import pandas as pd
 import numpy as np
+import argparse
+import hashlib
 import json
 import os
 import re
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-from sklearn.decomposition import LatentDirichletAllocation
-from sklearn.feature_extraction.text import CountVectorizer
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-import tensorflow as tf
-from tensorflow.keras.preprocessing.text import Tokenizer
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Embedding, LSTM, Dense, Dropout, Bidirectional
+from functools import cached_property
 import pickle
 
+import checkpoints
+import datastore
+import export
+import raw_store
+import rollups
+import sentiment_cache
+
+# TensorFlow, scikit-learn, NLTK, wordcloud and matplotlib take seconds to
+# import, so each stage imports what it needs when it runs; stages that only
+# read the saved content tables start without them (see benchmarks/bench_startup.py)
+
 # Create directories for AI models and outputs
 os.makedirs('data/ai_models', exist_ok=True)
 os.makedirs('data/ai_outputs', exist_ok=True)
 
-# Download NLTK resources
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('wordnet')
-nltk.download('vader_lexicon')
+# Content tables saved by the sentiment and topic modeling stages; later stages resume from them
+SENTIMENT_CONTENT_PATH = 'data/ai_outputs/all_content_with_sentiment.csv'
+TOPIC_CONTENT_PATH = 'data/ai_outputs/all_content_with_topics.csv'
 
-class AdvancedAnalytics:
+# Fitted LDA model and its vocabulary, for drawing the word clouds separately
+LDA_MODEL_PATH = 'data/ai_models/lda_model.pickle'
+
+# Sentiment scorers: VADER itself, or lexicon_scorer's vectorized approximation of it
+SENTIMENT_SCORERS = ('vader', 'lexicon')
+
+# NLTK resources the analyses use, by the path nltk.data.find locates them under
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+    'vader_lexicon': 'sentiment/vader_lexicon.zip'
+}
+
+# Offline copy of the NLTK resources, searched before NLTK's own locations.
+# Fill it where there is network access with `python advanced_analytics.py --bundle-nltk`
+# and copy it to the workers that have none.
+NLTK_BUNDLE_DIR = 'data/nltk_data'
+
+def ensure_nltk_resources(names=tuple(NLTK_RESOURCES), download=False):
+    """Check that NLTK resources are installed, without touching the network
+
+    Resources missing locally are downloaded into the offline bundle with
+    download=True; otherwise a LookupError names them.
+    """
+    import nltk
+    bundle = os.path.abspath(NLTK_BUNDLE_DIR)
+    if bundle not in nltk.data.path:
+        nltk.data.path.insert(0, bundle)
+    
+    def missing():
+        absent = []
+        for name in names:
+            try:
+                nltk.data.find(NLTK_RESOURCES[name])
+            except LookupError:
+                absent.append(name)
+        return absent
+    
+    absent = missing()
+    if absent and download:
+        for name in absent:
+            nltk.download(name, download_dir=bundle, quiet=True)
+        absent = missing()
+    if absent:
+        raise LookupError(f"NLTK resources not installed: {', '.join(absent)}. "
+                          f"Run `python advanced_analytics.py --bundle-nltk` with network access "
+                          f"and copy {NLTK_BUNDLE_DIR} here.")
+
+# Batches with fewer new texts than this are preprocessed in this process;
+# a pool costs more to start than it saves on small batches
+PREPROCESS_POOL_MIN = 20000
+
+# Texts per task sent to a preprocessing worker
+PREPROCESS_CHUNK_SIZE = 2000
+
+# Batches with fewer texts to score than this are scored in this process
+SENTIMENT_POOL_MIN = 5000
+
+# Texts per task sent to a sentiment worker
+SENTIMENT_CHUNK_SIZE = 2000
+
+def _chunked(items, workers, size):
+    # At most `size` items per chunk, but at least four chunks per worker so none idles behind a slow one
+    size = max(1, min(size, -(-len(items) // (workers * 4))))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+_NON_LETTERS = re.compile(r'[^a-zA-Z\s]')
+
+class TextPreprocessor:
+    """The NLP preprocessing of AdvancedAnalytics.preprocess_text, with memory
+
+    Lowercases, strips everything but letters, tokenizes, drops stopwords
+    and lemmatizes. Results are cached by a hash of the normalized text,
+    so templated and repeated content is processed once, and lemmas per
+    token, since a corpus has far fewer distinct words than tokens.
+    """
+    
     def __init__(self):
-        """Initialize the advanced analytics module"""
+        self.results = {}
+        self.lemmas = {}
+    
+    @cached_property
+    def lemmatize(self):
+        ensure_nltk_resources(('wordnet',))
+        from nltk.stem import WordNetLemmatizer
+        return WordNetLemmatizer().lemmatize
+    
+    @cached_property
+    def stop_words(self):
+        ensure_nltk_resources(('stopwords',))
+        from nltk.corpus import stopwords
+        return set(stopwords.words('english'))
+    
+    @cached_property
+    def word_tokenize(self):
+        ensure_nltk_resources(('punkt',))
+        from nltk.tokenize import word_tokenize
+        return word_tokenize
+    
+    def process(self, normalized):
+        """Tokenize, filter and lemmatize a normalized text, without the result cache"""
+        stop_words = self.stop_words
+        lemmas = self.lemmas
+        tokens = []
+        for token in self.word_tokenize(normalized):
+            if token in stop_words:
+                continue
+            lemma = lemmas.get(token)
+            if lemma is None:
+                lemma = lemmas[token] = self.lemmatize(token)
+            tokens.append(lemma)
+        return ' '.join(tokens)
+    
+    def process_batch(self, texts, workers=None, pool=None):
+        """Preprocess a column of texts, in order, running large batches across worker processes
+        
+        Large batches go to the given pool, or to a new one of `workers` processes.
+        """
+        keys = []
+        pending = {}
+        for text in texts:
+            normalized = _NON_LETTERS.sub('', text.lower())
+            key = hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+            keys.append(key)
+            if key not in self.results:
+                pending[key] = normalized
+        
+        if pending:
+            workers = workers or os.cpu_count() or 1
+            if workers > 1 and len(pending) >= PREPROCESS_POOL_MIN:
+                chunks = _chunked(list(pending.values()), workers, PREPROCESS_CHUNK_SIZE)
+                with nullcontext(pool) if pool else ProcessPoolExecutor(max_workers=workers) as executor:
+                    processed = [text for chunk in executor.map(_preprocess_chunk, chunks) for text in chunk]
+            else:
+                processed = [self.process(text) for text in pending.values()]
+            self.results.update(zip(pending, processed))
+        
+        return [self.results[key] for key in keys]
+
+# Each worker process keeps its own preprocessor, and so its own lemma cache, across chunks
+_worker_preprocessor = None
+
+def _preprocess_chunk(normalized):
+    global _worker_preprocessor
+    if _worker_preprocessor is None:
+        _worker_preprocessor = TextPreprocessor()
+    return [_worker_preprocessor.process(text) for text in normalized]
+
+def _load_lexicon_scorer():
+    ensure_nltk_resources(('vader_lexicon',))
+    try:
+        import lexicon_scorer
+    except ImportError as error:
+        raise ImportError(f"The lexicon scorer needs scipy; install it with `pip install scipy` ({error})") from error
+    return lexicon_scorer.LexiconScorer.from_nltk()
+
+# Sentiment workers build their scorer, one of SENTIMENT_SCORERS, on their first chunk
+_worker_scorer_name = 'vader'
+_worker_scorer = None
+
+def _init_analysis_worker(scorer):
+    global _worker_scorer_name
+    _worker_scorer_name = scorer
+
+def _score_chunk(texts):
+    # Scores go back as one float array, which pickles far smaller than a dict per text
+    global _worker_scorer
+    if _worker_scorer is None:
+        _worker_scorer = AdvancedAnalytics.make_scorer(_worker_scorer_name)
+    scores = _worker_scorer(texts)
+    return np.array([[score[field] for field in sentiment_cache.FIELDS] for score in scores], dtype=float)
+
+class AdvancedAnalytics:
+    def __init__(self, scorer='vader', workers=None):
+        """Initialize the advanced analytics module
+        
+        Sentiment is scored with one of SENTIMENT_SCORERS; the sentiment stage
+        runs across `workers` processes, by default one per CPU.
+        """
         print("Initializing Advanced AI Analytics Module...")
-        self.sia = SentimentIntensityAnalyzer()
-        self.lemmatizer = WordNetLemmatizer()
-        self.stop_words = set(stopwords.words('english'))
+        if scorer not in SENTIMENT_SCORERS:
+            raise ValueError(f"Unknown sentiment scorer: {scorer}")
+        self.scorer = scorer
+        self.workers = workers or os.cpu_count() or 1
+        self.preprocessor = TextPreprocessor()
         
         # Load data
         self.load_data()
-        
+    
+    @cached_property
+    def sia(self):
+        """VADER sentiment scorer, created on first use"""
+        ensure_nltk_resources(('vader_lexicon',))
+        from nltk.sentiment import SentimentIntensityAnalyzer
+        return SentimentIntensityAnalyzer()
+    
+    @cached_property
+    def lexicon_scorer(self):
+        """Vectorized scorer on VADER's lexicon, created on first use"""
+        return _load_lexicon_scorer()
+    
+    @cached_property
+    def scorer_version(self):
+        """Identifies the scores the chosen scorer gives: the NLTK release and a hash of the lexicon"""
+        if self.scorer == 'lexicon':
+            return self.lexicon_scorer.version
+        import nltk
+        lexicon = getattr(self.sia, 'lexicon_file', '')
+        digest = hashlib.blake2b(lexicon.encode('utf-8'), digest_size=8).hexdigest()
+        return f"vader-{nltk.__version__}-{digest}"
+    
+    @staticmethod
+    def make_scorer(scorer):
+        """Return a function scoring a list of texts with one of SENTIMENT_SCORERS, for worker processes"""
+        if scorer == 'lexicon':
+            return _load_lexicon_scorer().polarity_scores
+        ensure_nltk_resources(('vader_lexicon',))
+        from nltk.sentiment import SentimentIntensityAnalyzer
+        polarity_scores = SentimentIntensityAnalyzer().polarity_scores
+        return lambda texts: [polarity_scores(text) for text in texts]
+    
+    def worker_pool(self):
+        """Return a context giving a pool of self.workers analysis workers, or None with a single worker
+        
+        Workers start on the pool's first task, so an unused pool costs nothing.
+        """
+        if self.workers <= 1:
+            return nullcontext()
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_analysis_worker,
+                                   initargs=(self.scorer,))
+    
+    def score_batch(self, texts, pool=None):
+        """Score a list of texts, in order, across the pool's workers when there are many"""
+        if pool is not None and len(texts) >= SENTIMENT_POOL_MIN:
+            chunks = _chunked(texts, self.workers, SENTIMENT_CHUNK_SIZE)
+            scores = np.concatenate(list(pool.map(_score_chunk, chunks)))
+            return [dict(zip(sentiment_cache.FIELDS, row)) for row in scores.tolist()]
+        if self.scorer == 'lexicon':
+            return self.lexicon_scorer.polarity_scores(texts)
+        return [self.sia.polarity_scores(text) for text in texts]
+    
+    def score_texts(self, texts, pool=None):
+        """Return the VADER scores of a column of texts, scoring only texts no earlier run has scored"""
+        cache = sentiment_cache.SentimentCache(self.scorer_version)
+        try:
+            return cache.score(texts, lambda missing: self.score_batch(missing, pool), batch=True)
+        finally:
+            cache.close()
+    
     def load_data(self):
-        """Load the data generated by the basic monitoring script"""
-        print("Loading monitoring data...")
-        
-        self.data = {
-            'news': None,
-            'facebook': None,
-            'twitter': None,
-            'member_mentions': None,
-            'topic_mentions': None,
-            'alerts': None,
-            'sentiment_trends': None,
-            'member_profiles': None
-        }
-        
-        # Check if files exist and load them
-        if os.path.exists('data/news/news_data.json'):
-            with open('data/news/news_data.json', 'r') as f:
-                self.data['news'] = json.load(f)
-        
-        if os.path.exists('data/facebook/facebook_data.json'):
-            with open('data/facebook/facebook_data.json', 'r') as f:
-                self.data['facebook'] = json.load(f)
-        
-        if os.path.exists('data/twitter/twitter_data.json'):
-            with open('data/twitter/twitter_data.json', 'r') as f:
-                self.data['twitter'] = json.load(f)
-        
-        if os.path.exists('data/member_mentions.json'):
-            with open('data/member_mentions.json', 'r') as f:
-                self.data['member_mentions'] = json.load(f)
-        
-        if os.path.exists('data/topic_mentions.json'):
-            with open('data/topic_mentions.json', 'r') as f:
-                self.data['topic_mentions'] = json.load(f)
-        
-        if os.path.exists('data/alerts.json'):
-            with open('data/alerts.json', 'r') as f:
-                self.data['alerts'] = json.load(f)
-        
-        if os.path.exists('data/sentiment_trends.json'):
-            with open('data/sentiment_trends.json', 'r') as f:
-                self.data['sentiment_trends'] = json.load(f)
-        
-        if os.path.exists('data/member_profiles.json'):
-            with open('data/member_profiles.json', 'r') as f:
-                self.data['member_profiles'] = json.load(f)
+        """Open lazy access to the data generated by the basic monitoring script
         
-        # Check if data is available, if not, run the basic monitoring script
-        if not all([self.data['news'], self.data['facebook'], self.data['twitter']]):
-            print("Running basic monitoring script to generate data...")
-            import monitor
-            monitor.run_monitoring()
-            
-            # Run prepare_data script to generate member profiles
-            import prepare_data
-            prepare_data.prepare_dashboard_data()
-            
-            # Reload the data
-            self.load_data()
-        
-        print("Data loaded successfully")
+        Posts come with their comments and replies. Missing datasets are None;
+        generating them is up to the caller (see the __main__ block).
+        """
+        self.data = datastore.DataStore(children=True)
     
     def preprocess_text(self, text):
         """Preprocess text for NLP tasks"""
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove special characters and numbers
-        text = re.sub(r'[^a-zA-Z\s]', '', text)
-        
-        # Tokenize
-        tokens = word_tokenize(text)
-        
-        # Remove stopwords and lemmatize
-        tokens = [self.lemmatizer.lemmatize(token) for token in tokens if token not in self.stop_words]
-        
-        return ' '.join(tokens)
+        return self.preprocessor.process_batch([text])[0]
+    
+    def preprocess_texts(self, texts, workers=None, pool=None):
+        """Preprocess a column of texts for NLP tasks; see TextPreprocessor"""
+        return self.preprocessor.process_batch(texts, workers or self.workers, pool)
     
     def advanced_sentiment_analysis(self):
         """Perform advanced sentiment analysis using VADER and custom rules"""
         print("Performing advanced sentiment analysis...")
         
-        # Combine all content for analysis
-        all_content = []
-        
-        # Process news content
+        # Every text to analyse: its source, its record, and the post it belongs to.
+        # Comments and replies are associated with their post's member and topic.
+        rows = []
         if self.data['news']:
             for item in self.data['news']:
-                processed_text = self.preprocess_text(item['content'])
-                sentiment = self.sia.polarity_scores(item['content'])
-                
-                # Update with more accurate sentiment
-                item['sentiment'] = sentiment['compound'] * 0.5 + 0.5  # Convert to 0-1 scale
-                item['sentiment_details'] = sentiment
-                item['processed_text'] = processed_text
-                
-                all_content.append({
-                    'source': 'news',
-                    'content': item['content'],
-                    'processed_text': processed_text,
-                    'sentiment': item['sentiment'],
-                    'sentiment_details': sentiment,
-                    'member': item['member'],
-                    'topic': item['topic'],
-                    'date': item['date']
-                })
-        
-        # Process Facebook content
+                rows.append(('news', item, item))
         if self.data['facebook']:
             for post in self.data['facebook']:
-                processed_text = self.preprocess_text(post['content'])
-                sentiment = self.sia.polarity_scores(post['content'])
-                
-                # Update with more accurate sentiment
-                post['sentiment'] = sentiment['compound'] * 0.5 + 0.5  # Convert to 0-1 scale
-                post['sentiment_details'] = sentiment
-                post['processed_text'] = processed_text
-                
-                all_content.append({
-                    'source': 'facebook_post',
-                    'content': post['content'],
-                    'processed_text': processed_text,
-                    'sentiment': post['sentiment'],
-                    'sentiment_details': sentiment,
-                    'member': post['member'],
-                    'topic': post['topic'],
-                    'date': post['date']
-                })
-                
-                # Process comments
+                rows.append(('facebook_post', post, post))
                 for comment in post['comments']:
-                    processed_text = self.preprocess_text(comment['content'])
-                    sentiment = self.sia.polarity_scores(comment['content'])
-                    
-                    # Update with more accurate sentiment
-                    comment['sentiment'] = sentiment['compound'] * 0.5 + 0.5  # Convert to 0-1 scale
-                    comment['sentiment_details'] = sentiment
-                    comment['processed_text'] = processed_text
-                    
-                    all_content.append({
-                        'source': 'facebook_comment',
-                        'content': comment['content'],
-                        'processed_text': processed_text,
-                        'sentiment': comment['sentiment'],
-                        'sentiment_details': sentiment,
-                        'member': post['member'],  # Associate with the post's member
-                        'topic': post['topic'],    # Associate with the post's topic
-                        'date': comment['date']
-                    })
-        
-        # Process Twitter content
+                    rows.append(('facebook_comment', comment, post))
         if self.data['twitter']:
             for tweet in self.data['twitter']:
-                processed_text = self.preprocess_text(tweet['content'])
-                sentiment = self.sia.polarity_scores(tweet['content'])
-                
-                # Update with more accurate sentiment
-                tweet['sentiment'] = sentiment['compound'] * 0.5 + 0.5  # Convert to 0-1 scale
-                tweet['sentiment_details'] = sentiment
-                tweet['processed_text'] = processed_text
-                
-                all_content.append({
-                    'source': 'twitter_tweet',
-                    'content': tweet['content'],
-                    'processed_text': processed_text,
-                    'sentiment': tweet['sentiment'],
-                    'sentiment_details': sentiment,
-                    'member': tweet['member'],
-                    'topic': tweet['topic'],
-                    'date': tweet['date']
-                })
-                
-                # Process replies
+                rows.append(('twitter_tweet', tweet, tweet))
                 for reply in tweet['replies']:
-                    processed_text = self.preprocess_text(reply['content'])
-                    sentiment = self.sia.polarity_scores(reply['content'])
-                    
-                    # Update with more accurate sentiment
-                    reply['sentiment'] = sentiment['compound'] * 0.5 + 0.5  # Convert to 0-1 scale
-                    reply['sentiment_details'] = sentiment
-                    reply['processed_text'] = processed_text
-                    
-                    all_content.append({
-                        'source': 'twitter_reply',
-                        'content': reply['content'],
-                        'processed_text': processed_text,
-                        'sentiment': reply['sentiment'],
-                        'sentiment_details': sentiment,
-                        'member': tweet['member'],  # Associate with the tweet's member
-                        'topic': tweet['topic'],    # Associate with the tweet's topic
-                        'date': reply['date']
-                    })
-        
-        # Save all content to a DataFrame for further analysis
-        self.content_df = pd.DataFrame(all_content)
+                    rows.append(('twitter_reply', reply, tweet))
+        
+        texts = [record['content'] for _, record, _ in rows]
+        
+        # Preprocess and score the whole column at once, so repeated texts are handled once
+        # and texts scored by an earlier run come from the cache. Only the remaining texts
+        # go to the worker pool, in chunks whose results come back in order.
+        with self.worker_pool() as pool:
+            processed_texts = self.preprocess_texts(texts, pool=pool)
+            sentiments = self.score_texts(texts, pool=pool)
+        
+        # More accurate sentiment, converted to a 0-1 scale; the loaded records are left unchanged
+        scaled = [sentiment['compound'] * 0.5 + 0.5 for sentiment in sentiments]
+        
+        # Save all content to a DataFrame for further analysis, built column by column
+        self.content_df = pd.DataFrame({
+            'source': [source for source, _, _ in rows],
+            'content': texts,
+            'processed_text': processed_texts,
+            'sentiment': scaled,
+            'sentiment_details': sentiments,
+            'member': [post['member'] for _, _, post in rows],
+            'topic': [post['topic'] for _, _, post in rows],
+            'date': [record['date'] for _, record, _ in rows]
+        })
         
         # Save to CSV for reference
-        self.content_df.to_csv('data/ai_outputs/all_content_with_sentiment.csv', index=False)
+        self.content_df.to_csv(SENTIMENT_CONTENT_PATH, index=False)
+        self.content_paths = {SENTIMENT_CONTENT_PATH}
         
         print("Advanced sentiment analysis completed")
         
-        # Update the JSON files with the new sentiment scores
-        self.save_updated_data()
+        # Write JSON files with the new sentiment scores
+        self.save_updated_data(rows, scaled, sentiments, processed_texts)
         
         return self.content_df
     
-    def save_updated_data(self):
-        """Save the updated data with advanced sentiment analysis"""
-        # Save news data
-        if self.data['news']:
-            with open('data/news/news_data_advanced.json', 'w') as f:
-                json.dump(self.data['news'], f, indent=2)
-        
-        # Save Facebook data
-        if self.data['facebook']:
-            with open('data/facebook/facebook_data_advanced.json', 'w') as f:
-                json.dump(self.data['facebook'], f, indent=2)
-        
-        # Save Twitter data
-        if self.data['twitter']:
-            with open('data/twitter/twitter_data_advanced.json', 'w') as f:
-                json.dump(self.data['twitter'], f, indent=2)
+    def save_updated_data(self, rows, scaled, sentiments, processed_texts):
+        """Save copies of the data with advanced sentiment analysis
+
+        rows are the (source, record, post) rows of the sentiment stage, in
+        order, and the other arguments their columns. Each record is copied
+        with its scores; comments and replies follow their post.
+        """
+        child_keys = {'facebook': 'comments', 'twitter': 'replies'}
+        updated = {'news': [], 'facebook': [], 'twitter': []}
+        for (source, record, post), value, sentiment, processed_text in zip(rows, scaled, sentiments, processed_texts):
+            platform = source.split('_')[0]
+            scored = dict(record, sentiment=value, sentiment_details=sentiment, processed_text=processed_text)
+            if record is not post:
+                updated[platform][-1][child_keys[platform]].append(scored)
+                continue
+            if platform in child_keys:
+                scored[child_keys[platform]] = []
+            updated[platform].append(scored)
+        
+        # The monitor keeps its data in the raw store, so these directories may not exist yet
+        for platform, records in updated.items():
+            os.makedirs(f'data/{platform}', exist_ok=True)
+            if records:
+                with open(f'data/{platform}/{platform}_data_advanced.json', 'w') as f:
+                    json.dump(records, f, indent=2)
+    
+    def load_content(self, path):
+        """Load a content table saved by a completed stage, unless it is already in memory"""
+        if path not in getattr(self, 'content_paths', set()):
+            # Empty processed texts must stay strings
+            self.content_df = pd.read_csv(path, keep_default_na=False)
+            self.content_paths = {path}
     
-    def topic_modeling(self, num_topics=10):
+    def topic_modeling(self, num_topics=10, wordclouds=True):
         """Perform topic modeling using LDA"""
         print(f"Performing topic modeling with {num_topics} topics...")
         
@@ -277,6 +395,9 @@ class AdvancedAnalytics:
         # Combine all processed text
         all_text = self.content_df['processed_text'].tolist()
         
+        from sklearn.decomposition import LatentDirichletAllocation
+        from sklearn.feature_extraction.text import CountVectorizer
+        
         # Create a document-term matrix
         vectorizer = CountVectorizer(max_df=0.95, min_df=2, stop_words='english')
         dtm = vectorizer.fit_transform(all_text)
@@ -309,10 +430,16 @@ class AdvancedAnalytics:
         self.content_df['dominant_topic'] = doc_topics.argmax(axis=1)
         
         # Save the updated DataFrame
-        self.content_df.to_csv('data/ai_outputs/all_content_with_topics.csv', index=False)
+        self.content_df.to_csv(TOPIC_CONTENT_PATH, index=False)
+        self.content_paths.add(TOPIC_CONTENT_PATH)
+        
+        # Keep the model so the word clouds can be drawn without refitting
+        with open(LDA_MODEL_PATH, 'wb') as handle:
+            pickle.dump((lda, feature_names), handle, protocol=pickle.HIGHEST_PROTOCOL)
         
         # Generate topic word clouds
-        self.generate_topic_wordclouds(lda, feature_names)
+        if wordclouds:
+            self.generate_topic_wordclouds(lda, feature_names)
         
         print("Topic modeling completed")
         return topics
@@ -321,6 +448,9 @@ class AdvancedAnalytics:
         """Generate word clouds for each topic"""
         print("Generating topic word clouds...")
         
+        import matplotlib.pyplot as plt
+        from wordcloud import WordCloud
+        
         # Create directory for word clouds
         os.makedirs('data/ai_outputs/wordclouds', exist_ok=True)
         
@@ -436,16 +566,30 @@ class AdvancedAnalytics:
         print("Entity network analysis completed")
         return network_data
     
-    def trend_prediction(self, days_to_predict=7):
+    def trend_prediction(self, days_to_predict=7, history_days=90):
         """Predict sentiment trends for the next few days"""
         print(f"Predicting sentiment trends for the next {days_to_predict} days...")
         
-        if not self.data['sentiment_trends']:
+        # Read the daily platform series from the rollup store, one row per day
+        rollup_store = rollups.RollupStore()
+        last_bucket = rollup_store.latest('day')
+        history = []
+        if last_bucket is not None:
+            history = rollup_store.platform_trends(last_bucket - (history_days - 1) * rollups.RESOLUTIONS['day'])
+        rollup_store.close()
+        
+        if not history:
             print("No sentiment trend data available for prediction")
             return None
         
         # Convert sentiment trends to DataFrame
-        trends_df = pd.DataFrame(self.data['sentiment_trends'])
+        trends_df = pd.DataFrame(history[::-1], columns=['date', 'overall', 'news', 'facebook', 'twitter'])
+        
+        # Days without items on a platform take the neighbouring days' values
+        platform_columns = ['news', 'facebook', 'twitter']
+        trends_df[platform_columns] = trends_df[platform_columns].ffill().bfill()
+        for column in platform_columns:
+            trends_df[column] = trends_df[column].fillna(trends_df['overall'])
         
         # Ensure dates are in datetime format
         trends_df['date'] = pd.to_datetime(trends_df['date'])
@@ -514,6 +658,8 @@ class AdvancedAnalytics:
     
     def visualize_predictions(self, historical_df, predictions):
         """Visualize historical data and predictions"""
+        import matplotlib.pyplot as plt
+        
         # Convert predictions to DataFrame
         predictions_df = pd.DataFrame(predictions)
         predictions_df['date'] = pd.to_datetime(predictions_df['date'])
@@ -554,6 +700,10 @@ class AdvancedAnalytics:
     def build_sentiment_classifier(self):
         """Build and train a deep learning sentiment classifier"""
         print("Building sentiment classifier model...")
+        from tensorflow.keras.preprocessing.text import Tokenizer
+        from tensorflow.keras.preprocessing.sequence import pad_sequences
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import Embedding, LSTM, Dense, Dropout, Bidirectional
         
         if not hasattr(self, 'content_df'):
             self.advanced_sentiment_analysis()
@@ -839,30 +989,64 @@ class AdvancedAnalytics:
         print("Chatbot data generated")
         return qa_pairs
     
+    def draw_saved_wordclouds(self):
+        """Generate the topic word clouds from the saved LDA model"""
+        with open(LDA_MODEL_PATH, 'rb') as handle:
+            lda, feature_names = pickle.load(handle)
+        self.generate_topic_wordclouds(lda, feature_names)
+    
     def run_all_analyses(self):
-        """Run all advanced AI analyses"""
+        """Run all advanced AI analyses
+        
+        Each stage records the fingerprint of its inputs when it completes,
+        so a rerun skips the stages whose inputs are unchanged and resumes
+        from the first one that did not complete.
+        """
         print("Running all advanced AI analyses...")
+        stages = checkpoints.StageCheckpoints('advanced_analytics')
+        
+        def with_content(path, stage):
+            return lambda: (self.load_content(path), stage())
         
-        # 1. Advanced sentiment analysis
-        self.advanced_sentiment_analysis()
+        # 1. Advanced sentiment analysis; another scorer, NLTK release or lexicon gives other scores
+        stages.run('sentiment', [raw_store.RAW_DIR],
+                   [SENTIMENT_CONTENT_PATH] + [f'data/{p}/{p}_data_advanced.json' for p in ('news', 'facebook', 'twitter')],
+                   self.advanced_sentiment_analysis,
+                   params={'scorer': self.scorer, 'scorer_version': self.scorer_version})
         
-        # 2. Topic modeling
-        self.topic_modeling()
+        # 2. Topic modeling, then its word clouds
+        stages.run('topics', [SENTIMENT_CONTENT_PATH],
+                   [TOPIC_CONTENT_PATH, 'data/ai_outputs/lda_topics.json', LDA_MODEL_PATH],
+                   with_content(SENTIMENT_CONTENT_PATH, lambda: self.topic_modeling(wordclouds=False)),
+                   params={'num_topics': 10})
+        stages.run('wordclouds', [LDA_MODEL_PATH], ['data/ai_outputs/wordclouds'], self.draw_saved_wordclouds)
         
         # 3. Entity network analysis
-        self.entity_network_analysis()
+        stages.run('network', [SENTIMENT_CONTENT_PATH],
+                   ['data/ai_outputs/entity_network.json', 'data/ai_outputs/member_topic_network.csv',
+                    'data/ai_outputs/member_cooccurrence.csv'],
+                   with_content(SENTIMENT_CONTENT_PATH, self.entity_network_analysis))
         
         # 4. Trend prediction
-        self.trend_prediction()
+        stages.run('prediction', [rollups.ROLLUP_PATH],
+                   ['data/ai_outputs/sentiment_predictions.json', 'data/ai_outputs/sentiment_prediction.png'],
+                   self.trend_prediction, params={'days_to_predict': 7, 'history_days': 90})
         
         # 5. Build sentiment classifier
-        self.build_sentiment_classifier()
+        stages.run('classifier', [SENTIMENT_CONTENT_PATH],
+                   ['data/ai_models/sentiment_classifier', 'data/ai_models/tokenizer.pickle',
+                    'data/ai_models/model_info.json'],
+                   with_content(SENTIMENT_CONTENT_PATH, self.build_sentiment_classifier))
         
         # 6. Generate member insights
-        self.generate_member_insights()
+        stages.run('insights', [TOPIC_CONTENT_PATH], ['data/ai_outputs/member_insights.json'],
+                   with_content(TOPIC_CONTENT_PATH, self.generate_member_insights))
         
         # 7. Generate chatbot data
-        self.generate_chatbot_data()
+        stages.run('chatbot', [raw_store.RAW_DIR, 'data/member_mentions.json', 'data/topic_mentions.json',
+                               'data/sentiment_trends.json'],
+                   ['data/ai_outputs/chatbot_qa_pairs.json', 'data/ai_outputs/chatbot_sample_responses.json'],
+                   self.generate_chatbot_data)
         
         print("All advanced AI analyses completed")
         
@@ -873,54 +1057,55 @@ class AdvancedAnalytics:
         """Update dashboard data with AI outputs"""
         print("Updating dashboard data with AI outputs...")
         
-        # Create public data directory if it doesn't exist
-        os.makedirs('public/data', exist_ok=True)
-        
-        # Copy AI outputs to public directory
-        
-        # 1. Member insights
-        if os.path.exists('data/ai_outputs/member_insights.json'):
-            with open('data/ai_outputs/member_insights.json', 'r') as f:
-                member_insights = json.load(f)
-            
-            with open('public/data/member_insights.json', 'w') as f:
-                json.dump(member_insights, f, indent=2)
-        
-        # 2. Topic modeling results
-        if os.path.exists('data/ai_outputs/lda_topics.json'):
-            with open('data/ai_outputs/lda_topics.json', 'r') as f:
-                topics = json.load(f)
-            
-            with open('public/data/ai_topics.json', 'w') as f:
-                json.dump(topics, f, indent=2)
-        
-        # 3. Entity network
-        if os.path.exists('data/ai_outputs/entity_network.json'):
-            with open('data/ai_outputs/entity_network.json', 'r') as f:
-                network = json.load(f)
-            
-            with open('public/data/entity_network.json', 'w') as f:
-                json.dump(network, f, indent=2)
-        
-        # 4. Sentiment predictions
-        if os.path.exists('data/ai_outputs/sentiment_predictions.json'):
-            with open('data/ai_outputs/sentiment_predictions.json', 'r') as f:
-                predictions = json.load(f)
-            
-            with open('public/data/sentiment_predictions.json', 'w') as f:
-                json.dump(predictions, f, indent=2)
+        # AI outputs and the names the dashboard knows them by
+        outputs = {
+            'member_insights': 'data/ai_outputs/member_insights.json',
+            'ai_topics': 'data/ai_outputs/lda_topics.json',
+            'entity_network': 'data/ai_outputs/entity_network.json',
+            'sentiment_predictions': 'data/ai_outputs/sentiment_predictions.json',
+            'chatbot_data': 'data/ai_outputs/chatbot_qa_pairs.json'
+        }
         
-        # 5. Chatbot data
-        if os.path.exists('data/ai_outputs/chatbot_qa_pairs.json'):
-            with open('data/ai_outputs/chatbot_qa_pairs.json', 'r') as f:
-                qa_pairs = json.load(f)
-            
-            with open('public/data/chatbot_data.json', 'w') as f:
-                json.dump(qa_pairs, f, indent=2)
+        # Publish them in a new snapshot next to the basic dashboard data
+        datasets = {}
+        for name, path in outputs.items():
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    datasets[name] = json.load(f)
+        
+        # Refresh the member shards with the new insights
+        import prepare_data
+        replace = ()
+        if self.data['member_profiles']:
+            datasets.update(prepare_data.member_datasets(self.data['member_profiles'], self.data['member_insights']))
+            replace = ('members/',)
+        export.publish(datasets, replace=replace)
         
         print("Dashboard data updated with AI outputs")
 
 # Run the advanced analytics if executed directly
 if __name__ == "__main__":
-    analytics = AdvancedAnalytics()
+    parser = argparse.ArgumentParser(description="Run the advanced AI analyses")
+    parser.add_argument('--bundle-nltk', action='store_true',
+                        help=f"Download the NLTK resources into {NLTK_BUNDLE_DIR} for offline use, then exit")
+    parser.add_argument('--scorer', choices=SENTIMENT_SCORERS, default='vader',
+                        help="Score sentiment with VADER, or with its faster vectorized approximation (see lexicon_scorer.py)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processes for the sentiment stage (default: one per CPU)")
+    args = parser.parse_args()
+    
+    if args.bundle_nltk:
+        ensure_nltk_resources(download=True)
+        print(f"NLTK resources bundled in {NLTK_BUNDLE_DIR}")
+        raise SystemExit(0)
+    
+    # Generate the basic monitoring data and member profiles first if there are none
+    if not datastore.DataStore().has_platforms():
+        print("Running basic monitoring script to generate data...")
+        import monitor
+        import prepare_data
+        monitor.run_monitoring()
+        prepare_data.prepare_dashboard_data()
+    
+    analytics = AdvancedAnalytics(scorer=args.scorer, workers=args.workers)
     analytics.run_all_analyses()
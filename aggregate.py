@@ -0,0 +1,238 @@
+import json
+import os
+
+import numpy as np
+
+import columnar
+import entities
+
+# Where the aggregate state is kept between runs
+STATE_PATH = 'data/aggregates.json'
+
+# Platforms in the order of the aggregate arrays' first axis
+PLATFORMS = ('news', 'facebook', 'twitter')
+
+# Child table of each platform that has one
+CHILD_PLATFORMS = {'comments': 'facebook', 'replies': 'twitter'}
+
+# Width in seconds of the time buckets handed to sinks (rollups, alerts)
+FOLD_BUCKET = 300
+
+# Posts more than this many days older than the newest post leave the
+# per-post engagement entries; comments or replies they get later still
+# count in the cells, but no longer towards the post's engagement
+POST_RETENTION_DAYS = 7
+
+# Cell dimensions: posts and children hold platform sentiment (name ''),
+# member and topic come from the posts columns, mention from matching the
+# text of comments and replies, likes and shares hold engagement totals
+DIMENSIONS = ('posts', 'children', 'member', 'topic', 'mention', 'likes', 'shares')
+
+class AggregateState:
+    """Mergeable sums and counts per dimension, name, platform and day
+
+    Every cell is a [count, sum] pair, so states built from different
+    batches, workers or shards combine by addition, in any order. The state
+    also keeps one engagement entry per recent post (see POST_RETENTION_DAYS,
+    None keeps every post) and the number of rows of each column-store table
+    already folded in, so an update only reads new rows.
+    """
+
+    def __init__(self, entity_names=(), retention_days=POST_RETENTION_DAYS):
+        self.cells = {}
+        # item_id: [platform, member, topic, day, children]
+        self.posts = {}
+        # Row of the posts table: item_id, for the posts kept
+        self.post_rows = {}
+        self.retention_days = retention_days
+        self.rows = {table: 0 for table in columnar.TABLES}
+        self.entity_names = list(entity_names)
+        # Posts whose comment or reply count grew in the last update
+        self.changed_posts = []
+
+    def add(self, dimension, name, platform, day, count, total):
+        """Add count items whose values sum to total to one cell"""
+        cell = self.cells.setdefault((dimension, name, platform, day), [0, 0.0])
+        cell[0] += count
+        cell[1] += total
+
+    def merge(self, other):
+        """Fold another state into this one and return self
+
+        Row counts are left alone: they describe the store this state was
+        built from, and a merged state is meant for export, not for updating.
+        """
+        for (dimension, name, platform, day), (count, total) in other.cells.items():
+            self.add(dimension, name, platform, day, count, total)
+        for item_id, (platform, member, topic, day, children) in other.posts.items():
+            post = self.posts.setdefault(item_id, [platform, member, topic, day, 0])
+            post[4] += children
+        for name in other.entity_names:
+            if name not in self.entity_names:
+                self.entity_names.append(name)
+        return self
+
+    def totals(self, dimension, start=None, end=None):
+        """Return {name: {platform: [count, sum]}} for a dimension over the days in [start, end]"""
+        totals = {}
+        for (cell_dimension, name, platform, day), (count, total) in self.cells.items():
+            if cell_dimension != dimension or (start and day < start) or (end and day > end):
+                continue
+            cell = totals.setdefault(name, {}).setdefault(platform, [0, 0.0])
+            cell[0] += count
+            cell[1] += total
+        return totals
+
+    def platform_mean(self, platform, children=False):
+        """Return the mean sentiment of a platform's posts, or of its comments/replies"""
+        count, total = self.totals('children' if children else 'posts').get('', {}).get(platform, [0, 0.0])
+        return total / count if count else float('nan')
+
+    def _fold_cells(self, dimension, names, codes, platforms, buckets, weights, fine_cells):
+        """Add one item per row to the cells of (names[code], platform, day)
+
+        Rows are grouped by FOLD_BUCKET first; those groups are appended to
+        fine_cells for the sinks and summed into the daily cells of the state.
+        """
+        if not len(codes):
+            return
+        first_bucket = buckets.min()
+        span = int(buckets.max() - first_bucket) + 1
+        keys = (np.asarray(codes, dtype='int64') * len(PLATFORMS) + platforms) * span + (buckets - first_bucket)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse)
+        sums = np.bincount(inverse, weights=weights)
+        for key, count, total in zip(unique.tolist(), counts.tolist(), sums.tolist()):
+            code, rest = divmod(key, len(PLATFORMS) * span)
+            platform, bucket = divmod(rest, span)
+            start = (bucket + int(first_bucket)) * FOLD_BUCKET
+            self.add(dimension, names[code], PLATFORMS[platform], _day_name(start // 86400), count, total)
+            fine_cells.append((dimension, names[code], PLATFORMS[platform], start, count, total))
+
+    def update(self, store, matcher=None, sinks=()):
+        """Fold the column-store rows added since the last update into the state
+
+        Each new part of posts, comments and replies is read once, so the cost
+        follows the size of the new data rather than the whole history. The
+        same pass feeds every sink (rollups.RollupStore, alerting.AlertEngine):
+        a sink gets the new (dimension, name, platform, bucket start, count,
+        sum) cells at FOLD_BUCKET resolution through add(cells, rows). The
+        state and the sinks start over when the store was rebuilt with fewer
+        rows, the entity catalog changed, or a sink was folded up to different
+        rows than the state.
+        """
+        matcher = matcher or entities.EntityMatcher()
+        if matcher.entities != self.entity_names or \
+                any(store.num_rows(table) < rows for table, rows in self.rows.items()) or \
+                any(sink.rows() != self.rows for sink in sinks):
+            self.__init__(matcher.entities, self.retention_days)
+            for sink in sinks:
+                sink.reset()
+        fine_cells = []
+        changed_posts = {}
+
+        platform_lookup = np.array(
+            [PLATFORMS.index(name) for name in store.dictionaries['platform']] or [0], dtype='int64'
+        )
+        member_names = store.dictionaries['member']
+        topic_names = store.dictionaries['topic']
+        nameless = ['']
+
+        posts_columns = ['platform', 'member', 'topic', 'ts', 'sentiment', 'likes', 'shares', 'item_id']
+        for part in store.iter_parts('posts', posts_columns, start=self.rows['posts']):
+            platforms = platform_lookup[part['platform']]
+            buckets = np.asarray(part['ts']) // FOLD_BUCKET
+            days = np.asarray(part['ts']) // 86400
+            sentiment = np.asarray(part['sentiment'], dtype='float64')
+            zeros = np.zeros(len(days), dtype='int64')
+            self._fold_cells('posts', nameless, zeros, platforms, buckets, sentiment, fine_cells)
+            self._fold_cells('member', member_names, part['member'], platforms, buckets, sentiment, fine_cells)
+            self._fold_cells('topic', topic_names, part['topic'], platforms, buckets, sentiment, fine_cells)
+            self._fold_cells('likes', nameless, zeros, platforms, buckets,
+                             np.asarray(part['likes'], dtype='float64'), fine_cells)
+            self._fold_cells('shares', nameless, zeros, platforms, buckets,
+                             np.asarray(part['shares'], dtype='float64'), fine_cells)
+
+            first_row = self.rows['posts']
+            for row, (item_id, platform, member, topic, day) in enumerate(zip(
+                    part['item_id'], platforms.tolist(), np.asarray(part['member']).tolist(),
+                    np.asarray(part['topic']).tolist(), days.tolist()), first_row):
+                self.posts[item_id] = [PLATFORMS[platform], member_names[member], topic_names[topic],
+                                       _day_name(day), 0]
+                self.post_rows[row] = item_id
+            self.rows['posts'] += len(days)
+
+        for table, platform in CHILD_PLATFORMS.items():
+            index = PLATFORMS.index(platform)
+            for part in store.iter_parts(table, ['post', 'ts', 'sentiment', 'content'], start=self.rows[table]):
+                buckets = np.asarray(part['ts']) // FOLD_BUCKET
+                sentiment = np.asarray(part['sentiment'], dtype='float64')
+                platforms = np.full(len(buckets), index, dtype='int64')
+                self._fold_cells('children', nameless, np.zeros(len(buckets), dtype='int64'), platforms, buckets,
+                                 sentiment, fine_cells)
+
+                rows, codes = matcher.match_pairs(part['content'])
+                self._fold_cells('mention', matcher.entities, codes, platforms[rows], buckets[rows],
+                                 sentiment[rows], fine_cells)
+
+                post_rows, counts = np.unique(np.asarray(part['post']), return_counts=True)
+                for row, count in zip(post_rows.tolist(), counts.tolist()):
+                    item_id = self.post_rows.get(row)
+                    if item_id is not None:
+                        self.posts[item_id][4] += count
+                        changed_posts[item_id] = True
+                self.rows[table] += len(buckets)
+
+        self.prune_posts()
+        self.changed_posts = [item_id for item_id in changed_posts if item_id in self.posts]
+        for sink in sinks:
+            sink.add(fine_cells, self.rows)
+        return self
+
+    def prune_posts(self):
+        """Drop the engagement entries of posts older than retention_days before the newest post"""
+        if self.retention_days is None or not self.posts:
+            return
+        newest = max(post[3] for post in self.posts.values())
+        cutoff = str(np.datetime64(newest) - np.timedelta64(self.retention_days, 'D'))
+        self.posts = {item_id: post for item_id, post in self.posts.items() if post[3] >= cutoff}
+        self.post_rows = {row: item_id for row, item_id in self.post_rows.items() if item_id in self.posts}
+
+    def save(self, path=STATE_PATH):
+        """Write the state as JSON, replacing the previous file atomically"""
+        state = {
+            'rows': self.rows,
+            'entities': self.entity_names,
+            'cells': [list(key) + cell for key, cell in self.cells.items()],
+            'posts': self.posts,
+            'post_rows': [[row, item_id] for row, item_id in self.post_rows.items()]
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+def _day_name(day):
+    """Return the 'YYYY-MM-DD' name of a day number (days since the epoch)"""
+    return str(np.datetime64(int(day), 'D'))
+
+def load_state(path=STATE_PATH):
+    """Load the saved aggregate state, or an empty one if none was saved"""
+    state = AggregateState()
+    if not os.path.exists(path):
+        return state
+    with open(path, 'r') as f:
+        stored = json.load(f)
+    if 'post_rows' not in stored:
+        # Saved before post rows were kept; rebuilt from the store on the next update
+        return state
+    state.rows.update(stored['rows'])
+    state.entity_names = stored['entities']
+    state.cells = {tuple(cell[:4]): cell[4:] for cell in stored['cells']}
+    state.posts = stored['posts']
+    state.post_rows = {row: item_id for row, item_id in stored['post_rows']}
+    return state
+
+def aggregate(store, matcher=None):
+    """Build a fresh state from every row of the store in one streaming pass, keeping every post"""
+    return AggregateState(retention_days=None).update(store, matcher)
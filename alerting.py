@@ -0,0 +1,291 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+# Where the alert engine keeps its windows and alert history between runs
+ALERT_STATE_PATH = 'data/alert_state.json'
+
+# Alerts kept in the history (and in alerts.json), newest first
+MAX_ALERTS = 500
+
+HOUR = 3600
+
+# Declarative alert rules, all evaluated together in one pass per update.
+#   mean_below / mean_above: mean sentiment over `window` crosses `threshold`
+#   mean_drop: mean over `short` is at least `drop` below the mean over `long`
+#   rate_spike: items per hour over `short` reach `ratio` times the rate over `long`
+#   engagement: a post's comments or replies exceed `threshold`; the alert
+#     closes once the post has had no new ones for `window`
+# Window rules read the member mentions (posts' member column and matched
+# comments and replies) across all platforms unless `platform` is given.
+ALERT_RULES = [
+    {
+        'id': 'negative-sentiment', 'type': 'mean_below', 'window': 24 * HOUR, 'threshold': 0.4, 'min_count': 10,
+        'priority': 'high', 'sentiment': 'negative',
+        'title': "Negative sentiment for {subject}",
+        'description': "Sentiment for {subject} is negative ({mean:.2f}) across {count} mentions in the last 24 hours."
+    },
+    {
+        'id': 'sentiment-drop', 'type': 'mean_drop', 'short': 6 * HOUR, 'long': 24 * HOUR, 'drop': 0.15,
+        'min_count': 5, 'priority': 'medium', 'sentiment': 'negative',
+        'title': "Sentiment drop for {subject}",
+        'description': "Sentiment for {subject} has dropped from {long_mean:.2f} (24h) to {short_mean:.2f} (6h)."
+    },
+    {
+        'id': 'positive-sentiment', 'type': 'mean_above', 'window': 24 * HOUR, 'threshold': 0.7, 'min_count': 10,
+        'priority': 'medium', 'sentiment': 'positive',
+        'title': "Positive sentiment for {subject}",
+        'description': "Sentiment for {subject} is very positive ({mean:.2f}) across {count} mentions in the last 24 hours."
+    },
+    {
+        'id': 'mention-spike', 'type': 'rate_spike', 'short': HOUR, 'long': 24 * HOUR, 'ratio': 3.0,
+        'min_count': 20, 'priority': 'high', 'sentiment': 'neutral',
+        'title': "Mention spike for {subject}",
+        'description': "{subject} was mentioned {short_count} times in the last hour, "
+                       "{ratio:.1f}x the 24-hour rate."
+    },
+    {
+        'id': 'engagement-facebook', 'type': 'engagement', 'platform': 'facebook', 'threshold': 120, 'window': 24 * HOUR,
+        'priority': 'medium', 'sentiment': 'neutral',
+        'title': "High engagement Facebook post about {subject}",
+        'description': "A Facebook post about {subject} and {topic} has received {count} comments."
+    },
+    {
+        'id': 'engagement-twitter', 'type': 'engagement', 'platform': 'twitter', 'threshold': 25, 'window': 24 * HOUR,
+        'priority': 'low', 'sentiment': 'neutral',
+        'title': "High engagement tweet about {subject}",
+        'description': "A tweet about {subject} and {topic} has received {count} replies."
+    }
+]
+
+# Aggregate dimensions counted as member mentions
+MENTION_DIMENSIONS = ('member', 'mention')
+
+def alert_id(*parts):
+    """Return a stable alert ID derived from its rule, subject and episode"""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:12]
+
+def _format_time(ts):
+    moment = datetime.fromtimestamp(ts, timezone.utc)
+    return moment.strftime("%Y-%m-%d"), moment.strftime("%H:%M")
+
+def active_members(path=ALERT_STATE_PATH):
+    """Return the members named in the open alerts saved at path"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r') as f:
+        stored = json.load(f)
+    return {member for alert in stored['alerts'] if alert.get('active') for member in alert['members']}
+
+class AlertEngine:
+    """Sliding-window alert evaluation over the buckets folded in by each update
+
+    The engine is an aggregate.AggregateState sink: it keeps the member
+    mention buckets of the longest rule window and evaluates every rule
+    when new buckets arrive. A window condition that keeps holding is one
+    alert whose ID stays the same and whose text is refreshed; it gets a
+    new ID only after clearing and firing again.
+    """
+
+    def __init__(self, rules=None, path=ALERT_STATE_PATH):
+        self.rules = rules if rules is not None else ALERT_RULES
+        self.path = path
+        self.horizon = max([rule.get('window', 0) for rule in self.rules] +
+                           [rule.get('long', 0) for rule in self.rules])
+        # {(name, platform): {bucket start: [count, sum]}}
+        self.buckets = {}
+        self.folded = {}
+        self.now = 0
+        # Open alert ID per (rule, subject) and the alert history by ID
+        self.active = {}
+        self.alerts = {}
+        self.new_alerts = []
+        # Comment or reply count per post at the last evaluation; a refold after a reset
+        # reports every post as changed, but only posts that grew past it are looked at
+        self.post_counts = {}
+
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                stored = json.load(f)
+            self.folded = stored['rows']
+            self.now = stored['now']
+            self.buckets = {
+                tuple(key.split('|', 1)): {int(bucket): cell for bucket, cell in buckets.items()}
+                for key, buckets in stored['buckets'].items()
+            }
+            self.active = stored['active']
+            self.alerts = {alert['id']: alert for alert in stored['alerts']}
+            self.post_counts = stored.get('post_counts', {})
+
+    def rows(self):
+        """Return the number of column-store rows already folded in, per table"""
+        return self.folded
+
+    def reset(self):
+        """Forget the window buckets; open alerts and history are kept so a replay does not repeat them"""
+        self.buckets = {}
+        self.folded = {}
+        self.now = 0
+
+    def add(self, cells, rows):
+        """Take the new mention cells of an update and drop buckets outside every window"""
+        for dimension, name, platform, bucket, count, total in cells:
+            if dimension not in MENTION_DIMENSIONS:
+                continue
+            cell = self.buckets.setdefault((name, platform), {}).setdefault(bucket, [0, 0.0])
+            cell[0] += count
+            cell[1] += total
+            self.now = max(self.now, bucket)
+        self.folded = dict(rows)
+
+        for key in list(self.buckets):
+            buckets = self.buckets[key]
+            for bucket in [bucket for bucket in buckets if bucket <= self.now - self.horizon]:
+                del buckets[bucket]
+            if not buckets:
+                del self.buckets[key]
+
+    def _window_sums(self):
+        """Return {(subject, platform): {window: [count, sum]}} for every rule window, in one pass"""
+        windows = sorted({rule[key] for rule in self.rules for key in ('window', 'short', 'long') if key in rule})
+        sums = {}
+        for (name, platform), buckets in self.buckets.items():
+            for key in ((name, platform), (name, None)):
+                totals = sums.setdefault(key, {window: [0, 0.0] for window in windows})
+                for bucket, (count, total) in buckets.items():
+                    age = self.now - bucket
+                    for window in windows:
+                        if age < window:
+                            totals[window][0] += count
+                            totals[window][1] += total
+        return sums
+
+    def _check(self, rule, windows):
+        """Return the template fields if a window rule fires on one subject, else None"""
+        def mean(window):
+            count, total = windows[window]
+            return total / count if count else None
+
+        kind = rule['type']
+        if kind in ('mean_below', 'mean_above'):
+            count = windows[rule['window']][0]
+            value = mean(rule['window'])
+            if not count or count < rule['min_count']:
+                return None
+            if (kind == 'mean_below' and value < rule['threshold']) or \
+                    (kind == 'mean_above' and value > rule['threshold']):
+                return {'mean': value, 'count': count}
+        elif kind == 'mean_drop':
+            short_mean, long_mean = mean(rule['short']), mean(rule['long'])
+            if windows[rule['short']][0] >= rule['min_count'] and short_mean <= long_mean - rule['drop']:
+                return {'short_mean': short_mean, 'long_mean': long_mean, 'count': windows[rule['short']][0]}
+        elif kind == 'rate_spike':
+            short_count, long_count = windows[rule['short']][0], windows[rule['long']][0]
+            short_rate = short_count / (rule['short'] / HOUR)
+            long_rate = long_count / (rule['long'] / HOUR)
+            if short_count >= rule['min_count'] and short_rate >= rule['ratio'] * long_rate:
+                return {'short_count': short_count, 'count': long_count, 'ratio': short_rate / long_rate}
+        return None
+
+    def _raise(self, rule, identifier, subject, source, fields, ts):
+        """Open or refresh the alert with the given ID"""
+        date, time_of_day = _format_time(ts)
+        alert = self.alerts.get(identifier)
+        if alert is None:
+            alert = self.alerts[identifier] = {
+                'id': identifier,
+                'rule': rule['id'],
+                'date': date,
+                'time': time_of_day,
+                'priority': rule['priority'],
+                'source': source,
+                'sentiment': rule['sentiment'],
+                'members': [subject],
+                'read': False
+            }
+            self.new_alerts.append(alert)
+        alert['title'] = rule['title'].format(subject=subject, **fields)
+        alert['description'] = rule['description'].format(subject=subject, **fields)
+        alert['last_seen'] = ts
+        alert['active'] = True
+
+    def evaluate(self, state=None):
+        """Evaluate every rule against the current windows and return the alert list, newest first
+
+        Engagement rules only look at the posts whose comment or reply
+        count changed in the last update of state and grew past the count
+        seen at the previous evaluation, so a refold raises nothing again.
+        """
+        self.new_alerts = []
+        window_sums = self._window_sums()
+        firing = set()
+
+        for rule in self.rules:
+            if rule['type'] == 'engagement':
+                continue
+            platform = rule.get('platform')
+            for (subject, subject_platform), windows in window_sums.items():
+                if subject_platform != platform:
+                    continue
+                fields = self._check(rule, windows)
+                if fields is None:
+                    continue
+                source = platform or 'all'
+                key = f"{rule['id']}|{subject}|{source}"
+                firing.add(key)
+                # A new episode starts when the condition was not holding at the last evaluation
+                if key not in self.active:
+                    self.active[key] = alert_id(rule['id'], subject, source, self.now)
+                self._raise(rule, self.active[key], subject, source, fields, self.now)
+
+        # Window alerts whose condition no longer holds are closed
+        for key in [key for key in self.active if key not in firing]:
+            identifier = self.active.pop(key)
+            if identifier in self.alerts:
+                self.alerts[identifier]['active'] = False
+
+        if state is not None:
+            for item_id in state.changed_posts:
+                platform, member, topic, day, children = state.posts[item_id]
+                if children <= self.post_counts.get(item_id, 0):
+                    continue
+                self.post_counts[item_id] = children
+                for rule in self.rules:
+                    if rule['type'] == 'engagement' and rule['platform'] == platform and \
+                            children > rule['threshold']:
+                        # One alert per post, refreshed as its count grows
+                        self._raise(rule, alert_id(rule['id'], item_id), member, platform,
+                                    {'topic': topic, 'count': children}, self.now)
+
+        # Engagement alerts close once their post has gone quiet for the rule's window
+        engagement_windows = {rule['id']: rule['window'] for rule in self.rules if rule['type'] == 'engagement'}
+        for alert in self.alerts.values():
+            window = engagement_windows.get(alert.get('rule'))
+            if window is not None and alert.get('active') and self.now - alert['last_seen'] >= window:
+                alert['active'] = False
+
+        # Keep the newest alerts only
+        history = sorted(self.alerts.values(), key=lambda alert: (alert['last_seen'], alert['id']), reverse=True)
+        self.alerts = {alert['id']: alert for alert in history[:MAX_ALERTS]}
+        self.active = {key: identifier for key, identifier in self.active.items() if identifier in self.alerts}
+        if state is not None:
+            self.post_counts = {item_id: count for item_id, count in self.post_counts.items() if item_id in state.posts}
+        return history[:MAX_ALERTS]
+
+    def save(self):
+        """Write the engine state, replacing the previous file atomically"""
+        stored = {
+            'rows': self.folded,
+            'now': self.now,
+            'buckets': {
+                f"{name}|{platform}": buckets for (name, platform), buckets in self.buckets.items()
+            },
+            'active': self.active,
+            'alerts': list(self.alerts.values()),
+            'post_counts': self.post_counts
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(stored, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,109 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aggregate
+import columnar
+import entities
+import raw_store
+import synthetic
+
+def build_store(root, days, seed):
+    """Write `days` days of synthetic data at the default daily volume to the raw and column stores"""
+    corpus = synthetic.generate_corpus(seed, {
+        'days': days,
+        'posts_per_site': 10 * days,
+        'posts_per_page': 10 * days,
+        'tweets_per_account': 10 * days
+    })
+    store = columnar.ColumnStore(os.path.join(root, 'columnar'))
+    for platform, items in corpus.items():
+        raw_store.append(platform, items, root=os.path.join(root, 'raw'))
+        store.append(platform, items)
+    return store
+
+def multi_pass(store, raw_root, matcher):
+    """The per-analysis traversals run_monitoring made before the fused pass"""
+    results = {}
+
+    # analyze_sentiment, once per platform
+    for platform, table in (('news', None), ('facebook', 'comments'), ('twitter', 'replies')):
+        posts = store.load('posts', ['platform', 'sentiment'])
+        mean = posts['sentiment'][posts['platform'] == store.code('platform', platform)].mean()
+        if table:
+            mean = (mean + store.load(table, ['sentiment'])['sentiment'].mean()) / 2
+        results[platform] = mean
+
+    # analyze_member_mentions
+    posts = store.load('posts', ['platform', 'member', 'sentiment'])
+    member_totals = np.bincount(posts['member'], minlength=len(store.dictionaries['member']))
+    mention_totals = np.zeros(len(matcher.entities), dtype='int64')
+    for table in ('comments', 'replies'):
+        children = store.load(table, ['content', 'sentiment'])
+        rows, codes = matcher.match_pairs(children['content'])
+        mention_totals += np.bincount(codes, minlength=len(matcher.entities))
+    results['members'] = member_totals.sum() + mention_totals.sum()
+
+    # analyze_topics
+    posts = store.load('posts', ['platform', 'topic', 'sentiment'])
+    results['topics'] = np.bincount(posts['topic']).sum()
+
+    # generate_alerts over the nested items
+    results['engaging'] = (
+        sum(len(post['comments']) > 120 for post in raw_store.load_items('facebook', root=raw_root)) +
+        sum(len(tweet['replies']) > 25 for tweet in raw_store.load_items('twitter', root=raw_root))
+    )
+    return results
+
+def fused_pass(store, matcher):
+    """The single aggregation pass used by run_monitoring"""
+    state = aggregate.aggregate(store, matcher)
+    engaging = sum(
+        (platform == 'facebook' and children > 120) or (platform == 'twitter' and children > 25)
+        for platform, _, _, _, children in state.posts.values()
+    )
+    return {
+        'news': state.platform_mean('news'),
+        'facebook': (state.platform_mean('facebook') + state.platform_mean('facebook', children=True)) / 2,
+        'twitter': (state.platform_mean('twitter') + state.platform_mean('twitter', children=True)) / 2,
+        'members': sum(count for dimension in ('member', 'mention')
+                       for platforms in state.totals(dimension).values() for count, _ in platforms.values()),
+        'topics': sum(count for platforms in state.totals('topic').values() for count, _ in platforms.values()),
+        'engaging': engaging
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fused aggregation pass against the per-analysis passes")
+    parser.add_argument('--days', type=int, default=9, help="Days of synthetic data (about 125k comments per day)")
+    parser.add_argument('--seed', type=int, default=synthetic.DEFAULT_SEED)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        print(f"Building a {args.days}-day corpus...")
+        store = build_store(root, args.days, args.seed)
+        print(f"{store.num_rows('posts')} posts, {store.num_rows('comments')} comments, "
+              f"{store.num_rows('replies')} replies")
+
+        timings = {}
+        outputs = {}
+        for name, run in (('multi-pass', lambda: multi_pass(store, os.path.join(root, 'raw'), entities.EntityMatcher())),
+                          ('fused', lambda: fused_pass(store, entities.EntityMatcher()))):
+            # A fresh matcher per run keeps its text cache from favouring the second run
+            started = time.perf_counter()
+            outputs[name] = run()
+            timings[name] = time.perf_counter() - started
+            print(f"{name}: {timings[name]:.2f}s")
+
+        for key, value in outputs['multi-pass'].items():
+            if not np.isclose(value, outputs['fused'][key]):
+                print(f"Mismatch in {key}: {value} != {outputs['fused'][key]}")
+        print(f"Speedup: {timings['multi-pass'] / timings['fused']:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import advanced_analytics
+import lexicon_scorer
+import synthetic
+from bench_preprocess import build_texts
+
+FIELDS = ('neg', 'neu', 'pos', 'compound')
+
+def timed(score, texts):
+    started = time.perf_counter()
+    scores = score(texts)
+    return scores, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the vectorized lexicon scorer with VADER for speed and accuracy")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--unique', action='store_true', help="Make every text distinct")
+    parser.add_argument('--seed', type=int, default=synthetic.DEFAULT_SEED)
+    parser.add_argument('--tolerance', type=float, default=lexicon_scorer.COMPOUND_TOLERANCE)
+    parser.add_argument('--worst', type=int, default=5, help="Texts with the largest compound differences to show")
+    args = parser.parse_args()
+
+    advanced_analytics.ensure_nltk_resources(('vader_lexicon',))
+    from nltk.sentiment import SentimentIntensityAnalyzer
+
+    texts = build_texts(args.days, args.seed, args.unique)
+    print(f"{len(texts)} texts, {len(set(texts))} distinct")
+
+    sia = SentimentIntensityAnalyzer()
+    reference, vader_elapsed = timed(lambda texts: [sia.polarity_scores(text) for text in texts], texts)
+    # A fresh scorer first, then the same one again with its word features known
+    scorer = lexicon_scorer.LexiconScorer(sia.lexicon_file)
+    scores, cold_elapsed = timed(scorer.score_arrays, texts)
+    _, warm_elapsed = timed(scorer.score_arrays, texts)
+
+    for name, elapsed in (('VADER', vader_elapsed), ('lexicon scorer', cold_elapsed), ('lexicon scorer, warm', warm_elapsed)):
+        print(f"{name:>21}: {len(texts) / elapsed:12.0f} texts/s  ({vader_elapsed / elapsed:.1f}x)")
+
+    differences = {field: np.abs(scores[field] - np.array([score[field] for score in reference])) for field in FIELDS}
+    print(f"Differences from VADER (tolerance {args.tolerance}):")
+    for field, difference in differences.items():
+        within = np.mean(difference <= args.tolerance + 1e-12)
+        print(f"  {field:>8}: mean {difference.mean():.5f}, max {difference.max():.4f}, {within:.2%} within tolerance")
+
+    compound_difference = differences['compound']
+    for index in np.argsort(-compound_difference)[:args.worst]:
+        if compound_difference[index] > args.tolerance:
+            print(f"  {reference[index]['compound']:+.4f} vs {scores['compound'][index]:+.4f}: {texts[index][:100]!r}")
+
+if __name__ == "__main__":
+    main()
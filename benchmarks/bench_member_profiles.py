@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import prepare_data
+import synthetic
+
+def build_data(days, members, seed):
+    """Return prepare_data-style data: `days` days of posts spread over `members` members, without comments"""
+    corpus = synthetic.generate_corpus(seed, {
+        'days': days,
+        'posts_per_site': 10 * days,
+        'posts_per_page': 10 * days,
+        'comments_per_post': 0,
+        'tweets_per_account': 10 * days,
+        'replies_per_tweet': 0
+    })
+    names = [f"Member{i:03d} {synthetic.MEMBERS[i % len(synthetic.MEMBERS)].split()[-1]}" for i in range(members)]
+    rng = np.random.default_rng(seed)
+    member_mentions = {
+        name: {'total': 0, 'news': 0, 'facebook': 0, 'twitter': 0, 'sentiment': {'overall': 0.5}}
+        for name in names
+    }
+    for platform, items in corpus.items():
+        for item, member in zip(items, rng.integers(0, members, len(items)).tolist()):
+            item['member'] = names[member]
+            member_mentions[names[member]]['total'] += 1
+            member_mentions[names[member]][platform] += 1
+    return dict(corpus, member_mentions=member_mentions)
+
+def filter_and_sort(data):
+    """generate_member_profiles before the index: a filter and a full sort per member and source"""
+    print("Generating member profiles...")
+    
+    if not data['member_mentions']:
+        print("No member mentions data available.")
+        return
+    
+    member_profiles = []
+    
+    for member_name, mentions in data['member_mentions'].items():
+        # Get recent mentions from different sources
+        recent_mentions = []
+        
+        # Add news mentions
+        if data['news']:
+            news_mentions = [item for item in data['news'] if item['member'] == member_name]
+            news_mentions.sort(key=lambda x: x['date'], reverse=True)
+            for mention in news_mentions[:3]:
+                recent_mentions.append({
+                    'id': len(recent_mentions) + 1,
+                    'source': 'news',
+                    'title': mention['title'],
+                    'snippet': mention['content'][:150] + '...',
+                    'url': mention['url'],
+                    'date': mention['date'].split()[0],
+                    'sentiment': 'positive' if mention['sentiment'] > 0.6 else 'neutral' if mention['sentiment'] > 0.4 else 'negative'
+                })
+        
+        # Add Facebook mentions
+        if data['facebook']:
+            fb_mentions = [post for post in data['facebook'] if post['member'] == member_name]
+            fb_mentions.sort(key=lambda x: x['date'], reverse=True)
+            for mention in fb_mentions[:2]:
+                recent_mentions.append({
+                    'id': len(recent_mentions) + 1,
+                    'source': 'facebook',
+                    'title': f"Facebook post about {mention['topic']}",
+                    'snippet': mention['content'][:150] + '...',
+                    'url': mention['url'],
+                    'date': mention['date'].split()[0],
+                    'sentiment': 'positive' if mention['sentiment'] > 0.6 else 'neutral' if mention['sentiment'] > 0.4 else 'negative'
+                })
+        
+        # Add Twitter mentions
+        if data['twitter']:
+            twitter_mentions = [tweet for tweet in data['twitter'] if tweet['member'] == member_name]
+            twitter_mentions.sort(key=lambda x: x['date'], reverse=True)
+            for mention in twitter_mentions[:2]:
+                recent_mentions.append({
+                    'id': len(recent_mentions) + 1,
+                    'source': 'twitter',
+                    'title': f"Tweet about {mention['topic']}",
+                    'snippet': mention['content'],
+                    'url': mention['url'],
+                    'date': mention['date'].split()[0],
+                    'sentiment': 'positive' if mention['sentiment'] > 0.6 else 'neutral' if mention['sentiment'] > 0.4 else 'negative'
+                })
+        
+        # Sort all mentions by date
+        recent_mentions.sort(key=lambda x: x['date'], reverse=True)
+        
+        # Determine trend (up or down)
+        trend = "up" if mentions['sentiment']['overall'] > 0.5 else "down"
+        
+        # Create member profile
+        profile = {
+            'id': len(member_profiles) + 1,
+            'name': member_name,
+            'position': 'Chairman of the Parliament' if 'AMARBAYASGALAN' in member_name else 
+                       'Deputy Chairman' if 'BULGANTUYA' in member_name else 'Member',
+            'committee': prepare_data.get_committee_for_member(member_name),
+            'image': f"https://www.parliament.mn/images/members/{member_name.split()[-1].lower()}.jpg",
+            'sentiment': {
+                'current': mentions['sentiment']['overall'],
+                'previous': max(0, min(1, mentions['sentiment']['overall'] + (0.1 if mentions['sentiment']['overall'] < 0.5 else -0.1))),
+                'trend': trend
+            },
+            'mentions': {
+                'total': mentions['total'],
+                'news': mentions['news'],
+                'facebook': mentions['facebook'],
+                'twitter': mentions['twitter']
+            },
+            'recentMentions': recent_mentions
+        }
+        
+        member_profiles.append(profile)
+    
+    # Save the member profiles to a JSON file
+    with open('data/member_profiles.json', 'w') as f:
+        json.dump(member_profiles, f, indent=2)
+    
+    print(f"Generated profiles for {len(member_profiles)} parliament members")
+    return member_profiles
+
+def indexed(data):
+    """The indexed top-k builder used by prepare_data"""
+    return prepare_data.generate_member_profiles(data)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the indexed member profile builder against per-member filtering")
+    parser.add_argument('--days', type=int, default=365, help="Days of synthetic posts (about 1,700 per day)")
+    parser.add_argument('--members', type=int, default=76)
+    parser.add_argument('--seed', type=int, default=synthetic.DEFAULT_SEED)
+    args = parser.parse_args()
+
+    print(f"Building a {args.days}-day corpus over {args.members} members...")
+    data = build_data(args.days, args.members, args.seed)
+    print(f"{len(data['news'])} articles, {len(data['facebook'])} posts, {len(data['twitter'])} tweets")
+
+    with tempfile.TemporaryDirectory() as root:
+        # Both builders write data/member_profiles.json
+        os.makedirs(os.path.join(root, 'data'))
+        cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            timings = {}
+            outputs = {}
+            for name, run in (('filter-and-sort', filter_and_sort), ('indexed', indexed)):
+                started = time.perf_counter()
+                outputs[name] = run(data)
+                timings[name] = time.perf_counter() - started
+                print(f"{name}: {timings[name]:.2f}s")
+        finally:
+            os.chdir(cwd)
+
+    print("Profiles match" if outputs['filter-and-sort'] == outputs['indexed'] else "Profiles differ")
+    print(f"Speedup: {timings['filter-and-sort'] / timings['indexed']:.1f}x")
+
+if __name__ == "__main__":
+    main()
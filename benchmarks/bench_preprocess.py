@@ -0,0 +1,110 @@
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import advanced_analytics
+import synthetic
+
+def build_texts(days, seed, unique):
+    """Return the contents of `days` days of synthetic posts, comments and replies
+
+    The synthetic texts are templated, as much of the real content is; with
+    unique=True three random corpus words are appended to each, so every
+    text differs and only the lemma cache can help.
+    """
+    corpus = synthetic.generate_corpus(seed, {
+        'days': days,
+        'posts_per_site': 10 * days,
+        'posts_per_page': 2 * days,
+        'comments_per_post': 20,
+        'tweets_per_account': 10 * days,
+        'replies_per_tweet': 10
+    })
+    texts = []
+    for platform, items in corpus.items():
+        child_key = {'facebook': 'comments', 'twitter': 'replies'}.get(platform)
+        for item in items:
+            texts.append(item['content'])
+            texts.extend(child['content'] for child in item.get(child_key) or [])
+
+    if unique:
+        words = sorted({word for text in texts for word in re.findall(r'[a-z]+', text.lower())})
+        rng = np.random.default_rng(seed)
+        picks = rng.integers(0, len(words), (len(texts), 3)).tolist()
+        texts = [f"{text} {' '.join(words[i] for i in pick)}" for text, pick in zip(texts, picks)]
+    return texts
+
+def per_call(texts):
+    """AdvancedAnalytics.preprocess_text before batching: every step for every text"""
+    advanced_analytics.ensure_nltk_resources(('punkt', 'stopwords', 'wordnet'))
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+    from nltk.tokenize import word_tokenize
+    lemmatizer = WordNetLemmatizer()
+    stop_words = set(stopwords.words('english'))
+
+    def preprocess_text(text):
+        # Convert to lowercase
+        text = text.lower()
+
+        # Remove special characters and numbers
+        text = re.sub(r'[^a-zA-Z\s]', '', text)
+
+        # Tokenize
+        tokens = word_tokenize(text)
+
+        # Remove stopwords and lemmatize
+        tokens = [lemmatizer.lemmatize(token) for token in tokens if token not in stop_words]
+
+        return ' '.join(tokens)
+
+    return [preprocess_text(text) for text in texts]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched, memoized text preprocessing against per-call preprocessing")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--unique', action='store_true', help="Make every text distinct")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=synthetic.DEFAULT_SEED)
+    args = parser.parse_args()
+
+    texts = build_texts(args.days, args.seed, args.unique)
+    print(f"{len(texts)} texts, {len(set(texts))} distinct")
+
+    def batch(workers):
+        # A fresh preprocessor each time, so no run profits from an earlier one
+        return lambda texts: advanced_analytics.TextPreprocessor().process_batch(texts, workers)
+
+    warm = advanced_analytics.TextPreprocessor()
+    warm.process_batch(texts, 1)
+
+    runs = [
+        ('per-call', per_call),
+        ('batch, 1 process', batch(1)),
+        (f"batch, {args.workers} processes", batch(args.workers)),
+        ('batch, warm cache', lambda texts: warm.process_batch(texts, 1))
+    ]
+
+    # Let the pool run regardless of the batch size
+    advanced_analytics.PREPROCESS_POOL_MIN = 0
+
+    outputs = {}
+    baseline = None
+    for name, run in runs:
+        started = time.perf_counter()
+        outputs[name] = run(texts)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(f"{name:>24}: {len(texts) / elapsed:12.0f} texts/s  ({baseline / elapsed:.1f}x)")
+
+    reference = outputs['per-call']
+    print("Outputs match" if all(output == reference for output in outputs.values()) else "Outputs differ")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import advanced_analytics
+import synthetic
+from bench_preprocess import build_texts
+
+def worker_counts(most):
+    """1, 2, 4, ... up to most, and most itself"""
+    counts = []
+    count = 1
+    while count < most:
+        counts.append(count)
+        count *= 2
+    return counts + [most]
+
+def analyse(texts, scorer, workers):
+    """Preprocess and score texts as the sentiment stage does, without the on-disk sentiment cache"""
+    analytics = advanced_analytics.AdvancedAnalytics(scorer=scorer, workers=workers)
+    with analytics.worker_pool() as pool:
+        processed = analytics.preprocess_texts(texts, pool=pool)
+        scores = analytics.score_batch(texts, pool)
+    return processed, scores
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how the sentiment stage scales with its worker processes")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--unique', action='store_true', help="Make every text distinct")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Most workers to try")
+    parser.add_argument('--scorer', choices=advanced_analytics.SENTIMENT_SCORERS, default='vader')
+    parser.add_argument('--seed', type=int, default=synthetic.DEFAULT_SEED)
+    args = parser.parse_args()
+
+    texts = build_texts(args.days, args.seed, args.unique)
+    print(f"{len(texts)} texts, {len(set(texts))} distinct")
+
+    # Use the pool for every batch, so each run measures its workers
+    advanced_analytics.PREPROCESS_POOL_MIN = 0
+    advanced_analytics.SENTIMENT_POOL_MIN = 0
+
+    results = {}
+    baseline = None
+    for workers in worker_counts(args.workers):
+        started = time.perf_counter()
+        results[workers] = analyse(texts, args.scorer, workers)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f"{workers:>4} workers: {len(texts) / elapsed:10.0f} texts/s  ({speedup:.1f}x, {speedup / workers:.0%} efficiency)")
+
+    reference = results[1]
+    print("Outputs match" if all(result == reference for result in results.values()) else "Outputs differ")
+
+if __name__ == "__main__":
+    main()
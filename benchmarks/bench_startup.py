@@ -0,0 +1,65 @@
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the light stages must start without; each stage imports its own when it runs
+HEAVY_MODULES = ('tensorflow', 'sklearn', 'nltk', 'wordcloud', 'matplotlib')
+
+# Seconds allowed for importing advanced_analytics and creating AdvancedAnalytics
+STARTUP_BUDGET = 1.0
+
+STARTUP = f"""
+import sys, time
+started = time.perf_counter()
+import advanced_analytics
+analytics = advanced_analytics.AdvancedAnalytics()
+elapsed = time.perf_counter() - started
+heavy = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+print(f"{{elapsed:.4f}} {{','.join(heavy)}}", file=sys.stderr)
+"""
+
+def measure_startup():
+    """Start a fresh interpreter and return (startup seconds, heavy modules loaded, import-time rows)
+
+    Rows are (cumulative microseconds, self microseconds, module) from -X importtime.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    summary = None
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:'):
+            fields = [field.strip() for field in line[len('import time:'):].split('|')]
+            if fields[0].isdigit():
+                rows.append((int(fields[1]), int(fields[0]), fields[2].strip()))
+        elif line and line[0].isdigit():
+            summary = line.split(' ')
+    elapsed = float(summary[0])
+    heavy = [name for name in summary[1].split(',') if name] if len(summary) > 1 else []
+    return elapsed, heavy, rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the startup time of advanced_analytics against its budget")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to start; the fastest run counts")
+    parser.add_argument('--top', type=int, default=15, help="Slowest imports to report")
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET)
+    args = parser.parse_args()
+
+    runs = [measure_startup() for _ in range(args.runs)]
+    elapsed, heavy, rows = min(runs, key=lambda run: run[0])
+
+    print(f"Slowest imports in the fastest of {args.runs} runs (cumulative and own ms):")
+    for cumulative, own, name in sorted(rows, key=lambda row: row[0], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} {own / 1000:8.1f}  {name}")
+
+    print(f"Startup: {elapsed:.3f}s (budget {args.budget:.3f}s)")
+    print(f"Heavy modules loaded: {', '.join(heavy) if heavy else 'none'}")
+    if heavy or elapsed > args.budget:
+        print("Startup budget exceeded")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+# Charts are only ever written to files, so no display backend is needed
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+# Where the dashboard charts are written
+CHART_DIR = 'data/visualizations'
+
+# Input hash of every chart written, by chart path
+CACHE_PATH = os.path.join(CHART_DIR, 'chart_cache.json')
+
+# Bump to redraw every chart after changing how they look
+CHART_VERSION = 1
+
+def slug(name):
+    """Return a file-name-safe version of a member or topic name"""
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+def sentiment_trend(inputs, path):
+    """Line chart of the daily sentiment per platform"""
+    plt.figure(figsize=(10, 6))
+
+    plt.plot(inputs['dates'], inputs['overall'], 'o-', label='Overall', linewidth=2)
+    plt.plot(inputs['dates'], inputs['news'], 's-', label='News')
+    plt.plot(inputs['dates'], inputs['facebook'], '^-', label='Facebook')
+    plt.plot(inputs['dates'], inputs['twitter'], 'd-', label='Twitter')
+
+    plt.title('Sentiment Trend by Platform')
+    plt.xlabel('Date')
+    plt.ylabel('Sentiment Score (%)')
+    plt.ylim(30, 80)
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.legend()
+    plt.tight_layout()
+
+    plt.savefig(path)
+    plt.close()
+
+def member_comparison(inputs, path):
+    """Mentions (bars) and sentiment (points) per member, most mentioned first"""
+    fig, ax1 = plt.subplots(figsize=(12, 8))
+
+    # Plot mentions as bars
+    ax1.barh(inputs['names'], inputs['mentions'], color='skyblue')
+    ax1.set_xlabel('Total Mentions')
+    ax1.set_ylabel('Parliament Member')
+    ax1.set_title('Parliament Members: Mentions and Sentiment')
+
+    # Plot sentiment as points
+    ax2 = ax1.twiny()
+    ax2.plot(inputs['sentiment'], inputs['names'], 'ro', markersize=8)
+    ax2.set_xlabel('Sentiment Score (%)')
+    ax2.set_xlim(0, 100)
+
+    # Add a legend
+    from matplotlib.lines import Line2D
+    legend_elements = [
+        Line2D([0], [0], color='skyblue', lw=4, label='Mentions'),
+        Line2D([0], [0], marker='o', color='r', label='Sentiment', markersize=8, linestyle='None')
+    ]
+    ax1.legend(handles=legend_elements, loc='lower right')
+
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+def distribution(inputs, path):
+    """Pie chart of counts per label"""
+    plt.figure(figsize=inputs['size'])
+
+    plt.pie(inputs['counts'], labels=inputs['labels'], autopct='%1.1f%%', startangle=90, colors=inputs['colors'])
+    plt.axis('equal')
+    plt.title(inputs['title'])
+    plt.tight_layout()
+
+    plt.savefig(path)
+    plt.close()
+
+def daily_series(inputs, path):
+    """Daily mentions (bars) with their mean sentiment (line) for one member or topic"""
+    fig, ax1 = plt.subplots(figsize=(8, 4))
+
+    ax1.bar(inputs['dates'], inputs['counts'], color='skyblue')
+    ax1.set_ylabel('Mentions')
+    ax1.set_title(inputs['title'])
+    ax1.tick_params(axis='x', labelrotation=45, labelsize=8)
+
+    # Days without mentions have no sentiment and leave a gap in the line
+    ax2 = ax1.twinx()
+    sentiment = [np.nan if value is None else value for value in inputs['sentiment']]
+    ax2.plot(inputs['dates'], sentiment, 'o-', color='tab:red', markersize=3)
+    ax2.set_ylabel('Sentiment Score (%)')
+    ax2.set_ylim(0, 100)
+
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+def input_hash(renderer, inputs):
+    """Return the hash that identifies a chart: its renderer, its inputs and CHART_VERSION"""
+    payload = json.dumps([CHART_VERSION, renderer.__name__, inputs], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def _render(job):
+    path, renderer, inputs = job
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    renderer(inputs, path)
+    return path
+
+def load_cache(path=CACHE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def render_charts(jobs, workers=None, cache_path=CACHE_PATH):
+    """Render the (path, renderer, inputs) jobs whose inputs changed since they were last drawn
+
+    A chart is skipped when its input hash matches the one recorded for its
+    path and the file still exists. The rest render in a process pool;
+    renderers are module-level functions, so they pickle by name. Returns
+    the paths rendered.
+    """
+    cache = load_cache(cache_path)
+    stale = []
+    for path, renderer, inputs in jobs:
+        key = input_hash(renderer, inputs)
+        if cache.get(path) != key or not os.path.exists(path):
+            stale.append(((path, renderer, inputs), key))
+
+    # A pool only pays for its start-up with several charts to draw
+    workers = workers or min(len(stale), os.cpu_count() or 1)
+    if workers > 1 and len(stale) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(_render, [job for job, _ in stale]))
+    else:
+        rendered = [_render(job) for job, _ in stale]
+
+    for (path, _, _), key in stale:
+        cache[path] = key
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path + '.tmp', 'w') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(cache_path + '.tmp', cache_path)
+
+    print(f"Rendered {len(rendered)} charts, {len(jobs) - len(rendered)} unchanged")
+    return rendered
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import time
+
+# Directory holding one checkpoint file per pipeline
+CHECKPOINT_DIR = 'data/checkpoints'
+
+def _stat(path):
+    """Return (relative path, size, mtime) entries for a file, or every file under a directory"""
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return [(path, stat.st_size, stat.st_mtime_ns)]
+    entries = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            stat = os.stat(file_path)
+            entries.append((file_path, stat.st_size, stat.st_mtime_ns))
+    return entries
+
+def fingerprint(paths=(), params=None):
+    """Return a fingerprint of input files and directories and of stage parameters
+
+    Files are identified by path, size and modification time, so a stage's
+    inputs are fingerprinted without reading them. A missing input is part
+    of the fingerprint too.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        entries = _stat(path) if os.path.exists(path) else [(path, None, None)]
+        digest.update(json.dumps(entries).encode('utf-8'))
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+class StageCheckpoints:
+    """Completed pipeline stages with the fingerprint of their inputs and their outputs
+
+    A stage is complete when it finished with the same input fingerprint
+    and all of its outputs still exist. Completions are kept in memory
+    until save(), so a caller that holds state in memory can record them
+    only once that state is on disk.
+    """
+
+    def __init__(self, pipeline, root=CHECKPOINT_DIR):
+        os.makedirs(root, exist_ok=True)
+        self.path = os.path.join(root, f"{pipeline}.json")
+        self.stages = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                self.stages = json.load(f)
+
+    def is_complete(self, stage, fingerprint):
+        record = self.stages.get(stage)
+        return record is not None and record['fingerprint'] == fingerprint and \
+            all(os.path.exists(path) for path in record['outputs'])
+
+    def complete(self, stage, fingerprint, outputs=()):
+        self.stages[stage] = {'fingerprint': fingerprint, 'outputs': list(outputs), 'finished': time.time()}
+
+    def invalidate(self, stage):
+        self.stages.pop(stage, None)
+
+    def save(self):
+        """Write the checkpoints, replacing the previous file atomically"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.stages, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def run(self, stage, inputs, outputs, func, params=None):
+        """Run func unless the stage already completed with the same inputs; return True if it ran
+
+        The fingerprint is taken before func runs, so an input changed by
+        another process meanwhile makes the stage run again next time. The
+        checkpoint is saved as soon as the stage finishes, so a later
+        failure resumes from the next stage.
+        """
+        stage_fingerprint = fingerprint(inputs, params)
+        if self.is_complete(stage, stage_fingerprint):
+            print(f"Skipping {stage}: inputs unchanged since {time.ctime(self.stages[stage]['finished'])}")
+            return False
+        func()
+        self.complete(stage, stage_fingerprint, outputs)
+        self.save()
+        return True
@@ -0,0 +1,266 @@
+import glob
+import json
+import os
+import shutil
+
+import numpy as np
+
+import raw_store
+from watermarks import CHILD_ID_KEYS, CHILD_KEYS, ID_KEYS, SOURCE_KEYS
+
+# Root of the column store: data/columnar/<table>/part-NNNNN/<column>.npy
+COLUMNAR_DIR = 'data/columnar'
+
+# Table schemas. 'str' columns are stored as UTF-8 bytes plus int64 offsets,
+# dictionary columns as integer codes into dictionaries.json.
+TABLES = {
+    'posts': {
+        'platform': 'int8', 'source': 'int32', 'member': 'int16', 'topic': 'int16',
+        'ts': 'int64', 'sentiment': 'float64', 'likes': 'int32', 'shares': 'int32',
+        'item_id': 'str', 'url': 'str', 'title': 'str', 'content': 'str'
+    },
+    'comments': {
+        'post': 'int64', 'ts': 'int64', 'sentiment': 'float64', 'likes': 'int32',
+        'item_id': 'str', 'content': 'str'
+    },
+    'replies': {
+        'post': 'int64', 'ts': 'int64', 'sentiment': 'float64', 'likes': 'int32',
+        'item_id': 'str', 'content': 'str'
+    }
+}
+DICTIONARY_COLUMNS = ('platform', 'source', 'member', 'topic')
+
+# Child table per platform
+CHILD_TABLES = {'news': None, 'facebook': 'comments', 'twitter': 'replies'}
+
+def to_epoch(dates):
+    """Convert 'YYYY-MM-DD HH:MM:SS' strings to int64 seconds
+
+    Timestamps keep the wall-clock time of the date strings (no timezone
+    shift), so they round-trip with the dates shown on the dashboard.
+    """
+    return np.array(dates, dtype='datetime64[s]').astype('int64')
+
+def from_epoch(ts):
+    """Convert int64 seconds back to 'YYYY-MM-DD HH:MM:SS' strings"""
+    return np.char.replace(np.datetime_as_string(np.asarray(ts).astype('datetime64[s]')), 'T', ' ')
+
+def _write_strings(directory, name, values):
+    """Write a string column as concatenated UTF-8 bytes and row offsets"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype='int64')
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    np.save(os.path.join(directory, f"{name}.offsets.npy"), offsets)
+    np.save(os.path.join(directory, f"{name}.data.npy"), np.frombuffer(b''.join(encoded), dtype='uint8'))
+
+def _read_strings(directory, name):
+    """Read a string column written by _write_strings"""
+    offsets = np.load(os.path.join(directory, f"{name}.offsets.npy")).tolist()
+    data = np.load(os.path.join(directory, f"{name}.data.npy")).tobytes()
+    return np.array([data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)],
+                    dtype=object)
+
+class ColumnStore:
+    """Append-only columnar tables for posts, comments and replies
+
+    posts holds articles, Facebook posts and tweets; comments and replies
+    point at their post through the 'post' column, a row number in posts.
+    """
+
+    def __init__(self, root=COLUMNAR_DIR):
+        self.root = root
+        self.dictionaries = {column: [] for column in DICTIONARY_COLUMNS}
+        self.codes = {column: {} for column in DICTIONARY_COLUMNS}
+        self._post_rows = None
+
+        path = os.path.join(root, 'dictionaries.json')
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                stored = json.load(f)
+            for column in DICTIONARY_COLUMNS:
+                for value in stored.get(column, []):
+                    self._add_value(column, value)
+
+    def _add_value(self, column, value):
+        self.codes[column][value] = len(self.dictionaries[column])
+        self.dictionaries[column].append(value)
+
+    def encode(self, column, values):
+        """Return the codes of values, extending the column's dictionary as needed"""
+        codes = self.codes[column]
+        for value in set(values) - codes.keys():
+            self._add_value(column, value)
+        return np.array([codes[value] for value in values], dtype=TABLES['posts'][column])
+
+    def code(self, column, value):
+        """Return the code of a single value, or -1 if it has never been stored"""
+        return self.codes[column].get(value, -1)
+
+    def decode(self, column, codes):
+        """Map codes back to their dictionary values"""
+        values = np.array(self.dictionaries[column], dtype=object)
+        return values[np.asarray(codes)]
+
+    def parts(self, table):
+        """Return the part directories of a table, oldest first"""
+        return sorted(glob.glob(os.path.join(self.root, table, 'part-[0-9][0-9][0-9][0-9][0-9]')))
+
+    def num_rows(self, table):
+        """Return the number of rows stored in a table"""
+        return sum(len(np.load(os.path.join(part, 'ts.npy'), mmap_mode='r')) for part in self.parts(table))
+
+    def iter_parts(self, table, columns=None, start=0):
+        """Yield the columns of a table one part at a time, oldest part first
+
+        Numeric columns are memory-mapped; string columns are decoded into
+        object arrays, so only request them when they are needed. Rows before
+        start are skipped, and parts holding only such rows are never read.
+        """
+        schema = TABLES[table]
+        columns = columns or list(schema)
+        first_row = 0
+        for part in self.parts(table):
+            num_rows = len(np.load(os.path.join(part, 'ts.npy'), mmap_mode='r'))
+            skip = max(start - first_row, 0)
+            first_row += num_rows
+            if skip >= num_rows:
+                continue
+            loaded = {}
+            for column in columns:
+                if schema[column] == 'str':
+                    loaded[column] = _read_strings(part, column)[skip:]
+                else:
+                    loaded[column] = np.load(os.path.join(part, f"{column}.npy"), mmap_mode='r')[skip:]
+            yield loaded
+
+    def load(self, table, columns=None):
+        """Load columns of a table as arrays, concatenating its parts"""
+        schema = TABLES[table]
+        columns = columns or list(schema)
+        chunks = {column: [] for column in columns}
+        for part in self.iter_parts(table, columns):
+            for column in columns:
+                chunks[column].append(part[column])
+
+        loaded = {}
+        for column in columns:
+            if chunks[column]:
+                loaded[column] = np.concatenate(chunks[column])
+            else:
+                loaded[column] = np.array([], dtype=object if schema[column] == 'str' else schema[column])
+        return loaded
+
+    def post_rows(self):
+        """Return the {item_id: row} index of the posts table"""
+        if self._post_rows is None:
+            ids = self.load('posts', ['item_id'])['item_id']
+            self._post_rows = {item_id: row for row, item_id in enumerate(ids)}
+        return self._post_rows
+
+    def _save_dictionaries(self):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, 'dictionaries.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.dictionaries, f)
+        os.replace(path + '.tmp', path)
+
+    def _write_part(self, table, columns, directory=None):
+        """Write one new part; it only becomes visible once all its columns exist"""
+        schema = TABLES[table]
+        directory = directory or os.path.join(self.root, table)
+        os.makedirs(directory, exist_ok=True)
+        existing = glob.glob(os.path.join(directory, 'part-[0-9][0-9][0-9][0-9][0-9]'))
+        part = os.path.join(directory, f"part-{len(existing):05d}")
+        tmp_part = part + '.tmp'
+        # A leftover from an interrupted write is never visible, so it is safe to drop
+        shutil.rmtree(tmp_part, ignore_errors=True)
+        os.makedirs(tmp_part)
+        for column, kind in schema.items():
+            if kind == 'str':
+                _write_strings(tmp_part, column, columns[column])
+            else:
+                np.save(os.path.join(tmp_part, f"{column}.npy"), np.asarray(columns[column], dtype=kind))
+        os.rename(tmp_part, part)
+
+    def compact(self, table):
+        """Merge all parts of a table into one, keeping row numbers unchanged"""
+        if len(self.parts(table)) < 2:
+            return
+        columns = self.load(table)
+        directory = os.path.join(self.root, table)
+        compacted = directory + '.compact'
+        shutil.rmtree(compacted, ignore_errors=True)
+        self._write_part(table, columns, compacted)
+        # Swap the directories; the old parts are only removed once the new one is in place
+        os.rename(directory, directory + '.old')
+        os.rename(compacted, directory)
+        shutil.rmtree(directory + '.old')
+
+    def append_records(self, platform, records):
+        """Append flat raw-store records of one platform, parents before their children"""
+        item_kind, child_kind = raw_store.KINDS[platform]
+        id_key = ID_KEYS[platform]
+        source_key = SOURCE_KEYS[platform]
+        parents = [record for record in records if record['kind'] == item_kind]
+        children = [record for record in records if record['kind'] == child_kind]
+
+        if parents:
+            post_rows = self.post_rows()
+            first_row = self.num_rows('posts')
+            columns = {
+                'platform': self.encode('platform', [platform] * len(parents)),
+                'source': self.encode('source', [record[source_key] for record in parents]),
+                'member': self.encode('member', [record['member'] for record in parents]),
+                'topic': self.encode('topic', [record['topic'] for record in parents]),
+                'ts': to_epoch([record['date'] for record in parents]),
+                'sentiment': [record['sentiment'] for record in parents],
+                'likes': [record.get('likes', 0) for record in parents],
+                'shares': [record.get('shares', record.get('retweets', 0)) for record in parents],
+                'item_id': [record[id_key] for record in parents],
+                'url': [record.get('url', '') for record in parents],
+                'title': [record.get('title', '') for record in parents],
+                'content': [record['content'] for record in parents]
+            }
+            # Dictionaries go first so a part never refers to an unknown code
+            self._save_dictionaries()
+            self._write_part('posts', columns)
+            for offset, record in enumerate(parents):
+                post_rows[record[id_key]] = first_row + offset
+
+        if children:
+            post_rows = self.post_rows()
+            child_id_key = CHILD_ID_KEYS[platform]
+            linked = [record for record in children if record[id_key] in post_rows]
+            if len(linked) < len(children):
+                print(f"Skipping {len(children) - len(linked)} {child_kind} records without a stored parent")
+            if linked:
+                columns = {
+                    'post': [post_rows[record[id_key]] for record in linked],
+                    'ts': to_epoch([record['date'] for record in linked]),
+                    'sentiment': [record['sentiment'] for record in linked],
+                    'likes': [record.get('likes', 0) for record in linked],
+                    'item_id': [record[child_id_key] for record in linked],
+                    'content': [record['content'] for record in linked]
+                }
+                self._write_part(CHILD_TABLES[platform], columns)
+
+    def append(self, platform, new_items, updates=()):
+        """Append new nested items and the new children of stored items"""
+        records = list(raw_store.flatten(platform, new_items))
+        records.extend(raw_store.flatten(platform, updates, parents=False))
+        self.append_records(platform, records)
+
+    def rebuild(self, batch_size=200000):
+        """Rebuild every table from the raw store"""
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.__init__(self.root)
+        for platform in CHILD_KEYS:
+            batch = []
+            # Partitions are read oldest first, so parents precede their children
+            for record in raw_store.iter_records(platform):
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    self.append_records(platform, batch)
+                    batch = []
+            if batch:
+                self.append_records(platform, batch)
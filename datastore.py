@@ -0,0 +1,102 @@
+import json
+import os
+from collections.abc import Mapping
+
+import columnar
+import raw_store
+
+# Platforms kept in the raw store
+PLATFORMS = ('news', 'facebook', 'twitter')
+
+# JSON datasets written by monitor.py, prepare_data.py and advanced_analytics.py, by name
+JSON_PATHS = {
+    'member_mentions': 'data/member_mentions.json',
+    'topic_mentions': 'data/topic_mentions.json',
+    'alerts': 'data/alerts.json',
+    'sentiment_trends': 'data/sentiment_trends.json',
+    'member_profiles': 'data/member_profiles.json',
+    'member_insights': 'data/ai_outputs/member_insights.json'
+}
+
+def signature(paths):
+    """Return the (path, size, mtime_ns) of every existing file in paths, or None if there is none"""
+    stats = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        stats.append((path, stat.st_size, stat.st_mtime_ns))
+    return tuple(stats) or None
+
+def _load_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+class DataStore(Mapping):
+    """Lazy, read-only access to the monitoring data by dataset name
+
+    Nothing is read until a dataset is first accessed. Each dataset is
+    then kept together with the size and modification time of its files,
+    and read again only when those change, so a long-lived store follows
+    new monitoring runs at the cost of a few stat calls. Platforms come
+    from the raw store: parent items only by default, or items with their
+    comments and replies with children=True. Missing datasets are None;
+    whether to regenerate them is up to the caller.
+
+    Loaded values are shared by every access through the same store, so
+    code that changes them should use its own store.
+    """
+
+    def __init__(self, children=False, raw_root=raw_store.RAW_DIR, json_paths=None,
+                 columnar_root=columnar.COLUMNAR_DIR):
+        self.children = children
+        self.raw_root = raw_root
+        self.json_paths = json_paths or JSON_PATHS
+        self.columnar_root = columnar_root
+        self._cache = {}
+
+    def __iter__(self):
+        return iter(PLATFORMS + tuple(self.json_paths))
+
+    def __len__(self):
+        return len(PLATFORMS) + len(self.json_paths)
+
+    def __getitem__(self, name):
+        if name in PLATFORMS:
+            paths = raw_store.partitions(name, root=self.raw_root)
+            if self.children:
+                load = lambda: raw_store.load_items(name, root=self.raw_root) or None
+            else:
+                load = lambda: list(raw_store.iter_items(name, root=self.raw_root)) or None
+        elif name in self.json_paths:
+            paths = [self.json_paths[name]]
+            load = lambda: _load_json(self.json_paths[name])
+        else:
+            raise KeyError(name)
+        return self._cached(name, paths, load)
+
+    def _cached(self, key, paths, load):
+        current = signature(paths)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == current:
+            return cached[1]
+        value = load() if current is not None else None
+        self._cache[key] = (current, value)
+        return value
+
+    def has_platforms(self, platforms=PLATFORMS):
+        """Return True if the raw store holds data for every platform, without loading any"""
+        return all(raw_store.has_data(platform, root=self.raw_root) for platform in platforms)
+
+    def columns(self, table, columns=None):
+        """Return columns of a column store table as arrays
+
+        Use this instead of a platform's items when only a few fields are
+        needed: numeric columns are read from memory-mapped files and only
+        the requested string columns are decoded.
+        """
+        store = columnar.ColumnStore(self.columnar_root)
+        paths = [os.path.join(part, 'ts.npy') for part in store.parts(table)]
+        columns = tuple(columns or columnar.TABLES[table])
+        return self._cached(('columns', table, columns), paths, lambda: store.load(table, list(columns)))
@@ -0,0 +1,215 @@
+import hashlib
+import os
+import re
+import sqlite3
+
+import numpy as np
+
+from entities import normalize
+from watermarks import CHILD_ID_KEYS, CHILD_KEYS, ID_KEYS, SOURCE_KEYS
+
+# Directory holding the key index (SQLite) and its Bloom filter
+DEDUP_DIR = 'data/dedup'
+
+# Bloom filter size in bits (a power of two) and number of hash probes.
+# The filter doubles whenever it holds more than one key per BITS_PER_KEY bits.
+BLOOM_BITS = 1 << 24
+BLOOM_HASHES = 7
+BITS_PER_KEY = 12
+
+# Keys looked up per SQLite query when the Bloom filter cannot rule them out
+LOOKUP_BATCH = 500
+
+_NON_WORD = re.compile(r'\W+')
+
+def normalize_content(text):
+    """Normalise text for fingerprinting: NFC, case-folded, punctuation and spacing collapsed"""
+    return _NON_WORD.sub(' ', normalize(text or '')).strip()
+
+def _key(*parts):
+    """Return a signed 64-bit key for the parts (SQLite integers are signed)"""
+    digest = hashlib.blake2b('\x1f'.join(str(part) for part in parts).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+def _id_key(platform, record_id):
+    return _key('id', platform, record_id) if record_id else None
+
+def item_keys(platform, item):
+    """Return the (ID key, content key) of an article, post or tweet; the ID key is None without an ID
+
+    The content key covers the source, title, text and date; it is what an
+    item that comes without an ID is recognised by.
+    """
+    text = normalize_content(item.get('title', '') + ' ' + item['content'])
+    return (_id_key(platform, item.get(ID_KEYS[platform])),
+            _key('content', platform, item[SOURCE_KEYS[platform]], text, item['date']))
+
+def child_keys(platform, parent_id, child):
+    """Return the (ID key, content key) of a comment or reply under its parent; the ID key is None without an ID"""
+    return (_id_key(platform, child.get(CHILD_ID_KEYS[platform])),
+            _key('content', platform, parent_id, normalize_content(child['content']), child['date']))
+
+class DedupIndex:
+    """Persistent set of item keys with a Bloom filter in front
+
+    Most ingested records are new, and the Bloom filter answers those
+    without touching SQLite; only possible hits are looked up in the index.
+    """
+
+    def __init__(self, root=DEDUP_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(root, 'index.db'))
+        self.db.execute("CREATE TABLE IF NOT EXISTS keys (key INTEGER PRIMARY KEY) WITHOUT ROWID")
+        # Platforms whose stored history has been indexed
+        self.db.execute("CREATE TABLE IF NOT EXISTS platforms (platform TEXT PRIMARY KEY)")
+        self.count = self.db.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+        self.pending = set()
+
+        bloom_path = os.path.join(root, 'bloom.npy')
+        self.bits = None
+        if os.path.exists(bloom_path):
+            stored = np.load(bloom_path)
+            # The last 8 bytes record how many keys the filter was saved with
+            if int(stored[-8:].view('int64')[0]) == self.count:
+                self.bits = stored[:-8].copy()
+        if self.bits is None:
+            self._rebuild_bloom()
+
+    def close(self):
+        self.db.close()
+
+    def has_platform(self, platform):
+        """Return True once a platform's stored records are covered by the index"""
+        return self.db.execute("SELECT 1 FROM platforms WHERE platform = ?", (platform,)).fetchone() is not None
+
+    def mark_platform(self, platform):
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO platforms VALUES (?)", (platform,))
+
+    def _positions(self, keys):
+        """Return the (keys, probes) bit positions of keys by double hashing"""
+        keys = np.asarray(keys, dtype='int64').view('uint64')
+        low = keys & np.uint64(0xffffffff)
+        high = (keys >> np.uint64(32)) | np.uint64(1)
+        probes = np.arange(BLOOM_HASHES, dtype='uint64')
+        mask = np.uint64(len(self.bits) * 8 - 1)
+        return (low[:, None] + probes[None, :] * high[:, None]) & mask
+
+    def _set_bits(self, keys):
+        positions = self._positions(keys).ravel()
+        np.bitwise_or.at(self.bits, (positions >> np.uint64(3)).astype('int64'),
+                         (np.uint8(1) << (positions & np.uint64(7)).astype('uint8')))
+
+    def _rebuild_bloom(self):
+        """Size the filter for the stored keys and fill it from the index"""
+        size = BLOOM_BITS
+        while size < (self.count + len(self.pending)) * BITS_PER_KEY:
+            size *= 2
+        self.bits = np.zeros(size // 8, dtype='uint8')
+        cursor = self.db.execute("SELECT key FROM keys")
+        while True:
+            rows = cursor.fetchmany(1000000)
+            if not rows:
+                break
+            self._set_bits([row[0] for row in rows])
+        if self.pending:
+            self._set_bits(list(self.pending))
+
+    def contains(self, keys):
+        """Return a boolean array telling which keys are already in the index"""
+        keys = np.asarray(keys, dtype='int64')
+        found = np.zeros(len(keys), dtype=bool)
+        if not len(keys):
+            return found
+        positions = self._positions(keys)
+        probed = (self.bits[(positions >> np.uint64(3)).astype('int64')] >>
+                  (positions & np.uint64(7)).astype('uint8')) & 1
+        candidates = np.flatnonzero(probed.all(axis=1))
+
+        stored = set()
+        candidate_keys = keys[candidates].tolist()
+        for start in range(0, len(candidate_keys), LOOKUP_BATCH):
+            batch = candidate_keys[start:start + LOOKUP_BATCH]
+            sql = f"SELECT key FROM keys WHERE key IN ({','.join('?' * len(batch))})"
+            stored.update(row[0] for row in self.db.execute(sql, batch))
+        for index, key in zip(candidates.tolist(), candidate_keys):
+            found[index] = key in stored or key in self.pending
+        return found
+
+    def add(self, keys):
+        """Stage keys for the index; they count as seen at once and are written by commit()"""
+        keys = [key for key in keys if key not in self.pending]
+        if not keys:
+            return
+        self.pending.update(keys)
+        if (self.count + len(self.pending)) * BITS_PER_KEY > len(self.bits) * 8:
+            self._rebuild_bloom()
+        else:
+            self._set_bits(keys)
+
+    def commit(self):
+        """Write the staged keys and the Bloom filter"""
+        if not self.pending:
+            return
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO keys VALUES (?)", ((key,) for key in self.pending))
+        self.count = self.db.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+        self.pending = set()
+        path = os.path.join(self.root, 'bloom.npy')
+        with open(path + '.tmp', 'wb') as f:
+            np.save(f, np.concatenate([self.bits, np.array([self.count], dtype='int64').view('uint8')]))
+        os.replace(path + '.tmp', path)
+
+    def filter(self, platform, new_items, updates=()):
+        """Drop records seen before (or earlier in the batch) and stage the keys of the rest
+
+        Returns (new items, updates, number of records dropped). A record is
+        matched by its platform ID, and only a record without an ID by its
+        content key, so records with distinct IDs are kept even if they share
+        parent, text and second, whether or not they come in one batch. A
+        duplicate item is dropped with its comments or replies; updates only
+        carry children, which are checked one by one.
+        """
+        child_key = CHILD_KEYS[platform]
+        id_key = ID_KEYS[platform]
+
+        # (record, its keys, the new item it belongs to), each parent before its children
+        records = []
+        for item in new_items:
+            records.append((item, item_keys(platform, item), None))
+            for child in (item.get(child_key) or []) if child_key else []:
+                records.append((child, child_keys(platform, item[id_key], child), item))
+        for item in updates:
+            for child in item.get(child_key) or []:
+                records.append((child, child_keys(platform, item[id_key], child), None))
+
+        # The key each record is matched by, checked against earlier batches before any
+        # key of this one is staged; both keys of a kept record are staged
+        match_keys = [id_key if id_key is not None else content_key for _, (id_key, content_key), _ in records]
+        seen = self.contains(match_keys).tolist()
+
+        duplicates = set()
+        batch_keys = set()
+        for (record, keys, parent), match_key, was_seen in zip(records, match_keys, seen):
+            if was_seen or match_key in batch_keys or (parent is not None and id(parent) in duplicates):
+                duplicates.add(id(record))
+            else:
+                keys = [key for key in keys if key is not None]
+                batch_keys.update(keys)
+                self.add(keys)
+
+        kept_items = []
+        for item in new_items:
+            if id(item) in duplicates:
+                continue
+            if child_key:
+                item = dict(item, **{child_key: [c for c in item.get(child_key) or [] if id(c) not in duplicates]})
+            kept_items.append(item)
+
+        kept_updates = []
+        for item in updates:
+            children = [c for c in item.get(child_key) or [] if id(c) not in duplicates]
+            if children:
+                kept_updates.append(dict(item, **{child_key: children}))
+        return kept_items, kept_updates, len(duplicates)
@@ -0,0 +1,167 @@
+import json
+import os
+import unicodedata
+from collections import deque
+
+import numpy as np
+
+# Distinct texts remembered by match_column before the cache starts over
+MATCH_CACHE_SIZE = 100000
+
+# Optional catalog file that replaces the built-in one (same layout as MEMBER_CATALOG)
+CATALOG_PATH = 'data/entity_catalog.json'
+
+# Central catalog of monitored entities. The id is the canonical name used in
+# the data; aliases cover surnames, initial forms and Cyrillic spellings.
+MEMBER_CATALOG = [
+    {
+        "id": "Dashzegve AMARBAYASGALAN", "type": "member",
+        "aliases": ["AMARBAYASGALAN", "D. Amarbayasgalan", "D.Amarbayasgalan",
+                    "Дашзэгвэ Амарбаясгалан", "Д.Амарбаясгалан", "Амарбаясгалан"]
+    },
+    {
+        "id": "Khurelbaatar BULGANTUYA", "type": "member",
+        "aliases": ["BULGANTUYA", "Kh. Bulgantuya", "Kh.Bulgantuya",
+                    "Хүрэлбаатар Булгантуяа", "Х.Булгантуяа", "Булгантуяа"]
+    },
+    {
+        "id": "NOROV ALTANKHUYAG", "type": "member",
+        "aliases": ["ALTANKHUYAG", "N. Altankhuyag", "N.Altankhuyag",
+                    "Норов Алтанхуяг", "Н.Алтанхуяг", "Алтанхуяг"]
+    },
+    {
+        "id": "SAINBUYAN AMARSAIKHAN", "type": "member",
+        "aliases": ["AMARSAIKHAN", "S. Amarsaikhan", "S.Amarsaikhan",
+                    "Сайнбуян Амарсайхан", "С.Амарсайхан", "Амарсайхан"]
+    },
+    {
+        "id": "TELUKHAN AUBAKIR", "type": "member",
+        "aliases": ["AUBAKIR", "T. Aubakir", "T.Aubakir",
+                    "Төлеухан Аубакир", "Т.Аубакир", "Аубакир"]
+    },
+    {
+        "id": "ENKHTAIVAN BAT-AMGALAN", "type": "member",
+        "aliases": ["BAT-AMGALAN", "E. Bat-Amgalan", "E.Bat-Amgalan",
+                    "Энхтайван Бат-Амгалан", "Э.Бат-Амгалан", "Бат-Амгалан"]
+    },
+    {
+        "id": "Jadamba BAT-ERDENE", "type": "member",
+        "aliases": ["BAT-ERDENE", "J. Bat-Erdene", "J.Bat-Erdene",
+                    "Жадамба Бат-Эрдэнэ", "Ж.Бат-Эрдэнэ", "Бат-Эрдэнэ"]
+    },
+    {
+        "id": "JIGJID BATJARGAL", "type": "member",
+        "aliases": ["BATJARGAL", "J. Batjargal", "J.Batjargal",
+                    "Жигжид Батжаргал", "Ж.Батжаргал", "Батжаргал"]
+    }
+]
+
+def load_catalog(path=CATALOG_PATH):
+    """Return the entity catalog, preferring the catalog file when it exists"""
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return MEMBER_CATALOG
+
+def normalize(text):
+    """Normalise text for matching: NFC form and case-folded"""
+    return unicodedata.normalize('NFC', text).casefold()
+
+def _is_word_char(char):
+    return char.isalnum()
+
+class EntityMatcher:
+    """Aho-Corasick automaton over every name and alias in the catalog
+
+    One pass over a text finds all catalog entries, whatever the number of
+    patterns. Matches must start and end on word boundaries, so a surname
+    inside a longer word is not a mention.
+    """
+
+    def __init__(self, catalog=None, entity_type='member'):
+        catalog = catalog if catalog is not None else load_catalog()
+        self.entities = [entry['id'] for entry in catalog if entry.get('type', 'member') == entity_type]
+        self.codes = {entity: code for code, entity in enumerate(self.entities)}
+
+        patterns = {}
+        for entry in catalog:
+            if entry['id'] not in self.codes:
+                continue
+            for name in [entry['id']] + entry.get('aliases', []):
+                patterns[normalize(name)] = self.codes[entry['id']]
+        self._build(patterns)
+        self._cache = {}
+
+    def _build(self, patterns):
+        # goto[state] maps a character to the next state; out[state] lists
+        # (pattern length, entity code) for every pattern ending in that state
+        self.goto = [{}]
+        self.out = [[]]
+        for pattern, code in patterns.items():
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.out.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.out[state].append((len(pattern), code))
+
+        # Breadth-first failure links, merging outputs along the way
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def find(self, text):
+        """Return the sorted entity codes mentioned in text"""
+        text = normalize(text)
+        goto, fail, out = self.goto, self.fail, self.out
+        found = set()
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, code in out[state]:
+                start = end - length + 1
+                if (start == 0 or not _is_word_char(text[start - 1])) and \
+                        (end + 1 == len(text) or not _is_word_char(text[end + 1])):
+                    found.add(code)
+        return sorted(found)
+
+    def find_names(self, text):
+        """Return the canonical names of the entities mentioned in text"""
+        return [self.entities[code] for code in self.find(text)]
+
+    def match_column(self, texts):
+        """Return the entity codes for every text in a column
+
+        Repeated texts (reposts, templated comments) are matched once and
+        served from a cache afterwards.
+        """
+        cache = self._cache
+        results = []
+        for text in texts:
+            codes = cache.get(text)
+            if codes is None:
+                if len(cache) >= MATCH_CACHE_SIZE:
+                    cache.clear()
+                codes = cache[text] = self.find(text)
+            results.append(codes)
+        return results
+
+    def match_pairs(self, texts):
+        """Return (row, entity code) int64 arrays with one pair per mention in a column of texts"""
+        matches = self.match_column(texts)
+        counts = np.fromiter((len(codes) for codes in matches), dtype='int64', count=len(matches))
+        rows = np.repeat(np.arange(len(matches), dtype='int64'), counts)
+        codes = np.fromiter((code for found in matches for code in found), dtype='int64', count=int(counts.sum()))
+        return rows, codes
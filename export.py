@@ -0,0 +1,286 @@
+import argparse
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Directory the dashboard serves its data from
+PUBLIC_DATA_DIR = 'public/data'
+
+# Every publish writes a complete snapshot directory under here
+SNAPSHOT_DIR = 'snapshots'
+
+# Symlink to the live snapshot; publishing and rollback swap it with one atomic rename
+CURRENT_LINK = 'current'
+
+# Snapshots kept for rollback, the live one included
+KEEP_SNAPSHOTS = 5
+
+# The one unhashed file in a snapshot: clients fetch it first (without caching) to learn the current names
+MANIFEST_NAME = 'manifest.json'
+
+# Held by writers only; readers never lock
+LOCK_NAME = '.publish.lock'
+
+# Hex digits of the content hash in exported file names
+HASH_LENGTH = 16
+
+_EXPORTED_FILE = re.compile(r'^(?P<name>.+)\.(?P<hash>[0-9a-f]{%d})\.json(\.gz|\.br)?$' % HASH_LENGTH)
+
+def encode(data):
+    """Return data as minified UTF-8 JSON"""
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def public_url(path):
+    """Return the URL the dashboard loads a file of the live snapshot from"""
+    return f"/data/{CURRENT_LINK}/{path}"
+
+def _write(path, payload):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+def _link(source, target):
+    # Snapshots share unchanged files; fall back to a copy where hard links are not supported
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+@contextmanager
+def _publish_lock(out_dir):
+    with open(os.path.join(out_dir, LOCK_NAME), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def current_snapshot(out_dir=PUBLIC_DATA_DIR):
+    """Return the name of the live snapshot, or None before the first publish"""
+    link = os.path.join(out_dir, CURRENT_LINK)
+    if not os.path.islink(link):
+        return None
+    return os.path.basename(os.readlink(link))
+
+def list_snapshots(out_dir=PUBLIC_DATA_DIR):
+    """Return the complete snapshots, oldest first"""
+    snapshot_dir = os.path.join(out_dir, SNAPSHOT_DIR)
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(name for name in os.listdir(snapshot_dir) if not name.startswith('.'))
+
+def load_manifest(out_dir=PUBLIC_DATA_DIR, snapshot=None):
+    """Return the manifest of a snapshot, the live one by default"""
+    if snapshot is None:
+        path = os.path.join(out_dir, CURRENT_LINK, MANIFEST_NAME)
+    else:
+        path = os.path.join(out_dir, SNAPSHOT_DIR, snapshot, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'files': {}, 'assets': []}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def _switch(out_dir, snapshot):
+    # A symlink cannot be overwritten in place, so build the new one aside and rename it over
+    tmp_link = os.path.join(out_dir, f".{CURRENT_LINK}.tmp")
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(os.path.join(SNAPSHOT_DIR, snapshot), tmp_link)
+    os.replace(tmp_link, os.path.join(out_dir, CURRENT_LINK))
+
+def _stage_datasets(datasets, staging, current_dir, manifest, replace):
+    previous = manifest['files']
+    files = {}
+    written = 0
+
+    # Carry the live snapshot's files over, for clients that still hold its manifest
+    if current_dir is not None:
+        for entry in previous.values():
+            os.makedirs(os.path.dirname(os.path.join(staging, entry['path'])), exist_ok=True)
+            for suffix in ('', '.gz', '.br'):
+                source = os.path.join(current_dir, entry['path'] + suffix)
+                if os.path.exists(source):
+                    _link(source, os.path.join(staging, entry['path'] + suffix))
+
+    for name, entry in previous.items():
+        if datasets.get(name) is None and not name.startswith(replace):
+            files[name] = entry
+
+    for name, data in datasets.items():
+        if data is None:
+            continue
+        payload = encode(data)
+        digest = hashlib.sha256(payload).hexdigest()[:HASH_LENGTH]
+        file_name = f"{name}.{digest}.json"
+        path = os.path.join(staging, file_name)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.gz', 'wb') as f:
+                f.write(gzip.compress(payload, compresslevel=9, mtime=0))
+            if brotli is not None:
+                with open(path + '.br', 'wb') as f:
+                    f.write(brotli.compress(payload, quality=11))
+            with open(path, 'wb') as f:
+                f.write(payload)
+            written += 1
+
+        entry = {'path': file_name, 'hash': digest, 'bytes': len(payload),
+                 'gzip': os.path.getsize(path + '.gz')}
+        if os.path.exists(path + '.br'):
+            entry['br'] = os.path.getsize(path + '.br')
+        files[name] = entry
+
+    return files, written
+
+def _stage_assets(assets, staging, current_dir, manifest):
+    # Asset directories not given are carried over whole from the live snapshot
+    sources = {}
+    if current_dir is not None:
+        for target in manifest.get('assets', []):
+            sources[target] = (os.path.join(current_dir, target), True)
+    for target, source_dir in assets.items():
+        sources[target] = (source_dir, False)
+
+    for target, (source_dir, carried) in sources.items():
+        if not os.path.isdir(source_dir):
+            continue
+        for root, _, names in os.walk(source_dir):
+            relative = os.path.relpath(root, source_dir)
+            os.makedirs(os.path.join(staging, target, relative), exist_ok=True)
+            for name in names:
+                source = os.path.join(root, name)
+                destination = os.path.join(staging, target, relative, name)
+                live = os.path.join(current_dir, target, relative, name) if current_dir else None
+                if carried:
+                    _link(source, destination)
+                elif live and os.path.exists(live) and _same_file(source, live):
+                    _link(live, destination)
+                else:
+                    shutil.copy2(source, destination)
+
+    return sorted(sources)
+
+def _same_file(source, copy):
+    source_stat = os.stat(source)
+    copy_stat = os.stat(copy)
+    # copy2 keeps the modification time, so an untouched source still matches its copy
+    return source_stat.st_size == copy_stat.st_size and source_stat.st_mtime_ns == copy_stat.st_mtime_ns
+
+def _prune(out_dir, keep):
+    snapshot_dir = os.path.join(out_dir, SNAPSHOT_DIR)
+    live = current_snapshot(out_dir)
+    snapshots = list_snapshots(out_dir)
+    for name in snapshots[:-keep] if keep > 0 else snapshots:
+        if name != live:
+            shutil.rmtree(os.path.join(snapshot_dir, name))
+
+    # Staging directories left by writers that died before switching
+    for name in os.listdir(snapshot_dir):
+        if name.startswith('.'):
+            shutil.rmtree(os.path.join(snapshot_dir, name), ignore_errors=True)
+
+    # Files exported straight into out_dir before snapshots existed
+    for name in os.listdir(out_dir):
+        if _EXPORTED_FILE.match(name) or name == MANIFEST_NAME:
+            os.remove(os.path.join(out_dir, name))
+
+def publish(datasets, assets=None, replace=(), out_dir=PUBLIC_DATA_DIR, keep=KEEP_SNAPSHOTS):
+    """Publish {name: data} and {target: source directory} assets as a new snapshot and switch to it
+
+    The snapshot starts as a copy of the live one, hard-linked, with the
+    given datasets and asset directories replaced, so it is always
+    complete. Datasets are written as content-hashed, precompressed JSON
+    (see encode); a dataset whose content did not change keeps its file
+    name, so clients that cached it never download it again. The
+    snapshot is staged in a hidden directory, renamed into place once
+    written, and made live by atomically replacing the `current`
+    symlink, so readers see either the old snapshot or the new one and
+    never wait. Writers serialize on a lock file. The newest `keep`
+    snapshots are kept for rollback.
+
+    Names may contain slashes to group datasets in a directory, such as
+    one shard per member. Datasets of the live snapshot that are not
+    given are kept, unless their names start with one of the `replace`
+    prefixes, which drops shards that are no longer produced.
+    """
+    if brotli is None:
+        print("Warning: brotli is not installed, so only gzip variants are written; install it with `pip install brotli`")
+
+    os.makedirs(os.path.join(out_dir, SNAPSHOT_DIR), exist_ok=True)
+    with _publish_lock(out_dir):
+        live = current_snapshot(out_dir)
+        current_dir = os.path.join(out_dir, SNAPSHOT_DIR, live) if live else None
+        manifest = load_manifest(out_dir)
+
+        snapshot = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S-%f')
+        staging = os.path.join(out_dir, SNAPSHOT_DIR, f".{snapshot}.tmp")
+        os.makedirs(staging)
+        try:
+            files, written = _stage_datasets(datasets, staging, current_dir, manifest, tuple(replace))
+            asset_dirs = _stage_assets(assets or {}, staging, current_dir, manifest)
+            new_manifest = {
+                'snapshot': snapshot,
+                'generated': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                'files': files,
+                'assets': asset_dirs
+            }
+            _write(os.path.join(staging, MANIFEST_NAME), encode(new_manifest))
+            os.rename(staging, os.path.join(out_dir, SNAPSHOT_DIR, snapshot))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        _switch(out_dir, snapshot)
+        _prune(out_dir, keep)
+
+    exported = sum(data is not None for data in datasets.values())
+    print(f"Published snapshot {snapshot}: {exported} datasets ({written} changed), {len(assets or {})} asset directories")
+    return new_manifest
+
+def rollback(snapshot=None, out_dir=PUBLIC_DATA_DIR):
+    """Make a kept snapshot live again, by default the one before the live snapshot"""
+    with _publish_lock(out_dir):
+        snapshots = list_snapshots(out_dir)
+        live = current_snapshot(out_dir)
+        if snapshot is None:
+            older = [name for name in snapshots if live is None or name < live]
+            if not older:
+                print("No older snapshot to roll back to")
+                return None
+            snapshot = older[-1]
+        elif snapshot not in snapshots:
+            print(f"Snapshot {snapshot} not found")
+            return None
+        _switch(out_dir, snapshot)
+    print(f"Rolled back from {live} to {snapshot}")
+    return snapshot
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the published dashboard data snapshots, or roll back to one")
+    parser.add_argument('--rollback', nargs='?', const='', metavar='SNAPSHOT',
+                        help="Switch back to SNAPSHOT, or to the one before the live snapshot")
+    parser.add_argument('--out-dir', default=PUBLIC_DATA_DIR)
+    args = parser.parse_args()
+
+    if args.rollback is not None:
+        rollback(args.rollback or None, args.out_dir)
+    else:
+        live = current_snapshot(args.out_dir)
+        for name in list_snapshots(args.out_dir):
+            manifest = load_manifest(args.out_dir, name)
+            marker = '*' if name == live else ' '
+            print(f"{marker} {name}  {manifest.get('generated', '')}  {len(manifest['files'])} datasets")
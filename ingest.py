@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import os
+import random
+import time
+from urllib.parse import quote, urlsplit
+
+import aiohttp
+from aiohttp import web
+
+import synthetic
+import watermarks
+
+# Environment variable pointing the monitor at a live (or stub) source API
+SOURCE_URL_ENV = 'MONITOR_SOURCE_URL'
+
+# Connection and retry settings
+DEFAULT_SETTINGS = {
+    'per_host_limit': 8,
+    'total_limit': 100,
+    'timeout': 30,
+    'connect_timeout': 5,
+    'retries': 3,
+    'backoff': 0.5,
+    'keepalive_timeout': 60
+}
+
+# Status codes worth retrying; anything else is treated as a permanent failure
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def default_sources(base_url):
+    """Return the monitored sources (30 news sites, 130 pages, 10 accounts) under base_url
+
+    Every source is read through the one source API at base_url, so each
+    names its upstream site as 'host': the crawl scheduler's per-host
+    budget and spacing apply to that site, not to the shared API.
+    """
+    base_url = base_url.rstrip('/')
+    sources = []
+    for site in synthetic.NEWS_SITES:
+        sources.append({'platform': 'news', 'name': site, 'host': f"news/{site}",
+                        'url': f"{base_url}/news/{quote(site)}"})
+    for page in synthetic.facebook_page_names(130):
+        sources.append({'platform': 'facebook', 'name': page, 'host': f"facebook/{page}",
+                        'url': f"{base_url}/facebook/{quote(page)}"})
+    for account in synthetic.twitter_account_names(10):
+        sources.append({'platform': 'twitter', 'name': account, 'host': f"twitter/{account}",
+                        'url': f"{base_url}/twitter/{quote(account)}"})
+    return sources
+
+class IngestionEngine:
+    """Fetch every source concurrently over pooled keep-alive connections"""
+
+    def __init__(self, settings=None):
+        self.settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self.host_semaphores = {}
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0}
+
+    def _semaphore(self, url):
+        """Return the semaphore bounding concurrent requests to the URL's host"""
+        host = urlsplit(url).netloc
+        if host not in self.host_semaphores:
+            self.host_semaphores[host] = asyncio.Semaphore(self.settings['per_host_limit'])
+        return self.host_semaphores[host]
+
+    async def fetch_source(self, session, source, params=None):
+        """Fetch one source, retrying transient failures with exponential backoff
+
+        A 'delay' on the source (set by the crawl scheduler) postpones its
+        first request by that many seconds.
+        """
+        if source.get('delay'):
+            await asyncio.sleep(source['delay'])
+        attempts = self.settings['retries'] + 1
+        for attempt in range(attempts):
+            try:
+                async with self._semaphore(source['url']):
+                    self.stats['requests'] += 1
+                    async with session.get(source['url'], params=params) as response:
+                        if response.status in RETRY_STATUSES:
+                            raise aiohttp.ClientResponseError(
+                                response.request_info, response.history,
+                                status=response.status, message=response.reason
+                            )
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+            # A ValueError is a body that is not JSON, such as an HTML error page or a truncated response
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as error:
+                permanent = isinstance(error, aiohttp.ClientResponseError) and error.status not in RETRY_STATUSES
+                if permanent or attempt == attempts - 1:
+                    self.stats['failures'] += 1
+                    print(f"Failed to fetch {source['platform']} source {source['name']}: {error}")
+                    return None
+                self.stats['retries'] += 1
+                # Full jitter keeps retries from many sources from arriving in lockstep
+                delay = self.settings['backoff'] * (2 ** attempt)
+                await asyncio.sleep(random.uniform(0, delay))
+
+    async def collect(self, sources, params_for=None):
+        """Fetch all sources at once and return {source name: items} per platform"""
+        # Semaphores belong to the running event loop, so start each collection fresh
+        self.host_semaphores = {}
+        timeout = aiohttp.ClientTimeout(
+            total=self.settings['timeout'], sock_connect=self.settings['connect_timeout']
+        )
+        connector = aiohttp.TCPConnector(
+            limit=self.settings['total_limit'],
+            limit_per_host=self.settings['per_host_limit'],
+            keepalive_timeout=self.settings['keepalive_timeout']
+        )
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            tasks = [
+                self.fetch_source(session, source, params_for(source) if params_for else None)
+                for source in sources
+            ]
+            results = await asyncio.gather(*tasks)
+
+        collected = {'news': {}, 'facebook': {}, 'twitter': {}}
+        for source, items in zip(sources, results):
+            if items is not None:
+                collected[source['platform']][source['name']] = items
+        return collected
+
+def collect_by_source(sources, settings=None, params_for=None):
+    """Collect the given sources and return {platform: {source name: items}}; failed sources are left out"""
+    engine = IngestionEngine(settings)
+
+    started = time.perf_counter()
+    collected = asyncio.run(engine.collect(sources, params_for))
+    elapsed = time.perf_counter() - started
+
+    print(f"Fetched {len(sources)} sources in {elapsed:.2f}s "
+          f"({engine.stats['requests']} requests, {engine.stats['retries']} retries, "
+          f"{engine.stats['failures']} failures)")
+    return collected
+
+def collect_sources(base_url, settings=None, params_for=None):
+    """Collect every default source under base_url and return flat item lists per platform"""
+    collected = collect_by_source(default_sources(base_url), settings, params_for)
+    return {
+        platform: [item for items in by_source.values() for item in items]
+        for platform, by_source in collected.items()
+    }
+
+def build_stub_app(seed=synthetic.DEFAULT_SEED, latency=0.0):
+    """Build an aiohttp app that serves synthetic data in the source API layout"""
+    corpus = synthetic.generate_corpus(seed)
+    keys = {'news': 'site', 'facebook': 'page', 'twitter': 'account'}
+    index = {platform: {} for platform in keys}
+    for platform, key in keys.items():
+        for item in corpus[platform]:
+            index[platform].setdefault(item[key], []).append(item)
+
+    async def handle(request):
+        if latency:
+            await asyncio.sleep(latency)
+        platform = request.match_info['platform']
+        if platform not in index:
+            raise web.HTTPNotFound()
+        name = request.match_info['name']
+        items = index[platform].get(name, [])
+        # Honour incremental requests the way a real source API would
+        since = request.query.get('since')
+        if since:
+            new_items, updates = watermarks.select_new(platform, items, {platform: {name: {'last_date': since}}})
+            items = new_items + updates
+        return web.json_response(items)
+
+    app = web.Application()
+    app.router.add_get('/{platform}/{name}', handle)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent source ingestion")
+    parser.add_argument('--stub', action='store_true', help="Serve synthetic data instead of fetching")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Stub response delay in seconds")
+    parser.add_argument('--base-url', default=os.environ.get(SOURCE_URL_ENV, 'http://127.0.0.1:8765'))
+    args = parser.parse_args()
+
+    if args.stub:
+        web.run_app(build_stub_app(latency=args.latency), host=args.host, port=args.port)
+        return
+
+    collected = collect_sources(args.base_url)
+    for platform, items in collected.items():
+        print(f"{platform}: {len(items)} items")
+
+if __name__ == "__main__":
+    main()
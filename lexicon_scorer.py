@@ -0,0 +1,244 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# VADER's lexicon inside the NLTK data
+VADER_LEXICON = 'sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt'
+
+# Bump after changing the rules below, so cached scores are recomputed
+SCORER_VERSION = 1
+
+# Documented accuracy against SentimentIntensityAnalyzer: compound scores
+# differ by at most this much, except in texts using one of VADER's few
+# idioms ("the bomb", "kiss of death", ...), which are not applied.
+# benchmarks/bench_lexicon_scorer.py measures the actual differences.
+COMPOUND_TOLERANCE = 0.001
+
+# Per-word features and their types, computed once per distinct word
+_FEATURES = (('valence', float), ('in_lexicon', bool), ('booster', float), ('upper', bool),
+             ('negation', bool), ('but', bool), ('least', bool), ('at_or_very', bool), ('kind', bool), ('of', bool),
+             ('never', bool), ('so_or_this', bool), ('bigram_first', np.intp), ('bigram_second', np.intp))
+
+def _round(values, digits):
+    # Python's round, as VADER uses: np.round scales first and can land the other side of a half
+    return np.array([round(value, digits) for value in values.tolist()])
+
+class LexiconScorer:
+    """VADER's scores for a whole column of texts at once, with array operations instead of a loop per word
+
+    Texts are tokenized the way VADER does it and turned into a sparse
+    text-by-token count matrix; its product with the lexicon valences
+    gives every text's plain valence sum. VADER's rules (capitals,
+    intensifiers up to three words back, negation, "never so", "least",
+    "but", the "kind of" bigrams, and ! and ? emphasis) are then applied
+    as array corrections over all word positions of the column. Idioms
+    are not applied; see COMPOUND_TOLERANCE.
+    """
+
+    def __init__(self, lexicon_text):
+        import nltk
+        from nltk.sentiment.vader import VaderConstants
+        self.constants = VaderConstants()
+        self.lexicon = {}
+        for line in lexicon_text.split('\n'):
+            if line.strip():
+                word, measure = line.strip().split('\t')[0:2]
+                self.lexicon[word] = float(measure)
+        digest = hashlib.blake2b(lexicon_text.encode('utf-8'), digest_size=8).hexdigest()
+        self.version = f"lexicon-{SCORER_VERSION}-{nltk.__version__}-{digest}"
+
+        # Bigram intensifiers such as "kind of", by their first and second word
+        bigrams = [key.split(' ') for key in self.constants.BOOSTER_DICT if ' ' in key]
+        self._bigram_firsts = sorted({first for first, _ in bigrams})
+        self._bigram_seconds = sorted({second for _, second in bigrams})
+        self._bigrams = np.zeros((len(self._bigram_firsts) + 1, len(self._bigram_seconds) + 1), dtype=bool)
+        for first, second in bigrams:
+            self._bigrams[self._bigram_firsts.index(first) + 1, self._bigram_seconds.index(second) + 1] = True
+
+        self._token_words = {}
+        self._word_features = {}
+
+    @classmethod
+    def from_nltk(cls, path=VADER_LEXICON):
+        """Build a scorer on VADER's own lexicon from the NLTK data"""
+        import nltk
+        return cls(nltk.data.load(path))
+
+    def _word(self, token):
+        # VADER drops single characters and strips one punctuation mark from either
+        # end of a word, but only when the rest holds no punctuation and is longer than one letter
+        word = self._token_words.get(token)
+        if word is None:
+            word = self._token_words[token] = token if len(token) > 1 else ''
+            stripped = self.constants.REGEX_REMOVE_PUNCTUATION.sub('', token)
+            if len(stripped) > 1 and stripped != token:
+                for mark in self.constants.PUNC_LIST:
+                    if token == mark + stripped or token == stripped + mark:
+                        word = self._token_words[token] = stripped
+                        break
+        return word
+
+    def _features(self, word):
+        features = self._word_features.get(word)
+        if features is None:
+            lower = word.lower()
+            first = self._bigram_firsts.index(word) + 1 if word in self._bigram_firsts else 0
+            second = self._bigram_seconds.index(word) + 1 if word in self._bigram_seconds else 0
+            features = self._word_features[word] = (
+                self.lexicon.get(lower, 0.0),
+                lower in self.lexicon,
+                self.constants.BOOSTER_DICT.get(lower, 0.0),
+                word.isupper(),
+                lower in self.constants.NEGATE or "n't" in lower,
+                lower == 'but',
+                lower == 'least',
+                lower in ('at', 'very'),
+                lower == 'kind',
+                lower == 'of',
+                word == 'never',
+                word in ('so', 'this'),
+                first,
+                second
+            )
+        return features
+
+    def score_arrays(self, texts):
+        """Return {'neg', 'neu', 'pos', 'compound'} arrays with one score per text"""
+        constants = self.constants
+        texts = list(texts)
+        num_texts = len(texts)
+
+        # Factorize every token of the column in one pass, then map the distinct ones to VADER's words
+        token_lists = [text.split() for text in texts]
+        lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=num_texts)
+        token_codes, tokens = pd.factorize(pd.Series([token for tokens in token_lists for token in tokens], dtype=object))
+        word_codes, distinct = pd.factorize(pd.Series([self._word(token) for token in tokens], dtype=object))
+        codes = word_codes[token_codes]
+        text_of = np.repeat(np.arange(num_texts), lengths)
+        kept = codes != (distinct.get_loc('') if '' in distinct else -1)
+        codes = codes[kept]
+        text_of = text_of[kept]
+
+        table = list(zip(*(self._features(word) for word in distinct))) or [()] * len(_FEATURES)
+        features = {name: np.array(column, dtype=dtype) for (name, dtype), column in zip(_FEATURES, table)}
+        words = np.bincount(text_of, minlength=num_texts)
+        starts = np.cumsum(words) - words
+        position = np.arange(len(codes)) - starts[text_of]
+
+        # VADER reads the neighbours of a word at its first occurrence in the text, so repeats share them
+        occurrence = text_of * max(len(distinct), 1) + codes
+        _, first_index, inverse = np.unique(occurrence, return_index=True, return_inverse=True)
+        first = first_index[inverse.ravel()]
+        first_position = position[first]
+
+        def feature(name, offset=0):
+            # The feature of the word `offset` places before the first occurrence (after it when negative)
+            values = features[name]
+            result = np.zeros(len(codes), dtype=values.dtype)
+            if offset > 0:
+                result[offset:] = values[codes[:-offset]]
+                result[position < offset] = 0
+                result = result[first]
+            elif offset < 0:
+                result[:offset] = values[codes[-offset:]]
+                result[position >= (words[text_of] + offset)] = 0
+                result = result[first]
+            else:
+                result = values[codes]
+            return result
+
+        lexicon_valence = features['valence']
+        in_lexicon = feature('in_lexicon')
+        valence = lexicon_valence[codes]
+
+        # Capitals stress a word when only some of the text is in capitals
+        uppers = np.bincount(text_of, weights=feature('upper').astype(float), minlength=num_texts)
+        cap_differential = ((words - uppers) > 0) & ((words - uppers) < words)
+        stressed = cap_differential[text_of]
+        capitalized = in_lexicon & feature('upper') & stressed
+        valence = np.where(capitalized, np.where(valence > 0, valence + constants.C_INCR, valence - constants.C_INCR), valence)
+
+        # The three preceding words, in VADER's order, each only if it is no sentiment word itself
+        for back, damping in ((1, 1.0), (2, 0.95), (3, 0.9)):
+            applies = in_lexicon & (first_position >= back) & ~feature('in_lexicon', back)
+
+            booster = feature('booster', back)
+            scalar = np.where(valence < 0, -booster, booster)
+            scalar += np.where((booster != 0) & feature('upper', back) & stressed,
+                               np.where(valence > 0, constants.C_INCR, -constants.C_INCR), 0.0)
+            valence = np.where(applies, valence + scalar * damping, valence)
+
+            negated = feature('negation', back)
+            if back == 1:
+                valence = np.where(applies & negated, valence * constants.N_SCALAR, valence)
+            elif back == 2:
+                never_so = feature('never', 2) & feature('so_or_this', 1)
+                valence = np.where(applies & never_so, valence * 1.5,
+                                   np.where(applies & negated, valence * constants.N_SCALAR, valence))
+            else:
+                never_so = (feature('never', 3) & feature('so_or_this', 2)) | feature('so_or_this', 1)
+                valence = np.where(applies & never_so, valence * 1.25,
+                                   np.where(applies & negated, valence * constants.N_SCALAR, valence))
+                # "kind of" and similar bigrams just before the word dampen it
+                bigram = (self._bigrams[feature('bigram_first', 3), feature('bigram_second', 2)] |
+                          self._bigrams[feature('bigram_first', 2), feature('bigram_second', 1)])
+                valence = np.where(applies & bigram, valence + constants.B_DECR, valence)
+
+        # "least" negates, unless it is "at least" or "very least"
+        least = in_lexicon & feature('least', 1) & ~feature('in_lexicon', 1)
+        least &= (first_position == 1) | ((first_position > 1) & ~feature('at_or_very', 2))
+        valence = np.where(least, valence * constants.N_SCALAR, valence)
+
+        # Intensifiers and "kind" in "kind of" carry no sentiment themselves
+        valence = np.where((feature('booster') != 0) | (feature('kind') & feature('of', -1)), 0.0, valence)
+
+        # Words before the first "but" count half, words after it half as much again
+        first_but = np.full(num_texts, np.iinfo(np.int64).max)
+        is_but = feature('but')
+        np.minimum.at(first_but, text_of[is_but], position[is_but])
+        but_position = first_but[text_of]
+        valence = valence * np.where(position < but_position, np.where(but_position < np.iinfo(np.int64).max, 0.5, 1.0),
+                                     np.where(position > but_position, 1.5, 1.0))
+
+        # Lexicon valence per text as one sparse product; its entries stay in word order,
+        # so every text is summed in VADER's order and cancelling valences round alike
+        indptr = np.concatenate(([0], np.cumsum(words)))
+        counts = sparse.csr_matrix((np.ones(len(codes)), codes, indptr), shape=(num_texts, len(distinct)))
+        total = counts @ lexicon_valence
+        # Texts a rule changed are summed again from their corrected valences, in the same order
+        corrected = np.bincount(text_of[valence != lexicon_valence[codes]], minlength=num_texts) > 0
+        total = np.where(corrected, np.bincount(text_of, weights=valence, minlength=num_texts), total)
+
+        # Emphasis from exclamation marks (up to four) and question marks (two or more)
+        exclamations = np.minimum(np.fromiter((text.count('!') for text in texts), dtype=float, count=num_texts), 4)
+        questions = np.fromiter((text.count('?') for text in texts), dtype=float, count=num_texts)
+        emphasis = exclamations * 0.292 + np.where(questions > 1, np.where(questions <= 3, questions * 0.18, 0.96), 0.0)
+
+        total = np.where(total > 0, total + emphasis, np.where(total < 0, total - emphasis, total))
+        compound = total / np.sqrt(total * total + 15)
+
+        positive = np.bincount(text_of, weights=np.where(valence > 0, valence + 1, 0.0), minlength=num_texts)
+        negative = np.bincount(text_of, weights=np.where(valence < 0, valence - 1, 0.0), minlength=num_texts)
+        neutral = np.bincount(text_of, weights=(valence == 0).astype(float), minlength=num_texts)
+        more_positive = positive > np.abs(negative)
+        more_negative = positive < np.abs(negative)
+        positive = np.where(more_positive, positive + emphasis, positive)
+        negative = np.where(more_negative, negative - emphasis, negative)
+
+        # Texts without words score 0 everywhere, as in VADER
+        has_words = words > 0
+        denominator = np.where(has_words, positive + np.abs(negative) + neutral, 1.0)
+        return {
+            'neg': np.where(has_words, _round(np.abs(negative / denominator), 3), 0.0),
+            'neu': np.where(has_words, _round(np.abs(neutral / denominator), 3), 0.0),
+            'pos': np.where(has_words, _round(np.abs(positive / denominator), 3), 0.0),
+            'compound': np.where(has_words, _round(compound, 4), 0.0)
+        }
+
+    def polarity_scores(self, texts):
+        """Return a SentimentIntensityAnalyzer.polarity_scores-style dict per text"""
+        scores = self.score_arrays(texts)
+        columns = [scores[field].tolist() for field in ('neg', 'neu', 'pos', 'compound')]
+        return [{'neg': neg, 'neu': neu, 'pos': pos, 'compound': compound} for neg, neu, pos, compound in zip(*columns)]
@@ -1,302 +1,298 @@
-import requests
+import argparse
 import json
-import pandas as pd
+import signal
+import threading
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 
+import aggregate
+import alerting
+import checkpoints
+import columnar
+import datastore
+import dedup
+import entities
+import ingest
+import raw_store
+import rollups
+import scheduler
+import synthetic
+import watermarks as wm
+
 # Create directories for data if they don't exist
-os.makedirs('data/news', exist_ok=True)
-os.makedirs('data/facebook', exist_ok=True)
-os.makedirs('data/twitter', exist_ok=True)
+os.makedirs(raw_store.RAW_DIR, exist_ok=True)
+
+# Platforms kept in the raw store
+PLATFORMS = ('news', 'facebook', 'twitter')
+
+# Daemon mode: seconds between the starts of two cycles, and between two
+# checkpoints of the in-memory state
+DAEMON_INTERVAL = 300
+CHECKPOINT_INTERVAL = 1800
+
+# Make sure the raw store and the watermarks describe the same data
+def prepare_store(platform, watermarks):
+    raw_store.import_legacy(platform)
+    # Stored items are read at most once, and only if one of the seeds below needs them
+    stored = datastore.DataStore(children=True)
+    if not raw_store.has_data(platform):
+        # Nothing stored, so every source needs a full fetch
+        watermarks[platform] = {}
+    elif not watermarks[platform]:
+        # Data stored before watermarks existed seeds them
+        wm.advance(watermarks, platform, stored[platform])
+    
+    # Data stored before the dedup index existed seeds it
+    index = dedup_index()
+    if not index.has_platform(platform):
+        if raw_store.has_data(platform):
+            index.filter(platform, stored[platform])
+            index.commit()
+        index.mark_platform(platform)
+
+# Column store shared by ingestion and analysis within one process
+_column_store = None
+
+# Tables with more parts than this are compacted when the store is opened
+MAX_COLUMN_PARTS = 64
+
+# Content-hash index of every stored record, shared within one process
+_dedup_index = None
+
+# Return the dedup index, opening it the first time
+def dedup_index():
+    global _dedup_index
+    if _dedup_index is None:
+        _dedup_index = dedup.DedupIndex()
+    return _dedup_index
+
+# Return the column store, building it from the raw store the first time
+def column_store():
+    global _column_store
+    if _column_store is None:
+        _column_store = columnar.ColumnStore()
+        if not _column_store.parts('posts') and any(raw_store.has_data(p) for p in PLATFORMS):
+            print("Building columnar tables from the raw store...")
+            _column_store.rebuild()
+        compact_column_store(_column_store)
+    return _column_store
+
+# Every incremental fetch adds small parts, so merge them now and then
+def compact_column_store(store):
+    for table in columnar.TABLES:
+        if len(store.parts(table)) > MAX_COLUMN_PARTS:
+            store.compact(table)
+
+# Write an output snapshot for the dashboard, replacing the previous file atomically
+def write_snapshot(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+# Append newly fetched items to the raw store and advance the watermarks
+def store_increment(platform, fetched, watermarks):
+    selected, selected_updates = wm.select_new(platform, fetched, watermarks)
+    
+    # Records already stored under another ID (or repeated in this batch) never reach analysis
+    index = dedup_index()
+    new_items, updates, duplicates = index.filter(platform, selected, selected_updates)
+    if duplicates:
+        print(f"Skipped {duplicates} duplicate {platform} records")
+    
+    # Open the column store first so a rebuild from the raw store cannot see this batch twice
+    store = column_store()
+    
+    # New items are written whole, stored items only get their new comments or replies
+    raw_store.append(platform, new_items)
+    raw_store.append(platform, updates, parents=False)
+    store.append(platform, new_items, updates)
+    index.commit()
+    
+    # Duplicates still move the watermarks, so they are not requested again
+    wm.advance(watermarks, platform, selected + selected_updates)
+    
+    child_key = wm.CHILD_KEYS[platform]
+    added_children = sum(len(item[child_key]) for item in new_items + updates) if child_key else 0
+    return new_items, added_children
+
+# Start of the synthetic fetch window for a platform, None for a full fetch
+def fetch_window_start(watermarks, platform, sources):
+    since = wm.platform_since(watermarks, platform, sources)
+    return datetime.strptime(since, "%Y-%m-%d %H:%M:%S") if since else None
 
 # Mock function to simulate fetching news data
-def fetch_news_data():
+def fetch_news_data(seed=synthetic.DEFAULT_SEED, end=None, watermarks=None):
     print("Fetching news data from 30 news sites...")
     
-    # In a real implementation, this would use PolitePol or a similar service
-    # to scrape news sites. For this demo, we'll create mock data.
-    
-    news_data = []
-    
-    # List of mock news sites
-    news_sites = [
-        "UBPost", "Montsame", "GoGo.mn", "News.mn", "Ikon.mn",
-        "Unuudur", "Zuunii Medee", "Daily News", "The UB Times", "Mongolia Today",
-        "Eagle News", "Mongolian Economy", "Business Mongolia", "Mining Mongolia", "Politics Mongolia",
-        "Sports Mongolia", "Tech Mongolia", "Health Mongolia", "Education Mongolia", "Environment Mongolia",
-        "Finance Mongolia", "Tourism Mongolia", "Culture Mongolia", "Agriculture Mongolia", "Energy Mongolia",
-        "Infrastructure Mongolia", "Foreign Affairs Mongolia", "Legal Mongolia", "Social Mongolia", "Regional Mongolia"
-    ]
-    
-    # List of parliament members
-    members = [
-        "Dashzegve AMARBAYASGALAN", "Khurelbaatar BULGANTUYA", "NOROV ALTANKHUYAG",
-        "SAINBUYAN AMARSAIKHAN", "TELUKHAN AUBAKIR", "ENKHTAIVAN BAT-AMGALAN",
-        "Jadamba BAT-ERDENE", "JIGJID BATJARGAL"
-    ]
-    
-    # List of topics
-    topics = [
-        "Economic Policy", "Healthcare Reform", "Environmental Protection", "Foreign Relations",
-        "Budget Debate", "Education Reform", "Digital Transformation", "Cultural Heritage"
-    ]
+    own_watermarks = watermarks is None
+    if own_watermarks:
+        watermarks = wm.load_watermarks()
+    prepare_store('news', watermarks)
     
-    # Generate mock news data
-    for site in news_sites:
-        # Each site has approximately 10 posts
-        for _ in range(10):
-            # Randomly select a member and topic
-            member = members[int(time.time() * 1000) % len(members)]
-            topic = topics[int(time.time() * 1000) % len(topics)]
-            
-            # Generate a mock sentiment score (0-1)
-            sentiment = round((time.time() * 1000) % 100) / 100
-            
-            # Create a mock news item
-            news_item = {
-                "site": site,
-                "title": f"{topic} discussion in Parliament",
-                "content": f"The Parliament member {member} discussed {topic} during the session. The discussion focused on various aspects of the policy and its implementation.",
-                "url": f"https://{site.lower().replace(' ', '')}.mn/news/{int(time.time() * 1000)}",
-                "date": (datetime.now() - timedelta(hours=int(time.time() * 10) % 24)).strftime("%Y-%m-%d %H:%M:%S"),
-                "member": member,
-                "topic": topic,
-                "sentiment": sentiment
-            }
-            
-            news_data.append(news_item)
-            
-            # Small delay to ensure different timestamps and random values
-            time.sleep(0.01)
+    # In a real implementation, this would use PolitePol or a similar service
+    # to scrape news sites. For this demo, we generate seeded synthetic data
+    # for the window since the oldest site watermark.
+    start = fetch_window_start(watermarks, 'news', synthetic.NEWS_SITES)
+    fetched = synthetic.generate_news(seed=seed, posts_per_site=10, end=end, start=start)
     
-    # Save the data to a JSON file
-    with open('data/news/news_data.json', 'w') as f:
-        json.dump(news_data, f, indent=2)
+    news_data, _ = store_increment('news', fetched, watermarks)
+    if own_watermarks:
+        wm.save_watermarks(watermarks)
     
-    print(f"Collected {len(news_data)} news items from {len(news_sites)} sites")
+    print(f"Collected {len(news_data)} new news items from {len(synthetic.NEWS_SITES)} sites")
     return news_data
 
 # Mock function to simulate fetching Facebook data
-def fetch_facebook_data():
+def fetch_facebook_data(seed=synthetic.DEFAULT_SEED, end=None, watermarks=None):
     print("Fetching Facebook data from 130 pages...")
     
-    # In a real implementation, this would use Apify or a similar service
-    # to collect Facebook data. For this demo, we'll create mock data.
-    
-    facebook_data = []
-    
-    # Generate mock Facebook page names
-    facebook_pages = []
-    for i in range(1, 131):
-        facebook_pages.append(f"Mongolia_Page_{i}")
-    
-    # List of parliament members
-    members = [
-        "Dashzegve AMARBAYASGALAN", "Khurelbaatar BULGANTUYA", "NOROV ALTANKHUYAG",
-        "SAINBUYAN AMARSAIKHAN", "TELUKHAN AUBAKIR", "ENKHTAIVAN BAT-AMGALAN",
-        "Jadamba BAT-ERDENE", "JIGJID BATJARGAL"
-    ]
-    
-    # List of topics
-    topics = [
-        "Economic Policy", "Healthcare Reform", "Environmental Protection", "Foreign Relations",
-        "Budget Debate", "Education Reform", "Digital Transformation", "Cultural Heritage"
-    ]
-    
-    # Generate mock Facebook data
-    for page in facebook_pages:
-        # Each page has approximately 10 posts
-        for _ in range(10):
-            # Randomly select a member and topic
-            member = members[int(time.time() * 1000) % len(members)]
-            topic = topics[int(time.time() * 1000) % len(topics)]
-            
-            # Generate a mock sentiment score (0-1)
-            post_sentiment = round((time.time() * 1000) % 100) / 100
-            
-            # Create a mock Facebook post
-            post = {
-                "page": page,
-                "post_id": f"{page}_{int(time.time() * 1000)}",
-                "content": f"Discussion about {topic} in Parliament. {member} made some interesting points today.",
-                "url": f"https://facebook.com/{page}/posts/{int(time.time() * 1000)}",
-                "date": (datetime.now() - timedelta(hours=int(time.time() * 10) % 24)).strftime("%Y-%m-%d %H:%M:%S"),
-                "member": member,
-                "topic": topic,
-                "sentiment": post_sentiment,
-                "likes": int(time.time() * 10) % 500,
-                "shares": int(time.time() * 10) % 100,
-                "comments": []
-            }
-            
-            # Generate mock comments (around 100 per post)
-            num_comments = 90 + int(time.time() * 10) % 20
-            for j in range(num_comments):
-                comment_sentiment = round((time.time() * 1000) % 100) / 100
-                
-                comment = {
-                    "comment_id": f"{post['post_id']}_{j}",
-                    "content": f"I {'agree' if comment_sentiment > 0.5 else 'disagree'} with {member}'s position on {topic}. {'This is good for Mongolia.' if comment_sentiment > 0.5 else 'This needs more consideration.'}",
-                    "date": (datetime.now() - timedelta(hours=int(time.time() * 10) % 12, minutes=int(time.time() * 100) % 60)).strftime("%Y-%m-%d %H:%M:%S"),
-                    "sentiment": comment_sentiment,
-                    "likes": int(time.time() * 10) % 50
-                }
-                
-                post["comments"].append(comment)
-                
-                # Small delay to ensure different timestamps and random values
-                time.sleep(0.001)
-            
-            facebook_data.append(post)
-            
-            # Small delay to ensure different timestamps and random values
-            time.sleep(0.01)
-    
-    # Save the data to a JSON file
-    with open('data/facebook/facebook_data.json', 'w') as f:
-        json.dump(facebook_data, f, indent=2)
+    own_watermarks = watermarks is None
+    if own_watermarks:
+        watermarks = wm.load_watermarks()
+    prepare_store('facebook', watermarks)
     
-    print(f"Collected {len(facebook_data)} posts with approximately {len(facebook_data) * 100} comments from {len(facebook_pages)} Facebook pages")
+    # In a real implementation, this would use Apify or a similar service
+    # to collect Facebook data. For this demo, we generate seeded synthetic data
+    # for the window since the oldest page watermark, including new comments
+    # on posts that are already stored.
+    start = fetch_window_start(watermarks, 'facebook', synthetic.facebook_page_names(130))
+    fetched = synthetic.generate_facebook(seed=seed, pages=130, posts_per_page=10, comments_per_post=100,
+                                          end=end, start=start, include_updates=start is not None)
+    
+    facebook_data, added_comments = store_increment('facebook', fetched, watermarks)
+    if own_watermarks:
+        wm.save_watermarks(watermarks)
+    
+    print(f"Collected {len(facebook_data)} new posts and {added_comments} new comments from 130 Facebook pages")
     return facebook_data
 
 # Mock function to simulate fetching Twitter data
-def fetch_twitter_data():
+def fetch_twitter_data(seed=synthetic.DEFAULT_SEED, end=None, watermarks=None):
     print("Fetching Twitter data from 10 accounts...")
     
-    # In a real implementation, this would use Apify or a similar service
-    # to collect Twitter data. For this demo, we'll create mock data.
-    
-    twitter_data = []
-    
-    # Generate mock Twitter account names
-    twitter_accounts = []
-    for i in range(1, 11):
-        twitter_accounts.append(f"Mongolia_Account_{i}")
-    
-    # List of parliament members
-    members = [
-        "Dashzegve AMARBAYASGALAN", "Khurelbaatar BULGANTUYA", "NOROV ALTANKHUYAG",
-        "SAINBUYAN AMARSAIKHAN", "TELUKHAN AUBAKIR", "ENKHTAIVAN BAT-AMGALAN",
-        "Jadamba BAT-ERDENE", "JIGJID BATJARGAL"
-    ]
-    
-    # List of topics
-    topics = [
-        "Economic Policy", "Healthcare Reform", "Environmental Protection", "Foreign Relations",
-        "Budget Debate", "Education Reform", "Digital Transformation", "Cultural Heritage"
-    ]
-    
-    # Generate mock Twitter data
-    for account in twitter_accounts:
-        # Each account has approximately 10 tweets
-        for _ in range(10):
-            # Randomly select a member and topic
-            member = members[int(time.time() * 1000) % len(members)]
-            topic = topics[int(time.time() * 1000) % len(topics)]
-            
-            # Generate a mock sentiment score (0-1)
-            tweet_sentiment = round((time.time() * 1000) % 100) / 100
-            
-            # Create a mock tweet
-            tweet = {
-                "account": account,
-                "tweet_id": f"{account}_{int(time.time() * 1000)}",
-                "content": f"#{topic.replace(' ', '')} #{member.split(' ')[1]} Parliament discussion today was {'productive' if tweet_sentiment > 0.5 else 'concerning'}. #Mongolia #Parliament",
-                "url": f"https://twitter.com/{account}/status/{int(time.time() * 1000)}",
-                "date": (datetime.now() - timedelta(hours=int(time.time() * 10) % 24)).strftime("%Y-%m-%d %H:%M:%S"),
-                "member": member,
-                "topic": topic,
-                "sentiment": tweet_sentiment,
-                "likes": int(time.time() * 10) % 200,
-                "retweets": int(time.time() * 10) % 50,
-                "replies": []
-            }
-            
-            # Generate mock replies (around 20 per tweet)
-            num_replies = 15 + int(time.time() * 10) % 10
-            for j in range(num_replies):
-                reply_sentiment = round((time.time() * 1000) % 100) / 100
-                
-                reply = {
-                    "reply_id": f"{tweet['tweet_id']}_{j}",
-                    "content": f"{'I support' if reply_sentiment > 0.5 else 'I question'} {member}'s stance on {topic}. {'Good initiative!' if reply_sentiment > 0.7 else 'Needs improvement.' if reply_sentiment > 0.4 else 'Completely disagree.'}",
-                    "date": (datetime.now() - timedelta(hours=int(time.time() * 10) % 12, minutes=int(time.time() * 100) % 60)).strftime("%Y-%m-%d %H:%M:%S"),
-                    "sentiment": reply_sentiment,
-                    "likes": int(time.time() * 10) % 30
-                }
-                
-                tweet["replies"].append(reply)
-                
-                # Small delay to ensure different timestamps and random values
-                time.sleep(0.001)
-            
-            twitter_data.append(tweet)
-            
-            # Small delay to ensure different timestamps and random values
-            time.sleep(0.01)
-    
-    # Save the data to a JSON file
-    with open('data/twitter/twitter_data.json', 'w') as f:
-        json.dump(twitter_data, f, indent=2)
+    own_watermarks = watermarks is None
+    if own_watermarks:
+        watermarks = wm.load_watermarks()
+    prepare_store('twitter', watermarks)
     
-    print(f"Collected {len(twitter_data)} tweets with approximately {len(twitter_data) * 20} replies from {len(twitter_accounts)} Twitter accounts")
+    # In a real implementation, this would use Apify or a similar service
+    # to collect Twitter data. For this demo, we generate seeded synthetic data
+    # for the window since the oldest account watermark, including new replies
+    # on tweets that are already stored.
+    start = fetch_window_start(watermarks, 'twitter', synthetic.twitter_account_names(10))
+    fetched = synthetic.generate_twitter(seed=seed, accounts=10, tweets_per_account=10, replies_per_tweet=20,
+                                         end=end, start=start, include_updates=start is not None)
+    
+    twitter_data, added_replies = store_increment('twitter', fetched, watermarks)
+    if own_watermarks:
+        wm.save_watermarks(watermarks)
+    
+    print(f"Collected {len(twitter_data)} new tweets and {added_replies} new replies from 10 Twitter accounts")
     return twitter_data
 
+# Fetch new data from every source into the raw store.
+# Watermarks and a crawl scheduler passed in belong to the caller, which saves them.
+def fetch_all_data(watermarks=None, crawl=None):
+    own_watermarks = watermarks is None
+    if own_watermarks:
+        watermarks = wm.load_watermarks()
+    base_url = os.environ.get(ingest.SOURCE_URL_ENV)
+    
+    if not base_url:
+        # No source API configured, fall back to the synthetic fetchers
+        fetch_news_data(watermarks=watermarks)
+        fetch_facebook_data(watermarks=watermarks)
+        fetch_twitter_data(watermarks=watermarks)
+        if own_watermarks:
+            wm.save_watermarks(watermarks)
+        return
+    
+    print(f"Fetching all sources concurrently from {base_url}...")
+    for platform in PLATFORMS:
+        prepare_store(platform, watermarks)
+    
+    # Ask every source only for activity since its own watermark
+    def params_for(source):
+        since = wm.source_since(watermarks, source['platform'], source['name'])
+        return {'since': since} if since else None
+    
+    # Only the sources the crawl scheduler finds due (and the hosts can take) are polled
+    crawl = crawl or crawl_scheduler(base_url)
+    crawl.apply_alerts(alerting.active_members())
+    batch = crawl.next_batch()
+    print(f"Polling {len(batch)} of {len(crawl.sources)} sources")
+    collected = ingest.collect_by_source(batch, params_for=params_for)
+    
+    for platform in PLATFORMS:
+        items = [item for by_source in collected[platform].values() for item in by_source]
+        new_items, added_children = store_increment(platform, items, watermarks)
+        print(f"Collected {len(new_items)} new {platform} items and {added_children} new comments/replies")
+    
+    record_crawl(crawl, batch, collected)
+    if own_watermarks:
+        wm.save_watermarks(watermarks)
+
+# Crawl scheduler over the default sources, resuming the saved schedule
+def crawl_scheduler(base_url):
+    return scheduler.CrawlScheduler(ingest.default_sources(base_url), state=scheduler.load_schedule())
+
+# Feed each polled source's activity back to the crawl scheduler
+def record_crawl(crawl, batch, collected):
+    for source in batch:
+        platform = source['platform']
+        items = collected[platform].get(source['name'])
+        if items is None:
+            crawl.record(source['name'], 0, failed=True)
+            continue
+        child_key = wm.CHILD_KEYS[platform]
+        records = sum(1 + (len(item.get(child_key) or []) if child_key else 0) for item in items)
+        crawl.record(source['name'], records, members=[item['member'] for item in items if item.get('member')])
+    
+    scheduler.save_schedule(crawl)
+    crawl.write_decisions(scheduler.DECISIONS_PATH)
+    print("Crawl decisions: " + ", ".join(f"{decision} {count}" for decision, count in sorted(crawl.summary().items())))
+
 # Function to perform basic sentiment analysis
-def analyze_sentiment(data_type, data):
+def analyze_sentiment(data_type, state):
     print(f"Performing sentiment analysis on {data_type} data...")
     
     # In a real implementation, this would use a more sophisticated sentiment analysis model.
     # For this demo, we'll use the mock sentiment scores already generated.
+    item_sentiment = state.platform_mean(data_type)
     
     # Calculate overall sentiment
     if data_type == 'news':
-        overall_sentiment = sum(item['sentiment'] for item in data) / len(data)
+        overall_sentiment = item_sentiment
         print(f"Overall sentiment for news: {overall_sentiment:.2f}")
         
     elif data_type == 'facebook':
-        # Calculate post sentiment
-        post_sentiment = sum(post['sentiment'] for post in data) / len(data)
-        
-        # Calculate comment sentiment
-        all_comments = []
-        for post in data:
-            all_comments.extend(post['comments'])
-        
-        comment_sentiment = sum(comment['sentiment'] for comment in all_comments) / len(all_comments)
+        # Calculate post and comment sentiment
+        post_sentiment = item_sentiment
+        comment_sentiment = state.platform_mean(data_type, children=True)
         
         overall_sentiment = (post_sentiment + comment_sentiment) / 2
         print(f"Overall sentiment for Facebook: {overall_sentiment:.2f}")
         print(f"Post sentiment: {post_sentiment:.2f}, Comment sentiment: {comment_sentiment:.2f}")
         
     elif data_type == 'twitter':
-        # Calculate tweet sentiment
-        tweet_sentiment = sum(tweet['sentiment'] for tweet in data) / len(data)
-        
-        # Calculate reply sentiment
-        all_replies = []
-        for tweet in data:
-            all_replies.extend(tweet['replies'])
-        
-        reply_sentiment = sum(reply['sentiment'] for reply in all_replies) / len(all_replies)
+        # Calculate tweet and reply sentiment
+        tweet_sentiment = item_sentiment
+        reply_sentiment = state.platform_mean(data_type, children=True)
         
         overall_sentiment = (tweet_sentiment + reply_sentiment) / 2
         print(f"Overall sentiment for Twitter: {overall_sentiment:.2f}")
         print(f"Tweet sentiment: {tweet_sentiment:.2f}, Reply sentiment: {reply_sentiment:.2f}")
     
-    return overall_sentiment
+    return float(overall_sentiment)
 
 # Function to analyze mentions by member
-def analyze_member_mentions(news_data, facebook_data, twitter_data):
+def analyze_member_mentions(state):
     print("Analyzing mentions by parliament member...")
     
-    # List of parliament members
-    members = [
-        "Dashzegve AMARBAYASGALAN", "Khurelbaatar BULGANTUYA", "NOROV ALTANKHUYAG",
-        "SAINBUYAN AMARSAIKHAN", "TELUKHAN AUBAKIR", "ENKHTAIVAN BAT-AMGALAN",
-        "Jadamba BAT-ERDENE", "JIGJID BATJARGAL"
-    ]
+    # Parliament members come from the central entity catalog
+    members = list(state.entity_names)
     
     member_mentions = {}
     
@@ -315,44 +311,20 @@ def analyze_member_mentions(news_data, facebook_data, twitter_data):
             }
         }
     
-    # Count mentions in news
-    for item in news_data:
-        member = item['member']
-        member_mentions[member]['total'] += 1
-        member_mentions[member]['news'] += 1
-        member_mentions[member]['sentiment']['news'] += item['sentiment']
-    
-    # Count mentions in Facebook posts
-    for post in facebook_data:
-        member = post['member']
-        member_mentions[member]['total'] += 1
-        member_mentions[member]['facebook'] += 1
-        member_mentions[member]['sentiment']['facebook'] += post['sentiment']
-        
-        # Count mentions in Facebook comments
-        for comment in post['comments']:
-            if any(m in comment['content'] for m in members):
-                for m in members:
-                    if m in comment['content']:
-                        member_mentions[m]['total'] += 1
-                        member_mentions[m]['facebook'] += 1
-                        member_mentions[m]['sentiment']['facebook'] += comment['sentiment']
-    
-    # Count mentions in Twitter tweets
-    for tweet in twitter_data:
-        member = tweet['member']
-        member_mentions[member]['total'] += 1
-        member_mentions[member]['twitter'] += 1
-        member_mentions[member]['sentiment']['twitter'] += tweet['sentiment']
-        
-        # Count mentions in Twitter replies
-        for reply in tweet['replies']:
-            if any(m in reply['content'] for m in members):
-                for m in members:
-                    if m in reply['content']:
-                        member_mentions[m]['total'] += 1
-                        member_mentions[m]['twitter'] += 1
-                        member_mentions[m]['sentiment']['twitter'] += reply['sentiment']
+    # Mentions in news, Facebook posts and tweets come from their member column,
+    # mentions in Facebook comments and Twitter replies from the entity matcher
+    for dimension in ('member', 'mention'):
+        for member, platforms in state.totals(dimension).items():
+            if member not in member_mentions:
+                members.append(member)
+                member_mentions[member] = {
+                    'total': 0, 'news': 0, 'facebook': 0, 'twitter': 0,
+                    'sentiment': {'overall': 0, 'news': 0, 'facebook': 0, 'twitter': 0}
+                }
+            for platform, (count, total) in platforms.items():
+                member_mentions[member]['total'] += count
+                member_mentions[member][platform] += count
+                member_mentions[member]['sentiment'][platform] += total
     
     # Calculate average sentiment
     for member in members:
@@ -373,8 +345,7 @@ def analyze_member_mentions(news_data, facebook_data, twitter_data):
             ) / member_mentions[member]['total']
     
     # Save the data to a JSON file
-    with open('data/member_mentions.json', 'w') as f:
-        json.dump(member_mentions, f, indent=2)
+    write_snapshot('data/member_mentions.json', member_mentions)
     
     # Print summary
     print("\nMember Mentions Summary:")
@@ -385,7 +356,7 @@ def analyze_member_mentions(news_data, facebook_data, twitter_data):
     return member_mentions
 
 # Function to analyze topics
-def analyze_topics(news_data, facebook_data, twitter_data):
+def analyze_topics(state):
     print("Analyzing topics...")
     
     # List of topics
@@ -411,29 +382,19 @@ def analyze_topics(news_data, facebook_data, twitter_data):
             }
         }
     
-    # Count mentions in news
-    for item in news_data:
-        topic = item['topic']
-        topic_mentions[topic]['total'] += 1
-        topic_mentions[topic]['news'] += 1
-        topic_mentions[topic]['sentiment']['news'] += item['sentiment']
-    
-    # Count mentions in Facebook posts
-    for post in facebook_data:
-        topic = post['topic']
-        topic_mentions[topic]['total'] += 1
-        topic_mentions[topic]['facebook'] += 1
-        topic_mentions[topic]['sentiment']['facebook'] += post['sentiment']
-    
-    # Count mentions in Twitter tweets
-    for tweet in twitter_data:
-        topic = tweet['topic']
-        topic_mentions[topic]['total'] += 1
-        topic_mentions[topic]['twitter'] += 1
-        topic_mentions[topic]['sentiment']['twitter'] += tweet['sentiment']
+    # Add the per-platform topic counts and sentiment sums of the aggregate state
+    for topic, platforms in state.totals('topic').items():
+        topic_mentions.setdefault(topic, {
+            'total': 0, 'news': 0, 'facebook': 0, 'twitter': 0,
+            'sentiment': {'overall': 0, 'news': 0, 'facebook': 0, 'twitter': 0}
+        })
+        for platform, (count, total) in platforms.items():
+            topic_mentions[topic]['total'] += count
+            topic_mentions[topic][platform] += count
+            topic_mentions[topic]['sentiment'][platform] += total
     
     # Calculate average sentiment
-    for topic in topics:
+    for topic in topic_mentions:
         if topic_mentions[topic]['news'] > 0:
             topic_mentions[topic]['sentiment']['news'] /= topic_mentions[topic]['news']
         
@@ -451,8 +412,7 @@ def analyze_topics(news_data, facebook_data, twitter_data):
             ) / topic_mentions[topic]['total']
     
     # Save the data to a JSON file
-    with open('data/topic_mentions.json', 'w') as f:
-        json.dump(topic_mentions, f, indent=2)
+    write_snapshot('data/topic_mentions.json', topic_mentions)
     
     # Print summary
     print("\nTopic Mentions Summary:")
@@ -463,186 +423,241 @@ def analyze_topics(news_data, facebook_data, twitter_data):
     return topic_mentions
 
 # Function to generate alerts
-def generate_alerts(news_data, facebook_data, twitter_data, member_mentions):
+def generate_alerts(state, alert_engine):
     print("Generating alerts...")
     
-    alerts = []
-    
-    # Generate alerts for significant sentiment changes
-    for member, data in member_mentions.items():
-        # Mock previous sentiment (slightly different from current)
-        prev_sentiment = max(0, min(1, data['sentiment']['overall'] + (0.1 if data['sentiment']['overall'] < 0.5 else -0.1)))
-        
-        # Alert for significant negative sentiment
-        if data['sentiment']['overall'] < 0.4 and data['total'] > 10:
-            alerts.append({
-                'id': len(alerts) + 1,
-                'title': f"Negative sentiment for {member}",
-                'description': f"Overall sentiment for {member} is negative ({data['sentiment']['overall']:.2f}) across {data['total']} mentions.",
-                'date': datetime.now().strftime("%Y-%m-%d"),
-                'time': datetime.now().strftime("%H:%M"),
-                'priority': 'high',
-                'source': 'all',
-                'sentiment': 'negative',
-                'members': [member],
-                'read': False
-            })
-        
-        # Alert for significant sentiment drop
-        if data['sentiment']['overall'] < prev_sentiment - 0.15 and data['total'] > 5:
-            alerts.append({
-                'id': len(alerts) + 1,
-                'title': f"Sentiment drop for {member}",
-                'description': f"Sentiment for {member} has dropped from {prev_sentiment:.2f} to {data['sentiment']['overall']:.2f}.",
-                'date': datetime.now().strftime("%Y-%m-%d"),
-                'time': datetime.now().strftime("%H:%M"),
-                'priority': 'medium',
-                'source': 'all',
-                'sentiment': 'negative',
-                'members': [member],
-                'read': False
-            })
-        
-        # Alert for high positive sentiment
-        if data['sentiment']['overall'] > 0.7 and data['total'] > 10:
-            alerts.append({
-                'id': len(alerts) + 1,
-                'title': f"Positive sentiment for {member}",
-                'description': f"Overall sentiment for {member} is very positive ({data['sentiment']['overall']:.2f}) across {data['total']} mentions.",
-                'date': datetime.now().strftime("%Y-%m-%d"),
-                'time': datetime.now().strftime("%H:%M"),
-                'priority': 'medium',
-                'source': 'all',
-                'sentiment': 'positive',
-                'members': [member],
-                'read': False
-            })
-    
-    # Generate alerts for high-engagement content
-    # Facebook posts with many comments
-    for post in facebook_data:
-        if len(post['comments']) > 120:
-            alerts.append({
-                'id': len(alerts) + 1,
-                'title': f"High engagement Facebook post about {post['member']}",
-                'description': f"A Facebook post about {post['member']} and {post['topic']} has received {len(post['comments'])} comments.",
-                'date': datetime.now().strftime("%Y-%m-%d"),
-                'time': datetime.now().strftime("%H:%M"),
-                'priority': 'medium',
-                'source': 'facebook',
-                'sentiment': 'neutral',
-                'members': [post['member']],
-                'read': False
-            })
-    
-    # Twitter tweets with many replies
-    for tweet in twitter_data:
-        if len(tweet['replies']) > 25:
-            alerts.append({
-                'id': len(alerts) + 1,
-                'title': f"High engagement tweet about {tweet['member']}",
-                'description': f"A tweet about {tweet['member']} and {tweet['topic']} has received {len(tweet['replies'])} replies.",
-                'date': datetime.now().strftime("%Y-%m-%d"),
-                'time': datetime.now().strftime("%H:%M"),
-                'priority': 'low',
-                'source': 'twitter',
-                'sentiment': 'neutral',
-                'members': [tweet['member']],
-                'read': False
-            })
+    # Every rule is evaluated over the sliding windows fed by the last update;
+    # alerts keep their IDs across runs, so a continuing condition is not repeated
+    alerts = alert_engine.evaluate(state)
     
     # Save the alerts to a JSON file
-    with open('data/alerts.json', 'w') as f:
-        json.dump(alerts, f, indent=2)
+    write_snapshot('data/alerts.json', alerts)
     
-    print(f"Generated {len(alerts)} alerts")
+    print(f"Generated {len(alert_engine.new_alerts)} new alerts ({len(alerts)} in history)")
     return alerts
 
-# Main function to run the monitoring process
-def run_monitoring():
-    print("Starting social media monitoring for Parliament of Mongolia...")
-    
-    # Fetch data from different sources
-    news_data = fetch_news_data()
-    facebook_data = fetch_facebook_data()
-    twitter_data = fetch_twitter_data()
+# Output snapshots written by the analysis stage
+SNAPSHOT_PATHS = ['data/member_mentions.json', 'data/topic_mentions.json', 'data/alerts.json',
+                  'data/sentiment_trends.json']
+
+# Everything a monitoring cycle needs, kept in memory between cycles in daemon mode.
+# With checkpoint_stages, everything is saved after each stage so a failed run resumes
+# from the stage that failed; the daemon saves the folded state every cycle and the
+# rest at its periodic and final checkpoints.
+class MonitorState:
+    def __init__(self, checkpoint_stages=True):
+        self.checkpoint_stages = checkpoint_stages
+        self.stages = checkpoints.StageCheckpoints('monitor')
+        self.watermarks = wm.load_watermarks()
+        self.matcher = entities.EntityMatcher()
+        self.aggregates = aggregate.load_state()
+        self.rollup_store = rollups.RollupStore()
+        self.alert_engine = alerting.AlertEngine()
+        base_url = os.environ.get(ingest.SOURCE_URL_ENV)
+        self.crawl = crawl_scheduler(base_url) if base_url else None
+    
+    # Save everything that is only held in memory; the stores write through on their own
+    def checkpoint(self):
+        started = time.perf_counter()
+        wm.save_watermarks(self.watermarks)
+        self.aggregates.save()
+        self.alert_engine.save()
+        if self.crawl:
+            scheduler.save_schedule(self.crawl)
+        # Stage completions are saved last, so they never claim more than the files above hold
+        self.stages.save()
+        print(f"Checkpoint written in {time.perf_counter() - started:.2f}s")
+    
+    # The rollup store commits every fold as it happens, so the aggregates and alert windows
+    # folded alongside it are saved at the same rows; a restart then resumes the fold instead
+    # of finding them at different rows and refolding the whole history
+    def save_fold(self):
+        self.aggregates.save()
+        self.alert_engine.save()
+    
+    def close(self, checkpoint=True):
+        if checkpoint:
+            self.checkpoint()
+        self.rollup_store.close()
+
+# One ingestion and analysis cycle over the data added since the last one.
+# Ingestion always runs (new data at the sources is its input); folding and analysis
+# are skipped when their inputs are unchanged since they last completed.
+def run_cycle(hot):
+    # Fetch new data from different sources into the raw store
+    fetch_all_data(hot.watermarks, hot.crawl)
+    if hot.checkpoint_stages:
+        hot.checkpoint()
+    
+    # Fold the newly stored data into the aggregate state, the time rollups and the alert windows
+    store = column_store()
+    compact_column_store(store)
+    fold_fingerprint = checkpoints.fingerprint(params={
+        'rows': {table: store.num_rows(table) for table in columnar.TABLES},
+        'entities': hot.matcher.entities
+    })
+    if hot.stages.is_complete('fold', fold_fingerprint):
+        print("Skipping fold: no new rows in the column store")
+    else:
+        hot.aggregates.update(store, hot.matcher, sinks=[hot.rollup_store, hot.alert_engine])
+        hot.rollup_store.downsample()
+        hot.stages.complete('fold', fold_fingerprint,
+                            [aggregate.STATE_PATH, rollups.ROLLUP_PATH, alerting.ALERT_STATE_PATH])
+        if hot.checkpoint_stages:
+            hot.checkpoint()
+        else:
+            hot.save_fold()
+    
+    # Analyses read only the folded state, so they depend on the same rows
+    if hot.stages.is_complete('analyze', fold_fingerprint):
+        print("Skipping analyses: outputs are up to date")
+    else:
+        run_analyses(hot)
+        hot.stages.complete('analyze', fold_fingerprint, SNAPSHOT_PATHS)
+        if hot.checkpoint_stages:
+            hot.checkpoint()
+        else:
+            # The crawl scheduler reads the open alerts from the saved engine state
+            hot.alert_engine.save()
+
+# Write the dashboard snapshots from the folded state
+def run_analyses(hot):
+    state = hot.aggregates
     
     # Perform sentiment analysis
-    news_sentiment = analyze_sentiment('news', news_data)
-    facebook_sentiment = analyze_sentiment('facebook', facebook_data)
-    twitter_sentiment = analyze_sentiment('twitter', twitter_data)
+    news_sentiment = analyze_sentiment('news', state)
+    facebook_sentiment = analyze_sentiment('facebook', state)
+    twitter_sentiment = analyze_sentiment('twitter', state)
     
     # Calculate overall sentiment
-    total_items = len(news_data) + len(facebook_data) + len(twitter_data)
-    overall_sentiment = (news_sentiment * len(news_data) + 
-                         facebook_sentiment * len(facebook_data) + 
-                         twitter_sentiment * len(twitter_data)) / total_items
+    post_counts = state.totals('posts').get('', {})
+    news_items, facebook_items, twitter_items = (post_counts.get(p, [0])[0] for p in PLATFORMS)
+    total_items = news_items + facebook_items + twitter_items
+    overall_sentiment = (news_sentiment * news_items + 
+                         facebook_sentiment * facebook_items + 
+                         twitter_sentiment * twitter_items) / total_items
     
     print(f"\nOverall sentiment across all platforms: {overall_sentiment:.2f}")
     
     # Analyze mentions by member
-    member_mentions = analyze_member_mentions(news_data, facebook_data, twitter_data)
+    analyze_member_mentions(state)
     
     # Analyze topics
-    topic_mentions = analyze_topics(news_data, facebook_data, twitter_data)
+    analyze_topics(state)
     
     # Generate alerts
-    alerts = generate_alerts(news_data, facebook_data, twitter_data, member_mentions)
+    generate_alerts(state, hot.alert_engine)
+    
+    # Generate sentiment trends for the last 7 days from the daily rollups
+    platform_sentiment = {'news': news_sentiment, 'facebook': facebook_sentiment, 'twitter': twitter_sentiment}
+    generate_sentiment_trends(hot.rollup_store, platform_sentiment)
+
+# Main function to run the monitoring process
+def run_monitoring():
+    print("Starting social media monitoring for Parliament of Mongolia...")
     
-    # Generate sentiment trends (mock data for 7 days)
-    generate_sentiment_trends(news_sentiment, facebook_sentiment, twitter_sentiment, topic_mentions)
+    hot = MonitorState()
+    run_cycle(hot)
+    hot.close(checkpoint=False)
     
     print("\nMonitoring completed successfully!")
 
+# Run monitoring cycles every interval seconds until SIGTERM or SIGINT, then checkpoint and exit.
+# State stays in memory between cycles, so a cycle only pays for the data added since the last one.
+def run_daemon(interval=DAEMON_INTERVAL, checkpoint_interval=CHECKPOINT_INTERVAL):
+    global _column_store
+    print(f"Starting monitoring daemon (cycle every {interval}s, checkpoint every {checkpoint_interval}s)...")
+    
+    stop = threading.Event()
+    def request_stop(signum, frame):
+        print(f"Received signal {signum}, stopping after the current cycle...")
+        stop.set()
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    
+    hot = MonitorState(checkpoint_stages=False)
+    last_checkpoint = time.monotonic()
+    cycles = 0
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                run_cycle(hot)
+                cycles += 1
+                print(f"Cycle {cycles} finished in {time.monotonic() - started:.2f}s")
+            except Exception as e:
+                # The in-memory state may be half updated, so resume from the last checkpoint;
+                # the next update refolds whatever the checkpoint does not cover
+                print(f"Monitoring cycle failed: {e}")
+                hot.close(checkpoint=False)
+                _column_store = None
+                hot = MonitorState(checkpoint_stages=False)
+            
+            if time.monotonic() - last_checkpoint >= checkpoint_interval:
+                hot.checkpoint()
+                last_checkpoint = time.monotonic()
+            stop.wait(max(interval - (time.monotonic() - started), 0))
+    finally:
+        # Final checkpoint, so a restart picks up exactly where this process stopped
+        hot.close()
+    
+    print(f"Monitoring daemon stopped after {cycles} cycles")
+
 # Function to generate sentiment trends
-def generate_sentiment_trends(news_sentiment, facebook_sentiment, twitter_sentiment, topic_mentions):
+def generate_sentiment_trends(rollup_store, platform_sentiment, days=7):
     print("Generating sentiment trends...")
     
     sentiment_trends = []
     
-    # Generate data for the past 7 days
-    for i in range(7):
-        date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-        
-        # Add small variations to sentiment for previous days
-        variation = (7 - i) * 0.01
-        day_news_sentiment = max(0, min(1, news_sentiment - variation + (0.02 * (i % 3 - 1))))
-        day_facebook_sentiment = max(0, min(1, facebook_sentiment - variation + (0.02 * ((i+1) % 3 - 1))))
-        day_twitter_sentiment = max(0, min(1, twitter_sentiment - variation + (0.02 * ((i+2) % 3 - 1))))
-        
-        # Calculate overall sentiment
-        day_overall_sentiment = (day_news_sentiment + day_facebook_sentiment + day_twitter_sentiment) / 3
-        
-        # Get top topics for the day
+    # The window ends on the newest day with stored data
+    last_bucket = rollup_store.latest('day')
+    if last_bucket is None:
+        print("No rollups available for sentiment trends")
+        return sentiment_trends
+    first_bucket = last_bucket - (days - 1) * rollups.RESOLUTIONS['day']
+    
+    # Top topics per day, by number of items
+    topics_by_day = {}
+    for bucket, topic, platform, count, total in rollup_store.query('topic', 'day', first_bucket, last_bucket):
+        day_topics = topics_by_day.setdefault(bucket, {})
+        day_topic = day_topics.setdefault(topic, [0, 0.0])
+        day_topic[0] += count
+        day_topic[1] += total
+    
+    for point in rollup_store.platform_trends(first_bucket, last_bucket):
         top_topics = []
-        for topic, data in sorted(topic_mentions.items(), key=lambda x: x[1]['total'], reverse=True)[:5]:
-            # Add small variations to topic sentiment and count
-            topic_sentiment = max(0, min(1, data['sentiment']['overall'] - variation + (0.03 * (i % 3 - 1))))
-            topic_count = max(1, int(data['total'] / 7) - i * 2 + (i % 3))
-            
+        day_topics = topics_by_day.get(point['bucket'], {})
+        for topic, (count, total) in sorted(day_topics.items(), key=lambda x: x[1][0], reverse=True)[:5]:
             top_topics.append({
                 "topic": topic,
-                "count": topic_count,
-                "sentiment": topic_sentiment
+                "count": count,
+                "sentiment": total / count
             })
         
-        day_data = {
-            "date": date,
-            "overall": day_overall_sentiment,
-            "news": day_news_sentiment,
-            "facebook": day_facebook_sentiment,
-            "twitter": day_twitter_sentiment,
-            "topTopics": top_topics
-        }
+        # A platform without items that day falls back to its overall sentiment
+        day_data = {"date": point['date'], "overall": point['overall']}
+        for platform in PLATFORMS:
+            day_data[platform] = point.get(platform, platform_sentiment[platform])
+        day_data["topTopics"] = top_topics
         
         sentiment_trends.append(day_data)
     
     # Save the data to a JSON file
-    with open('data/sentiment_trends.json', 'w') as f:
-        json.dump(sentiment_trends, f, indent=2)
+    write_snapshot('data/sentiment_trends.json', sentiment_trends)
     
-    print(f"Generated sentiment trends for the past 7 days")
+    print(f"Generated sentiment trends for {len(sentiment_trends)} days")
+    return sentiment_trends
 
-# Run the monitoring process
+# Run the monitoring process once, or as a daemon
 if __name__ == "__main__":
-    run_monitoring()
+    parser = argparse.ArgumentParser(description="Social media monitoring for the Parliament of Mongolia")
+    parser.add_argument('--daemon', action='store_true', help="Keep running cycles until SIGTERM")
+    parser.add_argument('--interval', type=float, default=DAEMON_INTERVAL, help="Seconds between cycle starts")
+    parser.add_argument('--checkpoint-interval', type=float, default=CHECKPOINT_INTERVAL,
+                        help="Seconds between checkpoints of the in-memory state")
+    args = parser.parse_args()
+    
+    if args.daemon:
+        run_daemon(args.interval, args.checkpoint_interval)
+    else:
+        run_monitoring()
@@ -1,57 +1,59 @@
+import heapq
 import os
 import json
 import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 import numpy as np
 
+import charts
+import datastore
+import export
+import rollups
+
 # Create directory for visualizations if it doesn't exist
 os.makedirs('data/visualizations', exist_ok=True)
 
 def load_data():
-    """Load the data generated by the monitoring script"""
-    print("Loading monitoring data...")
-    
-    data = {
-        'news': None,
-        'facebook': None,
-        'twitter': None,
-        'member_mentions': None,
-        'topic_mentions': None,
-        'alerts': None,
-        'sentiment_trends': None
+    """Return lazy access to the data generated by the monitoring script
+
+    Datasets are read on first access, so the raw posts are only loaded
+    if a caller actually uses them; comments and replies are not needed
+    here. See datastore.DataStore.
+    """
+    return datastore.DataStore()
+
+# Days covered by the per-member and per-topic charts
+SERIES_DAYS = 30
+
+# Most recent mentions shown per member and source
+RECENT_MENTIONS = {'news': 3, 'facebook': 2, 'twitter': 2}
+
+def recent_items_by_member(items, k, members=None):
+    """Return {member: the k newest items about them, newest first} in one pass over items
+
+    Each member keeps a bounded min-heap, so the cost is O(n log k) rather
+    than a filter and a full sort per member. Items with the same date keep
+    their list order, as with a stable sort.
+    """
+    heaps = {}
+    for index, item in enumerate(items):
+        member = item['member']
+        if members is not None and member not in members:
+            continue
+        heap = heaps.setdefault(member, [])
+        # Ties on date go to the earlier item, hence the negated index
+        entry = (item['date'], -index, item)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+    return {
+        member: [item for _, _, item in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
+        for member, heap in heaps.items()
     }
-    
-    # Check if files exist and load them
-    if os.path.exists('data/news/news_data.json'):
-        with open('data/news/news_data.json', 'r') as f:
-            data['news'] = json.load(f)
-    
-    if os.path.exists('data/facebook/facebook_data.json'):
-        with open('data/facebook/facebook_data.json', 'r') as f:
-            data['facebook'] = json.load(f)
-    
-    if os.path.exists('data/twitter/twitter_data.json'):
-        with open('data/twitter/twitter_data.json', 'r') as f:
-            data['twitter'] = json.load(f)
-    
-    if os.path.exists('data/member_mentions.json'):
-        with open('data/member_mentions.json', 'r') as f:
-            data['member_mentions'] = json.load(f)
-    
-    if os.path.exists('data/topic_mentions.json'):
-        with open('data/topic_mentions.json', 'r') as f:
-            data['topic_mentions'] = json.load(f)
-    
-    if os.path.exists('data/alerts.json'):
-        with open('data/alerts.json', 'r') as f:
-            data['alerts'] = json.load(f)
-    
-    if os.path.exists('data/sentiment_trends.json'):
-        with open('data/sentiment_trends.json', 'r') as f:
-            data['sentiment_trends'] = json.load(f)
-    
-    return data
+
+def sentiment_label(sentiment):
+    return 'positive' if sentiment > 0.6 else 'neutral' if sentiment > 0.4 else 'negative'
 
 def generate_member_profiles(data):
     """Generate detailed profiles for each parliament member"""
@@ -59,58 +61,56 @@ def generate_member_profiles(data):
     
     if not data['member_mentions']:
         print("No member mentions data available.")
-        return
+        return []
     
     member_profiles = []
     
+    # Index the most recent items per member and source in one pass per source
+    members = set(data['member_mentions'])
+    recent = {
+        source: recent_items_by_member(data[source] or [], k, members)
+        for source, k in RECENT_MENTIONS.items()
+    }
+    
     for member_name, mentions in data['member_mentions'].items():
         # Get recent mentions from different sources
         recent_mentions = []
         
         # Add news mentions
-        if data['news']:
-            news_mentions = [item for item in data['news'] if item['member'] == member_name]
-            news_mentions.sort(key=lambda x: x['date'], reverse=True)
-            for mention in news_mentions[:3]:
-                recent_mentions.append({
-                    'id': len(recent_mentions) + 1,
-                    'source': 'news',
-                    'title': mention['title'],
-                    'snippet': mention['content'][:150] + '...',
-                    'url': mention['url'],
-                    'date': mention['date'].split()[0],
-                    'sentiment': 'positive' if mention['sentiment'] > 0.6 else 'neutral' if mention['sentiment'] > 0.4 else 'negative'
-                })
+        for mention in recent['news'].get(member_name, []):
+            recent_mentions.append({
+                'id': len(recent_mentions) + 1,
+                'source': 'news',
+                'title': mention['title'],
+                'snippet': mention['content'][:150] + '...',
+                'url': mention['url'],
+                'date': mention['date'].split()[0],
+                'sentiment': sentiment_label(mention['sentiment'])
+            })
         
         # Add Facebook mentions
-        if data['facebook']:
-            fb_mentions = [post for post in data['facebook'] if post['member'] == member_name]
-            fb_mentions.sort(key=lambda x: x['date'], reverse=True)
-            for mention in fb_mentions[:2]:
-                recent_mentions.append({
-                    'id': len(recent_mentions) + 1,
-                    'source': 'facebook',
-                    'title': f"Facebook post about {mention['topic']}",
-                    'snippet': mention['content'][:150] + '...',
-                    'url': mention['url'],
-                    'date': mention['date'].split()[0],
-                    'sentiment': 'positive' if mention['sentiment'] > 0.6 else 'neutral' if mention['sentiment'] > 0.4 else 'negative'
-                })
+        for mention in recent['facebook'].get(member_name, []):
+            recent_mentions.append({
+                'id': len(recent_mentions) + 1,
+                'source': 'facebook',
+                'title': f"Facebook post about {mention['topic']}",
+                'snippet': mention['content'][:150] + '...',
+                'url': mention['url'],
+                'date': mention['date'].split()[0],
+                'sentiment': sentiment_label(mention['sentiment'])
+            })
         
         # Add Twitter mentions
-        if data['twitter']:
-            twitter_mentions = [tweet for tweet in data['twitter'] if tweet['member'] == member_name]
-            twitter_mentions.sort(key=lambda x: x['date'], reverse=True)
-            for mention in twitter_mentions[:2]:
-                recent_mentions.append({
-                    'id': len(recent_mentions) + 1,
-                    'source': 'twitter',
-                    'title': f"Tweet about {mention['topic']}",
-                    'snippet': mention['content'],
-                    'url': mention['url'],
-                    'date': mention['date'].split()[0],
-                    'sentiment': 'positive' if mention['sentiment'] > 0.6 else 'neutral' if mention['sentiment'] > 0.4 else 'negative'
-                })
+        for mention in recent['twitter'].get(member_name, []):
+            recent_mentions.append({
+                'id': len(recent_mentions) + 1,
+                'source': 'twitter',
+                'title': f"Tweet about {mention['topic']}",
+                'snippet': mention['content'],
+                'url': mention['url'],
+                'date': mention['date'].split()[0],
+                'sentiment': sentiment_label(mention['sentiment'])
+            })
         
         # Sort all mentions by date
         recent_mentions.sort(key=lambda x: x['date'], reverse=True)
@@ -137,7 +137,8 @@ def generate_member_profiles(data):
                 'facebook': mentions['facebook'],
                 'twitter': mentions['twitter']
             },
-            'recentMentions': recent_mentions
+            'recentMentions': recent_mentions,
+            'chart': export.public_url(f"charts/members/{charts.slug(member_name)}.png")
         }
         
         member_profiles.append(profile)
@@ -149,6 +150,27 @@ def generate_member_profiles(data):
     print(f"Generated profiles for {len(member_profiles)} parliament members")
     return member_profiles
 
+# Profile fields only the member detail page shows; the members index leaves them out
+DETAIL_FIELDS = ('recentMentions', 'chart')
+
+def member_datasets(member_profiles, member_insights=None):
+    """Split member profiles into a light `members` index and one `members/<id>` shard per member
+
+    The index carries the list-view fields only, so the members pages
+    stay small; the detail page loads a single shard with the full
+    profile and the member's AI insights, when there are any.
+    """
+    datasets = {'members': [
+        {key: value for key, value in profile.items() if key not in DETAIL_FIELDS}
+        for profile in member_profiles
+    ]}
+    for profile in member_profiles:
+        shard = dict(profile)
+        if member_insights and profile['name'] in member_insights:
+            shard['insights'] = member_insights[profile['name']]
+        datasets[f"members/{profile['id']}"] = shard
+    return datasets
+
 def get_committee_for_member(member_name):
     """Assign a committee to a member based on their name"""
     committees = {
@@ -168,120 +190,110 @@ def get_committee_for_member(member_name):
     
     return "General Committee"
 
+def daily_series(rollup_store, dimensions, days=SERIES_DAYS):
+    """Return {name: {'dates', 'counts', 'sentiment'}} over the last `days` days of the daily rollups
+
+    Counts and sentiment sums of the given dimensions are added up across
+    platforms; sentiment is None on days without mentions.
+    """
+    last_bucket = rollup_store.latest('day')
+    if last_bucket is None:
+        return {}
+    width = rollups.RESOLUTIONS['day']
+    buckets = [last_bucket - (days - 1 - i) * width for i in range(days)]
+    sums = {}
+    for dimension in dimensions:
+        for bucket, name, platform, count, total in rollup_store.query(dimension, 'day', buckets[0], last_bucket):
+            cell = sums.setdefault(name, {}).setdefault(bucket, [0, 0.0])
+            cell[0] += count
+            cell[1] += total
+
+    series = {}
+    for name, by_bucket in sums.items():
+        cells = [by_bucket.get(bucket, [0, 0.0]) for bucket in buckets]
+        series[name] = {
+            'dates': [rollups.bucket_date(bucket)[5:] for bucket in buckets],
+            'counts': [count for count, _ in cells],
+            'sentiment': [round(total / count * 100, 2) if count else None for count, total in cells]
+        }
+    return series
+
 def generate_visualizations(data):
-    """Generate visualizations for the dashboard"""
+    """Generate visualizations for the dashboard
+    
+    Every chart is keyed by a hash of its inputs, so only charts whose data
+    changed are drawn again; see charts.render_charts.
+    """
     print("Generating visualizations...")
+    jobs = []
     
     # 1. Overall sentiment by platform
     if data['sentiment_trends']:
-        plt.figure(figsize=(10, 6))
-        
-        dates = [item['date'] for item in data['sentiment_trends']]
-        overall = [item['overall'] * 100 for item in data['sentiment_trends']]
-        news = [item['news'] * 100 for item in data['sentiment_trends']]
-        facebook = [item['facebook'] * 100 for item in data['sentiment_trends']]
-        twitter = [item['twitter'] * 100 for item in data['sentiment_trends']]
-        
-        plt.plot(dates, overall, 'o-', label='Overall', linewidth=2)
-        plt.plot(dates, news, 's-', label='News')
-        plt.plot(dates, facebook, '^-', label='Facebook')
-        plt.plot(dates, twitter, 'd-', label='Twitter')
-        
-        plt.title('Sentiment Trend by Platform')
-        plt.xlabel('Date')
-        plt.ylabel('Sentiment Score (%)')
-        plt.ylim(30, 80)
-        plt.grid(True, linestyle='--', alpha=0.7)
-        plt.legend()
-        plt.tight_layout()
-        
-        plt.savefig('data/visualizations/sentiment_trend.png')
-        plt.close()
+        jobs.append((os.path.join(charts.CHART_DIR, 'sentiment_trend.png'), charts.sentiment_trend, {
+            'dates': [item['date'] for item in data['sentiment_trends']],
+            'overall': [item['overall'] * 100 for item in data['sentiment_trends']],
+            'news': [item['news'] * 100 for item in data['sentiment_trends']],
+            'facebook': [item['facebook'] * 100 for item in data['sentiment_trends']],
+            'twitter': [item['twitter'] * 100 for item in data['sentiment_trends']]
+        }))
     
     # 2. Member mentions comparison
     if data['member_mentions']:
-        plt.figure(figsize=(12, 8))
-        
         members = list(data['member_mentions'].keys())
         total_mentions = [data['member_mentions'][m]['total'] for m in members]
         sentiment = [data['member_mentions'][m]['sentiment']['overall'] * 100 for m in members]
         
         # Sort by total mentions
         sorted_indices = np.argsort(total_mentions)[::-1]
-        members = [members[i] for i in sorted_indices]
-        total_mentions = [total_mentions[i] for i in sorted_indices]
-        sentiment = [sentiment[i] for i in sorted_indices]
         
         # Use last names only for display
-        display_names = [m.split()[-1] for m in members]
-        
-        fig, ax1 = plt.subplots(figsize=(12, 8))
-        
-        # Plot mentions as bars
-        bars = ax1.barh(display_names, total_mentions, color='skyblue')
-        ax1.set_xlabel('Total Mentions')
-        ax1.set_ylabel('Parliament Member')
-        ax1.set_title('Parliament Members: Mentions and Sentiment')
-        
-        # Plot sentiment as points
-        ax2 = ax1.twiny()
-        ax2.plot(sentiment, display_names, 'ro', markersize=8)
-        ax2.set_xlabel('Sentiment Score (%)')
-        ax2.set_xlim(0, 100)
-        
-        # Add a legend
-        from matplotlib.lines import Line2D
-        legend_elements = [
-            Line2D([0], [0], color='skyblue', lw=4, label='Mentions'),
-            Line2D([0], [0], marker='o', color='r', label='Sentiment', markersize=8, linestyle='None')
-        ]
-        ax1.legend(handles=legend_elements, loc='lower right')
-        
-        plt.tight_layout()
-        plt.savefig('data/visualizations/member_comparison.png')
-        plt.close()
+        jobs.append((os.path.join(charts.CHART_DIR, 'member_comparison.png'), charts.member_comparison, {
+            'names': [members[i].split()[-1] for i in sorted_indices],
+            'mentions': [total_mentions[i] for i in sorted_indices],
+            'sentiment': [sentiment[i] for i in sorted_indices]
+        }))
     
     # 3. Topic distribution
     if data['topic_mentions']:
-        plt.figure(figsize=(10, 8))
-        
         topics = list(data['topic_mentions'].keys())
         counts = [data['topic_mentions'][t]['total'] for t in topics]
         sentiment = [data['topic_mentions'][t]['sentiment']['overall'] for t in topics]
         
         # Sort by count
         sorted_indices = np.argsort(counts)[::-1]
-        topics = [topics[i] for i in sorted_indices]
-        counts = [counts[i] for i in sorted_indices]
-        sentiment = [sentiment[i] for i in sorted_indices]
         
         # Create colors based on sentiment
-        colors = ['green' if s > 0.6 else 'gold' if s > 0.4 else 'red' for s in sentiment]
-        
-        plt.pie(counts, labels=topics, autopct='%1.1f%%', startangle=90, colors=colors)
-        plt.axis('equal')
-        plt.title('Topic Distribution')
-        plt.tight_layout()
-        
-        plt.savefig('data/visualizations/topic_distribution.png')
-        plt.close()
+        jobs.append((os.path.join(charts.CHART_DIR, 'topic_distribution.png'), charts.distribution, {
+            'labels': [topics[i] for i in sorted_indices],
+            'counts': [counts[i] for i in sorted_indices],
+            'colors': ['green' if sentiment[i] > 0.6 else 'gold' if sentiment[i] > 0.4 else 'red'
+                       for i in sorted_indices],
+            'title': 'Topic Distribution',
+            'size': [10, 8]
+        }))
     
     # 4. Platform distribution
     if data['news'] and data['facebook'] and data['twitter']:
-        plt.figure(figsize=(8, 8))
-        
-        platforms = ['News', 'Facebook', 'Twitter']
-        counts = [len(data['news']), len(data['facebook']), len(data['twitter'])]
-        colors = ['#36A2EB', '#9966FF', '#FF9F40']
-        
-        plt.pie(counts, labels=platforms, autopct='%1.1f%%', startangle=90, colors=colors)
-        plt.axis('equal')
-        plt.title('Content Distribution by Platform')
-        plt.tight_layout()
-        
-        plt.savefig('data/visualizations/platform_distribution.png')
-        plt.close()
+        jobs.append((os.path.join(charts.CHART_DIR, 'platform_distribution.png'), charts.distribution, {
+            'labels': ['News', 'Facebook', 'Twitter'],
+            'counts': [len(data['news']), len(data['facebook']), len(data['twitter'])],
+            'colors': ['#36A2EB', '#9966FF', '#FF9F40'],
+            'title': 'Content Distribution by Platform',
+            'size': [8, 8]
+        }))
+    
+    # 5. Daily mentions and sentiment per member and per topic, from the rollups
+    rollup_store = rollups.RollupStore()
+    for kind, dimensions, names in (('members', ('member', 'mention'), data['member_mentions'] or {}),
+                                    ('topics', ('topic',), data['topic_mentions'] or {})):
+        series = daily_series(rollup_store, dimensions)
+        for name in names:
+            if name in series:
+                jobs.append((os.path.join(charts.CHART_DIR, kind, f"{charts.slug(name)}.png"), charts.daily_series,
+                             dict(series[name], title=f"{name}: last {SERIES_DAYS} days")))
+    rollup_store.close()
     
+    charts.render_charts(jobs)
     print("Visualizations generated successfully")
 
 def prepare_dashboard_data():
@@ -291,14 +303,11 @@ def prepare_dashboard_data():
     # Load the data
     data = load_data()
     
-    # Check if data is available
-    if not all([data['news'], data['facebook'], data['twitter']]):
+    # Check if data is available; the store picks up the new files by itself
+    if not data.has_platforms():
         print("Running monitoring script to generate data...")
         import monitor
         monitor.run_monitoring()
-        
-        # Reload the data
-        data = load_data()
     
     # Generate member profiles
     member_profiles = generate_member_profiles(data)
@@ -306,22 +315,19 @@ def prepare_dashboard_data():
     # Generate visualizations
     generate_visualizations(data)
     
-    # Copy data to the dashboard's public directory
-    os.makedirs('public/data', exist_ok=True)
-    
-    # Copy member profiles
-    with open('public/data/members.json', 'w') as f:
-        json.dump(member_profiles, f, indent=2)
-    
-    # Copy sentiment trends
-    if data['sentiment_trends']:
-        with open('public/data/sentiment_trends.json', 'w') as f:
-            json.dump(data['sentiment_trends'], f, indent=2)
-    
-    # Copy alerts
-    if data['alerts']:
-        with open('public/data/alerts.json', 'w') as f:
-            json.dump(data['alerts'], f, indent=2)
+    # Publish the data and the member and topic charts to the dashboard's public
+    # directory as one snapshot, switched to atomically once complete
+    datasets = member_datasets(member_profiles, data['member_insights'])
+    datasets.update({
+        'member_mentions': data['member_mentions'],
+        'topic_mentions': data['topic_mentions'],
+        'sentiment_trends': data['sentiment_trends'],
+        'alerts': data['alerts']
+    })
+    export.publish(datasets, assets={
+        'charts/members': os.path.join(charts.CHART_DIR, 'members'),
+        'charts/topics': os.path.join(charts.CHART_DIR, 'topics')
+    }, replace=('members/',))
     
     print("Dashboard data prepared successfully")
 
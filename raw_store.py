@@ -0,0 +1,150 @@
+import glob
+import json
+import os
+
+from watermarks import CHILD_KEYS, ID_KEYS, SOURCE_KEYS
+
+# Root of the raw store: data/raw/<platform>/<YYYY-MM-DD>.jsonl
+RAW_DIR = 'data/raw'
+
+# Legacy single-array files written by earlier versions of monitor.py
+LEGACY_PATHS = {
+    'news': 'data/news/news_data.json',
+    'facebook': 'data/facebook/facebook_data.json',
+    'twitter': 'data/twitter/twitter_data.json'
+}
+
+# Record kinds per platform: (item kind, child kind)
+KINDS = {
+    'news': ('article', None),
+    'facebook': ('post', 'comment'),
+    'twitter': ('tweet', 'reply')
+}
+
+def platform_dir(platform, root=RAW_DIR):
+    """Return the directory holding a platform's partitions"""
+    return os.path.join(root, platform)
+
+def flatten(platform, items, parents=True):
+    """Yield one flat record per item and per comment or reply
+
+    Children carry their parent's ID and source so they can be stored in the
+    partition of their own date and appended long after the parent. With
+    parents=False only the children are yielded, for items already stored.
+    """
+    item_kind, child_kind = KINDS[platform]
+    child_key = CHILD_KEYS[platform]
+    id_key = ID_KEYS[platform]
+    source_key = SOURCE_KEYS[platform]
+
+    for item in items:
+        if parents:
+            record = {key: value for key, value in item.items() if key != child_key}
+            record['kind'] = item_kind
+            yield record
+        if child_key:
+            for child in item.get(child_key, []):
+                yield dict(child, kind=child_kind, **{id_key: item[id_key], source_key: item[source_key]})
+
+def append(platform, items, parents=True, root=RAW_DIR):
+    """Append items to the date partitions of a platform and return the number of records written"""
+    by_date = {}
+    for record in flatten(platform, items, parents):
+        by_date.setdefault(record['date'][:10], []).append(json.dumps(record, separators=(',', ':')))
+
+    directory = platform_dir(platform, root)
+    os.makedirs(directory, exist_ok=True)
+    written = 0
+    for date, lines in by_date.items():
+        # One write per partition keeps each batch's lines contiguous
+        with open(os.path.join(directory, f"{date}.jsonl"), 'a') as f:
+            f.write('\n'.join(lines) + '\n')
+        written += len(lines)
+    return written
+
+def partitions(platform, start=None, end=None, root=RAW_DIR):
+    """Return the partition paths of a platform, oldest first, limited to [start, end] dates
+
+    start and end are 'YYYY-MM-DD' strings (or longer date strings, which are truncated).
+    """
+    paths = sorted(glob.glob(os.path.join(platform_dir(platform, root), '*.jsonl')))
+    selected = []
+    for path in paths:
+        date = os.path.basename(path)[:-len('.jsonl')]
+        if start and date < start[:10]:
+            continue
+        if end and date > end[:10]:
+            continue
+        selected.append(path)
+    return selected
+
+def has_data(platform, root=RAW_DIR):
+    """Return True if any partition exists for the platform"""
+    return bool(partitions(platform, root=root))
+
+def iter_records(platform, kinds=None, start=None, end=None, root=RAW_DIR):
+    """Stream the records of a platform one at a time
+
+    Only partitions inside [start, end] are opened and only records of the
+    requested kinds are yielded. Corrupt lines are skipped with a warning so a
+    damaged byte costs one record, not the whole history.
+    """
+    for path in partitions(platform, start, end, root):
+        with open(path, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping corrupt record at {path}:{line_number}")
+                    continue
+                if kinds is None or record.get('kind') in kinds:
+                    yield record
+
+def iter_items(platform, start=None, end=None, root=RAW_DIR):
+    """Yield parent items only (articles, posts or tweets), without their children"""
+    yield from iter_records(platform, (KINDS[platform][0],), start, end, root)
+
+def load_items(platform, start=None, end=None, root=RAW_DIR):
+    """Rebuild the nested item list (posts with their comments) for legacy consumers
+
+    This holds every parent in memory; prefer iter_records for large histories.
+    """
+    item_kind, child_kind = KINDS[platform]
+    child_key = CHILD_KEYS[platform]
+    id_key = ID_KEYS[platform]
+    source_key = SOURCE_KEYS[platform]
+
+    items = {}
+    orphans = {}
+    for record in iter_records(platform, None, start, end, root):
+        kind = record.pop('kind', item_kind)
+        if kind == item_kind:
+            if child_key:
+                record[child_key] = orphans.pop(record[id_key], [])
+            items[record[id_key]] = record
+        else:
+            parent_id = record.pop(id_key)
+            record.pop(source_key, None)
+            parent = items.get(parent_id)
+            # Children can be read before their parent when partitions are out of order
+            if parent is None:
+                orphans.setdefault(parent_id, []).append(record)
+            else:
+                parent[child_key].append(record)
+    return list(items.values())
+
+def import_legacy(platform, root=RAW_DIR):
+    """Import a legacy JSON array file into an empty raw store, returning the records written"""
+    path = LEGACY_PATHS[platform]
+    if has_data(platform, root) or not os.path.exists(path):
+        return 0
+    print(f"Importing {path} into the raw store...")
+    try:
+        with open(path, 'r') as f:
+            items = json.load(f)
+    except json.JSONDecodeError:
+        print(f"Could not parse {path}, skipping import")
+        return 0
+    return append(platform, items, root=root)
@@ -0,0 +1,143 @@
+import sqlite3
+from datetime import datetime, timezone
+
+# SQLite file holding the time-bucketed rollups
+ROLLUP_PATH = 'data/rollups.db'
+
+# Bucket widths in seconds per resolution
+RESOLUTIONS = {'hour': 3600, 'day': 86400}
+
+# Hourly buckets older than this (counted back from the newest bucket) are
+# dropped; the daily buckets covering them are kept indefinitely
+HOURLY_RETENTION_DAYS = 14
+
+PLATFORMS = ('news', 'facebook', 'twitter')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    resolution TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    name TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (resolution, dimension, name, platform, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS folded (
+    tbl TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL
+);
+"""
+
+def bucket_date(bucket):
+    """Return the 'YYYY-MM-DD' date of a bucket start (wall-clock epoch seconds)"""
+    return datetime.fromtimestamp(bucket, timezone.utc).strftime("%Y-%m-%d")
+
+def date_bucket(date):
+    """Return the day bucket start of a 'YYYY-MM-DD' date"""
+    return int(datetime.strptime(date[:10], "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+class RollupStore:
+    """Hourly and daily [count, sentiment sum] buckets per dimension, name and platform
+
+    Dimensions match the aggregate state (posts, children, member, topic,
+    mention, likes, shares). Each bucket is one row keyed by resolution,
+    dimension, name, platform and bucket start, so a range query for one
+    series is a single index scan returning one row per bucket.
+    """
+
+    def __init__(self, path=ROLLUP_PATH):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def rows(self):
+        """Return the number of column-store rows already folded in, per table"""
+        return dict(self.db.execute("SELECT tbl, rows FROM folded"))
+
+    def reset(self):
+        """Remove every bucket, ready for a fold from the first row"""
+        with self.db:
+            self.db.execute("DELETE FROM rollups")
+            self.db.execute("DELETE FROM folded")
+
+    def add(self, cells, rows):
+        """Add cells and record the rows they cover, in one transaction
+
+        cells are (dimension, name, platform, bucket start, count, total)
+        tuples at an hour or finer; each one is added to its hourly and its
+        daily bucket.
+        """
+        upsert = """
+            INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (resolution, dimension, name, platform, bucket)
+            DO UPDATE SET count = count + excluded.count, total = total + excluded.total
+        """
+        with self.db:
+            for resolution, width in RESOLUTIONS.items():
+                self.db.executemany(upsert, (
+                    (resolution, dimension, name, platform, bucket // width * width, count, total)
+                    for dimension, name, platform, bucket, count, total in cells
+                ))
+            self.db.executemany("INSERT OR REPLACE INTO folded VALUES (?, ?)", rows.items())
+
+    def downsample(self, retention_days=HOURLY_RETENTION_DAYS):
+        """Drop hourly buckets older than the retention window, returning the number removed"""
+        newest = self.db.execute("SELECT MAX(bucket) FROM rollups WHERE resolution = 'hour'").fetchone()[0]
+        if newest is None:
+            return 0
+        with self.db:
+            cursor = self.db.execute(
+                "DELETE FROM rollups WHERE resolution = 'hour' AND bucket < ?",
+                (newest - retention_days * RESOLUTIONS['day'],)
+            )
+        return cursor.rowcount
+
+    def latest(self, resolution='day'):
+        """Return the newest bucket start at a resolution, or None if the store is empty"""
+        return self.db.execute("SELECT MAX(bucket) FROM rollups WHERE resolution = ?", (resolution,)).fetchone()[0]
+
+    def query(self, dimension, resolution='day', start=None, end=None, name=None, platform=None):
+        """Return (bucket, name, platform, count, total) rows for buckets in [start, end], oldest first"""
+        sql = "SELECT bucket, name, platform, count, total FROM rollups WHERE resolution = ? AND dimension = ?"
+        params = [resolution, dimension]
+        for column, value in (('name', name), ('platform', platform)):
+            if value is not None:
+                sql += f" AND {column} = ?"
+                params.append(value)
+        if start is not None:
+            sql += " AND bucket >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND bucket <= ?"
+            params.append(end)
+        return self.db.execute(sql + " ORDER BY bucket", params).fetchall()
+
+    def platform_trends(self, start=None, end=None, resolution='day'):
+        """Return per-bucket platform sentiment, newest bucket first
+
+        A platform's sentiment is its post mean, averaged with its comment or
+        reply mean where it has those, as in monitor.analyze_sentiment.
+        Overall is the mean of the platforms with data in the bucket.
+        """
+        means = {}
+        for dimension in ('posts', 'children'):
+            for bucket, _, platform, count, total in self.query(dimension, resolution, start, end, name=''):
+                if count:
+                    means.setdefault(bucket, {}).setdefault(platform, []).append(total / count)
+
+        trends = []
+        for bucket in sorted(means, reverse=True):
+            point = {'bucket': bucket, 'date': bucket_date(bucket)}
+            platforms = means[bucket]
+            for platform in PLATFORMS:
+                if platform in platforms:
+                    point[platform] = sum(platforms[platform]) / len(platforms[platform])
+            available = [point[platform] for platform in PLATFORMS if platform in point]
+            point['overall'] = sum(available) / len(available)
+            trends.append(point)
+        return trends
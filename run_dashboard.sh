@@ -5,11 +5,11 @@
 echo "Setting up Parliament of Mongolia Social Media Monitoring Dashboard..."
 
 # Create necessary directories
-mkdir -p data/news data/facebook data/twitter data/visualizations public/data
+mkdir -p data/raw data/visualizations public/data
 
 # Install required Python packages
 echo "Installing Python dependencies..."
-pip install pandas matplotlib numpy requests
+pip install pandas matplotlib numpy aiohttp brotli
 
 # Run the monitoring script to generate initial data
 echo "Running monitoring script to collect initial data..."
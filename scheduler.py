@@ -0,0 +1,289 @@
+import argparse
+import heapq
+import json
+import os
+import time
+from collections import Counter, deque
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# Where the per-source schedule is kept between runs
+SCHEDULE_PATH = 'data/crawl_schedule.json'
+
+# JSON Lines log of every scheduling decision
+DECISIONS_PATH = 'data/crawl_decisions.jsonl'
+
+# Scheduling policy; all times are in seconds
+DEFAULT_POLICY = {
+    'base_interval': 900,       # poll interval of a source with no known activity
+    'min_interval': 120,        # busiest sources are never polled more often than this
+    'max_interval': 6 * 3600,   # idle sources back off to at most this
+    'backoff': 2.0,             # interval growth after a poll with nothing new (or a failure)
+    'activity_decay': 0.3,      # weight of the latest poll in the activity average
+    'alert_boost': 4.0,         # poll-rate multiplier for sources about members with open alerts
+    'host_min_interval': 1.0,   # gap between two requests to the same host
+    'host_budget': 60,          # requests per host per budget window
+    'budget_window': 60,
+    'batch_horizon': 60         # requests are only scheduled this far ahead of now
+}
+
+# Decisions kept in memory for inspection
+MAX_DECISIONS = 10000
+
+class SystemClock:
+    """Wall-clock time"""
+
+    def now(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        time.sleep(max(seconds, 0))
+
+class SimulatedClock:
+    """A clock that only moves when told to, for tests and simulations"""
+
+    def __init__(self, start=0.0):
+        self.current = float(start)
+
+    def now(self):
+        return self.current
+
+    def sleep(self, seconds):
+        self.current += max(seconds, 0)
+
+def source_host(source):
+    """Return the host a source's politeness budget is charged to: its 'host', else its URL's host"""
+    return source.get('host') or urlsplit(source.get('url', '')).netloc or source['platform']
+
+class CrawlScheduler:
+    """Decide which sources to poll and when, politely
+
+    Each source has its own poll interval, shortened by recent activity and
+    by open alerts about the members it covers, and lengthened after empty
+    polls. Each host gets a request budget per window and a minimum gap
+    between requests; requests that fit are given a start delay, the rest
+    wait for a later batch. Every decision is recorded with its reason.
+    """
+
+    def __init__(self, sources, clock=None, policy=None, state=None):
+        self.clock = clock or SystemClock()
+        self.policy = dict(DEFAULT_POLICY, **(policy or {}))
+        self.sources = {source['name']: source for source in sources}
+        self.state = {}
+        self.hosts = {}
+        self.decisions = deque(maxlen=MAX_DECISIONS)
+        self.counts = Counter()
+        self.alert_members = set()
+        # (due, name) heap; entries whose due time changed since are skipped when popped
+        self.queue = []
+
+        state = state or {}
+        for name in self.sources:
+            self.state[name] = dict({
+                'interval': self.policy['base_interval'], 'due': 0.0, 'activity': 0.0,
+                'members': [], 'polls': 0, 'empty_polls': 0
+            }, **state.get(name, {}))
+            self.queue.append((self.state[name]['due'], name))
+        heapq.heapify(self.queue)
+
+    def _host(self, host):
+        if host not in self.hosts:
+            self.hosts[host] = {'requests': deque(), 'next_free': 0.0}
+        return self.hosts[host]
+
+    def _decide(self, name, action, reason, **details):
+        decision = dict({'time': self.clock.now(), 'source': name, 'action': action, 'reason': reason}, **details)
+        self.decisions.append(decision)
+        self.counts[f"{action}:{reason}"] += 1
+        return decision
+
+    def _schedule(self, name, due):
+        self.state[name]['due'] = due
+        heapq.heappush(self.queue, (due, name))
+
+    def boost(self, name):
+        """Return the alert multiplier of a source"""
+        members = self.state[name]['members']
+        if self.alert_members and any(member in self.alert_members for member in members):
+            return self.policy['alert_boost']
+        return 1.0
+
+    def priority(self, name, now):
+        """Rank due sources: active, alert-relevant and long-overdue sources come first"""
+        entry = self.state[name]
+        overdue = max(now - entry['due'], 0) / entry['interval']
+        return (1 + entry['activity']) * self.boost(name) * (1 + overdue)
+
+    def next_due(self):
+        """Return the earliest time any source is due"""
+        while self.queue and self.queue[0][0] != self.state[self.queue[0][1]]['due']:
+            heapq.heappop(self.queue)
+        return self.queue[0][0] if self.queue else None
+
+    def next_batch(self, limit=None):
+        """Return the sources to fetch now, each with a 'delay' in seconds before its request
+
+        Sources are taken in priority order. A source whose host has used up
+        its budget, or whose turn on the host falls beyond the batch horizon,
+        is deferred to a later batch.
+        """
+        now = self.clock.now()
+        policy = self.policy
+        due = {}
+        while self.queue and self.queue[0][0] <= now:
+            when, name = heapq.heappop(self.queue)
+            if when == self.state[name]['due']:
+                due[name] = True
+        due = list(due)
+        due.sort(key=lambda name: self.priority(name, now), reverse=True)
+
+        batch = []
+        for name in due:
+            source = self.sources[name]
+            host = self._host(source_host(source))
+            requests = host['requests']
+            while requests and requests[0] <= now - policy['budget_window']:
+                requests.popleft()
+
+            priority = self.priority(name, now)
+            # Deferred sources stay due and are offered again in the next batch
+            if limit is not None and len(batch) >= limit:
+                self._decide(name, 'defer', 'batch-limit', priority=priority)
+                heapq.heappush(self.queue, (self.state[name]['due'], name))
+                continue
+            if len(requests) >= policy['host_budget']:
+                self._decide(name, 'defer', 'host-budget', priority=priority, host=source_host(source))
+                heapq.heappush(self.queue, (self.state[name]['due'], name))
+                continue
+            start = max(now, host['next_free'])
+            if start > now + policy['batch_horizon']:
+                self._decide(name, 'defer', 'host-interval', priority=priority, host=source_host(source))
+                heapq.heappush(self.queue, (self.state[name]['due'], name))
+                continue
+
+            host['next_free'] = start + policy['host_min_interval']
+            requests.append(start)
+            # It stays queued at its current due time until record() reschedules it, so a poll
+            # that fails before being recorded is offered again in the next batch
+            self._decide(name, 'poll', 'due', priority=priority, delay=start - now, host=source_host(source))
+            heapq.heappush(self.queue, (self.state[name]['due'], name))
+            batch.append(dict(source, delay=start - now))
+        return batch
+
+    def record(self, name, new_records, members=(), failed=False):
+        """Reschedule a source after a poll that returned new_records (or failed)"""
+        policy = self.policy
+        entry = self.state[name]
+        entry['polls'] += 1
+        entry['activity'] = (1 - policy['activity_decay']) * entry['activity'] + policy['activity_decay'] * new_records
+        if members:
+            entry['members'] = sorted(set(members))
+
+        if failed or not new_records:
+            entry['empty_polls'] += 1
+            interval = min(entry['interval'] * policy['backoff'], policy['max_interval'])
+            reason = 'failed' if failed else 'idle'
+        else:
+            entry['empty_polls'] = 0
+            interval = policy['base_interval'] / ((1 + entry['activity']) * self.boost(name))
+            reason = 'active'
+        entry['interval'] = max(policy['min_interval'], min(interval, policy['max_interval']))
+        self._schedule(name, self.clock.now() + entry['interval'])
+        self._decide(name, 'reschedule', reason, interval=entry['interval'], activity=entry['activity'])
+
+    def apply_alerts(self, members):
+        """Prioritise sources covering members with open alerts, pulling their next poll forward"""
+        self.alert_members = set(members)
+        now = self.clock.now()
+        for name, entry in self.state.items():
+            boost = self.boost(name)
+            if boost > 1:
+                due = min(entry['due'], now + entry['interval'] / boost)
+                if due < entry['due']:
+                    self._schedule(name, due)
+                    self._decide(name, 'expedite', 'alert', due=due)
+
+    def summary(self):
+        """Return decision counts by action and reason since the scheduler started"""
+        return dict(self.counts)
+
+    def write_decisions(self, path):
+        """Append the recorded decisions to a JSON Lines log and clear them"""
+        with open(path, 'a') as f:
+            for decision in self.decisions:
+                f.write(json.dumps(decision, separators=(',', ':')) + '\n')
+        self.decisions.clear()
+
+def load_schedule(path=SCHEDULE_PATH):
+    """Load the saved per-source schedule state"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_schedule(scheduler, path=SCHEDULE_PATH):
+    """Save the per-source schedule state, replacing the previous file atomically"""
+    with open(path + '.tmp', 'w') as f:
+        json.dump(scheduler.state, f)
+    os.replace(path + '.tmp', path)
+
+def simulate(num_sources=5000, num_hosts=50, hours=24, seed=0, policy=None):
+    """Run the scheduler against fake sources with known posting rates on a simulated clock
+
+    Rates are heavy-tailed, so a few sources are busy and most are nearly
+    idle. Returns the scheduler and per-source (rate, polls) arrays.
+    """
+    rng = np.random.default_rng(seed)
+    rates = rng.pareto(1.5, num_sources) * 0.5 / 3600  # new items per second
+    sources = [
+        {'name': f"page_{i}", 'platform': 'facebook', 'host': f"host{i % num_hosts}.example"}
+        for i in range(num_sources)
+    ]
+    clock = SimulatedClock()
+    scheduler = CrawlScheduler(sources, clock, policy)
+    last_poll = np.zeros(num_sources)
+    polls = np.zeros(num_sources, dtype='int64')
+    host_requests = Counter()
+
+    end = hours * 3600
+    while clock.now() < end:
+        for source in scheduler.next_batch():
+            index = int(source['name'][5:])
+            at = clock.now() + source['delay']
+            host_requests[(source['host'], int(at // scheduler.policy['budget_window']))] += 1
+            new_records = rng.poisson(rates[index] * (at - last_poll[index]))
+            last_poll[index] = at
+            polls[index] += 1
+            scheduler.record(source['name'], int(new_records))
+        # Jump to the next moment something can happen
+        wake = scheduler.next_due()
+        clock.sleep(max(min(wake, clock.now() + scheduler.policy['batch_horizon']) - clock.now(), 1.0))
+
+    scheduler.max_host_rate = max(host_requests.values(), default=0)
+    return scheduler, rates, polls
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the crawl scheduler on fake sources")
+    parser.add_argument('--sources', type=int, default=5000)
+    parser.add_argument('--hosts', type=int, default=50)
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    scheduler, rates, polls = simulate(args.sources, args.hosts, args.hours, args.seed)
+    elapsed = time.perf_counter() - started
+
+    order = np.argsort(rates)
+    tenth = max(len(order) // 10, 1)
+    print(f"Simulated {args.hours:g}h of {args.sources} sources on {args.hosts} hosts in {elapsed:.1f}s")
+    print(f"Polls: {polls.sum()} total, busiest 10% of sources {polls[order[-tenth:]].mean():.1f} each, "
+          f"quietest 10% {polls[order[:tenth]].mean():.1f} each")
+    print(f"Most requests to one host in a {scheduler.policy['budget_window']}s window: {scheduler.max_host_rate} "
+          f"(budget {scheduler.policy['host_budget']})")
+    for decision, count in sorted(scheduler.summary().items()):
+        print(f"  {decision}: {count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import hashlib
+import sqlite3
+
+# SQLite file holding the sentiment scores of every text scored so far
+SENTIMENT_CACHE_PATH = 'data/sentiment_cache.db'
+
+# Keys looked up per SQLite query
+LOOKUP_BATCH = 500
+
+# VADER's result fields, in the order polarity_scores returns them
+FIELDS = ('neg', 'neu', 'pos', 'compound')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    key BLOB PRIMARY KEY,
+    neg REAL NOT NULL,
+    neu REAL NOT NULL,
+    pos REAL NOT NULL,
+    compound REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+def normalize_text(text):
+    """Collapse runs of whitespace
+
+    VADER reacts to case, punctuation and emoticons, so this is the only
+    normalization that cannot change a score.
+    """
+    return ' '.join(text.split())
+
+def text_key(text, version):
+    """Return the cache key of a text scored by the given scorer version"""
+    payload = f"{version}\x1f{normalize_text(text)}".encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+class SentimentCache:
+    """Persistent sentiment scores keyed by a hash of the normalized text and the scorer version
+
+    A scorer whose version changed (another NLTK release or lexicon) finds
+    none of the old scores, so every text is scored again.
+    """
+
+    def __init__(self, version, path=SENTIMENT_CACHE_PATH):
+        self.version = version
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def lookup(self, keys):
+        """Return {key: scores} for the keys that are stored"""
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), LOOKUP_BATCH):
+            batch = keys[start:start + LOOKUP_BATCH]
+            query = f"SELECT key, {', '.join(FIELDS)} FROM scores WHERE key IN ({', '.join('?' * len(batch))})"
+            for key, *values in self.db.execute(query, batch):
+                found[key] = dict(zip(FIELDS, values))
+        return found
+
+    def store(self, scores):
+        """Store {key: scores} in one transaction"""
+        with self.db:
+            self.db.executemany(
+                f"INSERT OR REPLACE INTO scores VALUES (?, {', '.join('?' * len(FIELDS))})",
+                [(key, *(score[field] for field in FIELDS)) for key, score in scores.items()]
+            )
+
+    def score(self, texts, scorer, batch=False):
+        """Return the scores of texts, in order, calling scorer(text) only for texts never scored before
+
+        With batch=True the scorer is called once, with the list of texts
+        never scored before, and returns their scores in order. Duplicates
+        within texts are scored once. Every returned dict is a separate
+        copy, so callers may change them.
+        """
+        keys = [text_key(text, self.version) for text in texts]
+        found = self.lookup(set(keys))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if batch:
+            scored = dict(zip(missing, scorer(list(missing.values())))) if missing else {}
+        else:
+            scored = {key: scorer(text) for key, text in missing.items()}
+        if scored:
+            self.store(scored)
+            found.update(scored)
+
+        print(f"Sentiment scores: {len(texts) - len(missing)} cached, {len(missing)} computed")
+        return [dict(found[key]) for key in keys]
@@ -0,0 +1,36 @@
+// Dashboard data is published as snapshots under content-hashed file names
+// (see export.py). /data/current always points at a complete snapshot; its
+// small manifest is fetched first, always revalidated, and tells which file
+// holds each dataset. The hashed files never change, so the browser can cache
+// them indefinitely and only downloads datasets whose content changed.
+
+const DATA_ROOT = '/data/';
+const SNAPSHOT_ROOT = `${DATA_ROOT}current/`;
+
+let manifestPromise = null;
+
+const loadManifest = () => {
+  if (!manifestPromise) {
+    manifestPromise = fetch(`${SNAPSHOT_ROOT}manifest.json`, { cache: 'no-cache' })
+      .then(response => (response.ok ? response.json() : { files: {} }))
+      .catch(error => {
+        // Try again on the next request instead of caching the failure
+        manifestPromise = null;
+        throw error;
+      });
+  }
+  return manifestPromise;
+};
+
+// Fetch a dataset by name and return the fetch Response. Without a manifest
+// entry (e.g. before the first export) the plain <name>.json file is used.
+export const fetchDataset = async (name) => {
+  let entry;
+  try {
+    const manifest = await loadManifest();
+    entry = manifest.files[name];
+  } catch (error) {
+    console.error('Error loading data manifest:', error);
+  }
+  return fetch(entry ? `${SNAPSHOT_ROOT}${entry.path}` : `${DATA_ROOT}${name}.json`);
+};
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Container, Row, Col, Card, Form, Button, ListGroup, Badge } from 'react-bootstrap';
+import { fetchDataset } from '../dataClient';
 
 const translations = {
   en: {
@@ -77,7 +78,7 @@ const AIInsights = ({ language }) => {
         setIsLoading(true);
         
         // Load member profiles to get the list of members
-        const membersResponse = await fetch('./data/members.json');
+        const membersResponse = await fetchDataset('members');
         if (membersResponse.ok) {
           const membersData = await membersResponse.json();
           setMembers(membersData);
@@ -90,7 +91,7 @@ const AIInsights = ({ language }) => {
         
         // Load member insights
         try {
-          const insightsResponse = await fetch('./data/member_insights.json');
+          const insightsResponse = await fetchDataset('member_insights');
           if (insightsResponse.ok) {
             const insightsData = await insightsResponse.json();
             setMemberInsights(insightsData);
@@ -101,7 +102,7 @@ const AIInsights = ({ language }) => {
         
         // Load topic analysis
         try {
-          const topicsResponse = await fetch('./data/ai_topics.json');
+          const topicsResponse = await fetchDataset('ai_topics');
           if (topicsResponse.ok) {
             const topicsData = await topicsResponse.json();
             setTopics(topicsData);
@@ -112,7 +113,7 @@ const AIInsights = ({ language }) => {
         
         // Load network data
         try {
-          const networkResponse = await fetch('./data/entity_network.json');
+          const networkResponse = await fetchDataset('entity_network');
           if (networkResponse.ok) {
             const networkData = await networkResponse.json();
             setNetworkData(networkData);
@@ -123,7 +124,7 @@ const AIInsights = ({ language }) => {
         
         // Load sentiment predictions
         try {
-          const predictionsResponse = await fetch('./data/sentiment_predictions.json');
+          const predictionsResponse = await fetchDataset('sentiment_predictions');
           if (predictionsResponse.ok) {
             const predictionsData = await predictionsResponse.json();
             setPredictions(predictionsData);
@@ -134,7 +135,7 @@ const AIInsights = ({ language }) => {
         
         // Load chatbot data
         try {
-          const chatbotResponse = await fetch('./data/chatbot_data.json');
+          const chatbotResponse = await fetchDataset('chatbot_data');
           if (chatbotResponse.ok) {
             const chatbotData = await chatbotResponse.json();
             setChatbotData(chatbotData);
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Container, Row, Col, Card, Badge, ListGroup, Button, Form } from 'react-bootstrap';
 import { Link } from 'react-router-dom';
+import { fetchDataset } from '../dataClient';
 
 const translations = {
   en: {
@@ -64,7 +65,7 @@ const Alerts = ({ language }) => {
       try {
         // Simulate API call with setTimeout
         setTimeout(() => {
-          fetch('./data/alerts.json')
+          fetchDataset('alerts')
             .then(response => response.json())
             .then(data => {
               setAlerts(data);
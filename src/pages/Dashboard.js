@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Container, Row, Col, Card, Badge, ListGroup, Button } from 'react-bootstrap';
 import { Line, Bar, Pie } from 'react-chartjs-2';
 import { Chart, registerables } from 'chart.js';
+import { fetchDataset } from '../dataClient';
 
 // Register Chart.js components
 Chart.register(...registerables);
@@ -72,7 +73,7 @@ const Dashboard = ({ language }) => {
         
         // Fetch sentiment trends
         try {
-          const sentimentResponse = await fetch('./data/sentiment_trends.json');
+          const sentimentResponse = await fetchDataset('sentiment_trends');
           if (sentimentResponse.ok) {
             const sentimentData = await sentimentResponse.json();
             setSentimentData(sentimentData);
@@ -87,7 +88,7 @@ const Dashboard = ({ language }) => {
         
         // Fetch member mentions
         try {
-          const memberResponse = await fetch('./data/member_mentions.json');
+          const memberResponse = await fetchDataset('member_mentions');
           if (memberResponse.ok) {
             const memberData = await memberResponse.json();
             setMemberData(memberData);
@@ -102,7 +103,7 @@ const Dashboard = ({ language }) => {
         
         // Fetch topic mentions
         try {
-          const topicResponse = await fetch('./data/topic_mentions.json');
+          const topicResponse = await fetchDataset('topic_mentions');
           if (topicResponse.ok) {
             const topicData = await topicResponse.json();
             setTopicData(topicData);
@@ -117,7 +118,7 @@ const Dashboard = ({ language }) => {
         
         // Fetch alerts
         try {
-          const alertResponse = await fetch('./data/alerts.json');
+          const alertResponse = await fetchDataset('alerts');
           if (alertResponse.ok) {
             const alertData = await alertResponse.json();
             setAlertData(alertData);
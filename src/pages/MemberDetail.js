@@ -3,6 +3,7 @@ import { Container, Row, Col, Card, Badge, ListGroup, Button } from 'react-boots
 import { useParams, Link } from 'react-router-dom';
 import { Line } from 'react-chartjs-2';
 import { Chart, registerables } from 'chart.js';
+import { fetchDataset } from '../dataClient';
 
 Chart.register(...registerables);
 
@@ -26,6 +27,8 @@ const translations = {
     sentiment: 'Sentiment',
     view: 'View',
     sentimentTrend: 'Sentiment Trend (Last 7 Days)',
+    dailyMentions: 'Daily Mentions and Sentiment (Last 30 Days)',
+    insights: 'AI Insights',
     notFound: 'Member not found'
   },
   mn: {
@@ -47,6 +50,8 @@ const translations = {
     sentiment: 'Хандлага',
     view: 'Харах',
     sentimentTrend: 'Хандлагын чиг хандлага (Сүүлийн 7 хоног)',
+    dailyMentions: 'Өдөр тутмын дурдалт ба хандлага (Сүүлийн 30 хоног)',
+    insights: 'AI дүгнэлт',
     notFound: 'Гишүүн олдсонгүй'
   }
 };
@@ -63,11 +68,11 @@ const MemberDetail = ({ language }) => {
       try {
         // Simulate API call with setTimeout
         setTimeout(() => {
-          fetch('/data/members.json')
-            .then(response => response.json())
+          // Only this member's shard is loaded, not the whole members list
+          fetchDataset(`members/${parseInt(id)}`)
+            .then(response => (response.ok ? response.json() : null))
             .then(data => {
-              const foundMember = data.find(m => m.id === parseInt(id));
-              setMember(foundMember || null);
+              setMember(data);
               setIsLoading(false);
             });
         }, 500);
@@ -270,6 +275,33 @@ const MemberDetail = ({ language }) => {
             </Card.Body>
           </Card>
           
+          {member.chart && (
+            <Card className="mb-4">
+              <Card.Header>{t.dailyMentions}</Card.Header>
+              <Card.Body className="text-center">
+                <img
+                  src={member.chart}
+                  alt={`${member.name}: ${t.dailyMentions}`}
+                  className="img-fluid"
+                  onError={(e) => {e.target.style.display = 'none'}}
+                />
+              </Card.Body>
+            </Card>
+          )}
+          
+          {member.insights && member.insights.insights.length > 0 && (
+            <Card className="mb-4">
+              <Card.Header>{t.insights}</Card.Header>
+              <Card.Body>
+                <ListGroup variant="flush">
+                  {member.insights.insights.map((insight, index) => (
+                    <ListGroup.Item key={index}>{insight}</ListGroup.Item>
+                  ))}
+                </ListGroup>
+              </Card.Body>
+            </Card>
+          )}
+          
           <Card>
             <Card.Header>{t.recentMentions}</Card.Header>
             <Card.Body>
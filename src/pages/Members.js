@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Container, Row, Col, Card, Form, InputGroup, Table, Badge } from 'react-bootstrap';
 import { Link } from 'react-router-dom';
+import { fetchDataset } from '../dataClient';
 
 const translations = {
   en: {
@@ -55,7 +56,7 @@ const Members = ({ language }) => {
       try {
         // Simulate API call with setTimeout
         setTimeout(() => {
-          fetch('./data/members.json')
+          fetchDataset('members')
             .then(response => response.json())
             .then(data => {
               setMembers(data);
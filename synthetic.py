@@ -0,0 +1,393 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Seed used when the caller does not pass one, so mock runs are reproducible
+DEFAULT_SEED = 42
+
+# List of mock news sites
+NEWS_SITES = [
+    "UBPost", "Montsame", "GoGo.mn", "News.mn", "Ikon.mn",
+    "Unuudur", "Zuunii Medee", "Daily News", "The UB Times", "Mongolia Today",
+    "Eagle News", "Mongolian Economy", "Business Mongolia", "Mining Mongolia", "Politics Mongolia",
+    "Sports Mongolia", "Tech Mongolia", "Health Mongolia", "Education Mongolia", "Environment Mongolia",
+    "Finance Mongolia", "Tourism Mongolia", "Culture Mongolia", "Agriculture Mongolia", "Energy Mongolia",
+    "Infrastructure Mongolia", "Foreign Affairs Mongolia", "Legal Mongolia", "Social Mongolia", "Regional Mongolia"
+]
+
+# List of parliament members
+MEMBERS = [
+    "Dashzegve AMARBAYASGALAN", "Khurelbaatar BULGANTUYA", "NOROV ALTANKHUYAG",
+    "SAINBUYAN AMARSAIKHAN", "TELUKHAN AUBAKIR", "ENKHTAIVAN BAT-AMGALAN",
+    "Jadamba BAT-ERDENE", "JIGJID BATJARGAL"
+]
+
+# List of topics
+TOPICS = [
+    "Economic Policy", "Healthcare Reform", "Environmental Protection", "Foreign Relations",
+    "Budget Debate", "Education Reform", "Digital Transformation", "Cultural Heritage"
+]
+
+# Salts that give every platform its own random stream for the same seed and day
+PLATFORM_SALTS = {'news': 1, 'facebook': 2, 'twitter': 3}
+
+# Comments and replies arrive up to this many seconds after their post
+COMMENT_LAG = 12 * 3600
+
+# Default scale, matching the volumes of the original mock fetchers
+DEFAULT_SCALE = {
+    'news_sites': len(NEWS_SITES),
+    'posts_per_site': 10,
+    'facebook_pages': 130,
+    'posts_per_page': 10,
+    'comments_per_post': 100,
+    'twitter_accounts': 10,
+    'tweets_per_account': 10,
+    'replies_per_tweet': 20,
+    'days': 1
+}
+
+def facebook_page_names(count):
+    """Return the mock Facebook page names"""
+    return [f"Mongolia_Page_{i}" for i in range(1, count + 1)]
+
+def twitter_account_names(count):
+    """Return the mock Twitter account names"""
+    return [f"Mongolia_Account_{i}" for i in range(1, count + 1)]
+
+def news_site_names(count):
+    """Return the mock news site names, cycling the known sites for larger scales"""
+    names = []
+    for i in range(count):
+        site = NEWS_SITES[i % len(NEWS_SITES)]
+        names.append(site if i < len(NEWS_SITES) else f"{site} {i // len(NEWS_SITES) + 1}")
+    return names
+
+def _resolve_span(days, end, start=None):
+    """Return the (start, end) epoch seconds of the generated date span"""
+    if end is None:
+        end = datetime.now()
+    end_ts = int(end.timestamp())
+    if start is not None:
+        return int(start.timestamp()), end_ts
+    return end_ts - int(days * 86400), end_ts
+
+def _day_rng(seed, platform, day):
+    """Random generator for one platform and one calendar day (days since the epoch)"""
+    return np.random.default_rng([seed, PLATFORM_SALTS[platform], day])
+
+def _format_dates(ts):
+    """Format an array of epoch seconds as local 'YYYY-MM-DD HH:MM:SS' strings"""
+    if len(ts) == 0:
+        return []
+    # Shift to local wall-clock time, then format the whole column in NumPy. UTC offsets
+    # change on quarter hours at most (DST), so each quarter hour's offset is looked up once.
+    ts = np.asarray(ts)
+    quarters, inverse = np.unique(ts // 900, return_inverse=True)
+    offsets = np.array([int(datetime.fromtimestamp(quarter * 900).astimezone().utcoffset().total_seconds())
+                        for quarter in quarters.tolist()])
+    stamps = np.datetime_as_string((ts + offsets[inverse.ravel()]).astype('datetime64[s]'))
+    return np.char.replace(stamps, 'T', ' ').tolist()
+
+def _sample_posts(seed, platform, num_sources, rate_per_day, start, end, lookback=0):
+    """Sample post columns for every source inside [start, end)
+
+    Posts are drawn per calendar day from a generator keyed by (seed, platform,
+    day) and then filtered, so any window over the same seed sees the same posts.
+    A lookback also samples the earlier days whose posts may still get comments.
+    """
+    blocks = []
+    for day in range((start - lookback) // 86400, (end - 1) // 86400 + 1):
+        rng = _day_rng(seed, platform, day)
+        counts = rng.poisson(rate_per_day, num_sources)
+        n = int(counts.sum())
+        block = {
+            'rng': rng,
+            'source': np.repeat(np.arange(num_sources), counts),
+            'ts_ms': day * 86400000 + rng.integers(0, 86400000, n),
+            'member': rng.integers(0, len(MEMBERS), n),
+            'topic': rng.integers(0, len(TOPICS), n),
+            'sentiment': rng.integers(0, 100, n) / 100
+        }
+        block['keep'] = (block['ts_ms'] >= start * 1000) & (block['ts_ms'] < end * 1000)
+        blocks.append(block)
+    return blocks
+
+def _sample_children(block, mean_children, max_likes, start, end, include_updates=False):
+    """Sample comment/reply columns for the posts of one day block
+
+    With include_updates, children written inside [start, end) on posts from
+    before the window are kept too, and their posts are marked for output.
+    """
+    rng = block['rng']
+    n = len(block['ts_ms'])
+    low = max(0, int(mean_children * 0.9))
+    high = max(low + 1, int(mean_children * 1.1))
+    counts = rng.integers(low, high, n)
+    parent = np.repeat(np.arange(n), counts)
+    # Position of every child within its parent, used for stable child IDs
+    position = np.arange(len(parent)) - np.repeat(np.cumsum(counts) - counts, counts)
+    ts = block['ts_ms'][parent] // 1000 + rng.integers(0, COMMENT_LAG, len(parent))
+    children = {
+        'parent': parent,
+        'position': position,
+        'ts': ts,
+        'sentiment': rng.integers(0, 100, len(parent)) / 100,
+        'likes': rng.integers(0, max_likes, len(parent))
+    }
+    # Keep children of kept posts that have already been written
+    keep = block['keep'][parent] & (ts < end)
+    if include_updates:
+        keep |= (ts >= start) & (ts < end) & (block['ts_ms'][parent] < end * 1000)
+        block['keep'] = block['keep'].copy()
+        block['keep'][parent[keep]] = True
+    return {key: value[keep] for key, value in children.items()}
+
+def generate_news(seed=DEFAULT_SEED, sites=None, posts_per_site=10, days=1, end=None, start=None):
+    """Generate a deterministic list of mock news items
+
+    posts_per_site is spread over `days`; the window defaults to the last `days`
+    before end but can be narrowed with an explicit start.
+    """
+    sites = sites or NEWS_SITES
+    start, end = _resolve_span(days, end, start)
+    news_data = []
+
+    for block in _sample_posts(seed, 'news', len(sites), posts_per_site / days, start, end):
+        keep = block['keep']
+        ts_ms = block['ts_ms'][keep]
+        dates = _format_dates(ts_ms // 1000)
+        for source, ms, date, m, t, sentiment in zip(block['source'][keep].tolist(), ts_ms.tolist(), dates,
+                                                     block['member'][keep].tolist(), block['topic'][keep].tolist(),
+                                                     block['sentiment'][keep].tolist()):
+            site = sites[source]
+            news_data.append({
+                "site": site,
+                "title": f"{TOPICS[t]} discussion in Parliament",
+                "content": f"The Parliament member {MEMBERS[m]} discussed {TOPICS[t]} during the session. The discussion focused on various aspects of the policy and its implementation.",
+                "url": f"https://{site.lower().replace(' ', '')}.mn/news/{ms}",
+                "date": date,
+                "member": MEMBERS[m],
+                "topic": TOPICS[t],
+                "sentiment": sentiment
+            })
+
+    return news_data
+
+def _comment_texts():
+    """Precompute comment texts indexed by [member, topic, positive]"""
+    texts = {}
+    for m, member in enumerate(MEMBERS):
+        for t, topic in enumerate(TOPICS):
+            texts[(m, t, 0)] = f"I disagree with {member}'s position on {topic}. This needs more consideration."
+            texts[(m, t, 1)] = f"I agree with {member}'s position on {topic}. This is good for Mongolia."
+    return texts
+
+def _reply_texts():
+    """Precompute reply texts indexed by [member, topic, tone]"""
+    texts = {}
+    for m, member in enumerate(MEMBERS):
+        for t, topic in enumerate(TOPICS):
+            texts[(m, t, 0)] = f"I question {member}'s stance on {topic}. Completely disagree."
+            texts[(m, t, 1)] = f"I question {member}'s stance on {topic}. Needs improvement."
+            texts[(m, t, 2)] = f"I support {member}'s stance on {topic}. Needs improvement."
+            texts[(m, t, 3)] = f"I support {member}'s stance on {topic}. Good initiative!"
+    return texts
+
+def generate_facebook(seed=DEFAULT_SEED, pages=130, posts_per_page=10, comments_per_post=100, days=1, end=None,
+                      start=None, include_updates=False):
+    """Generate a deterministic list of mock Facebook posts with nested comments
+
+    With include_updates, posts from before the window that received comments
+    inside it are returned too, carrying only those new comments.
+    """
+    page_names = facebook_page_names(pages)
+    start, end = _resolve_span(days, end, start)
+    lookback = COMMENT_LAG if include_updates else 0
+    comment_texts = _comment_texts()
+    facebook_data = []
+
+    for block in _sample_posts(seed, 'facebook', pages, posts_per_page / days, start, end, lookback):
+        rng = block['rng']
+        n = len(block['ts_ms'])
+        likes = rng.integers(0, 500, n)
+        shares = rng.integers(0, 100, n)
+        children = _sample_children(block, comments_per_post, 50, start, end, include_updates)
+
+        # Materialise posts, then attach comments in one pass over the child columns
+        posts = {}
+        post_dates = _format_dates(block['ts_ms'] // 1000)
+        for i in np.flatnonzero(block['keep']).tolist():
+            page = page_names[int(block['source'][i])]
+            ms = int(block['ts_ms'][i])
+            m, t = int(block['member'][i]), int(block['topic'][i])
+            posts[i] = {
+                "page": page,
+                "post_id": f"{page}_{ms}",
+                "content": f"Discussion about {TOPICS[t]} in Parliament. {MEMBERS[m]} made some interesting points today.",
+                "url": f"https://facebook.com/{page}/posts/{ms}",
+                "date": post_dates[i],
+                "member": MEMBERS[m],
+                "topic": TOPICS[t],
+                "sentiment": float(block['sentiment'][i]),
+                "likes": int(likes[i]),
+                "shares": int(shares[i]),
+                "comments": []
+            }
+
+        parents = children['parent'].tolist()
+        members = block['member'][children['parent']].tolist()
+        topics = block['topic'][children['parent']].tolist()
+        positive = (children['sentiment'] > 0.5).tolist()
+        for parent, position, date, sentiment, like, m, t, pos in zip(
+                parents, children['position'].tolist(), _format_dates(children['ts']),
+                children['sentiment'].tolist(), children['likes'].tolist(), members, topics, positive):
+            post = posts[parent]
+            post["comments"].append({
+                "comment_id": f"{post['post_id']}_{position}",
+                "content": comment_texts[(m, t, int(pos))],
+                "date": date,
+                "sentiment": sentiment,
+                "likes": like
+            })
+
+        facebook_data.extend(posts.values())
+
+    return facebook_data
+
+def generate_twitter(seed=DEFAULT_SEED, accounts=10, tweets_per_account=10, replies_per_tweet=20, days=1, end=None,
+                     start=None, include_updates=False):
+    """Generate a deterministic list of mock tweets with nested replies
+
+    With include_updates, tweets from before the window that received replies
+    inside it are returned too, carrying only those new replies.
+    """
+    account_names = twitter_account_names(accounts)
+    start, end = _resolve_span(days, end, start)
+    lookback = COMMENT_LAG if include_updates else 0
+    reply_texts = _reply_texts()
+    twitter_data = []
+
+    for block in _sample_posts(seed, 'twitter', accounts, tweets_per_account / days, start, end, lookback):
+        rng = block['rng']
+        n = len(block['ts_ms'])
+        likes = rng.integers(0, 200, n)
+        retweets = rng.integers(0, 50, n)
+        children = _sample_children(block, replies_per_tweet, 30, start, end, include_updates)
+
+        tweets = {}
+        tweet_dates = _format_dates(block['ts_ms'] // 1000)
+        for i in np.flatnonzero(block['keep']).tolist():
+            account = account_names[int(block['source'][i])]
+            ms = int(block['ts_ms'][i])
+            m, t = int(block['member'][i]), int(block['topic'][i])
+            sentiment = float(block['sentiment'][i])
+            tweets[i] = {
+                "account": account,
+                "tweet_id": f"{account}_{ms}",
+                "content": f"#{TOPICS[t].replace(' ', '')} #{MEMBERS[m].split(' ')[1]} Parliament discussion today was {'productive' if sentiment > 0.5 else 'concerning'}. #Mongolia #Parliament",
+                "url": f"https://twitter.com/{account}/status/{ms}",
+                "date": tweet_dates[i],
+                "member": MEMBERS[m],
+                "topic": TOPICS[t],
+                "sentiment": sentiment,
+                "likes": int(likes[i]),
+                "retweets": int(retweets[i]),
+                "replies": []
+            }
+
+        # Reply tone buckets match the original thresholds (0.4, 0.5, 0.7)
+        tone = np.digitize(children['sentiment'], [0.4, 0.5, 0.7], right=True)
+        members = block['member'][children['parent']].tolist()
+        topics = block['topic'][children['parent']].tolist()
+        for parent, position, date, sentiment, like, m, t, k in zip(
+                children['parent'].tolist(), children['position'].tolist(), _format_dates(children['ts']),
+                children['sentiment'].tolist(), children['likes'].tolist(), members, topics,
+                tone.tolist()):
+            tweet = tweets[parent]
+            tweet["replies"].append({
+                "reply_id": f"{tweet['tweet_id']}_{position}",
+                "content": reply_texts[(m, t, k)],
+                "date": date,
+                "sentiment": sentiment,
+                "likes": like
+            })
+
+        twitter_data.extend(tweets.values())
+
+    return twitter_data
+
+def generate_corpus(seed=DEFAULT_SEED, scale=None, end=None):
+    """Generate news, Facebook and Twitter data for the given scale"""
+    scale = dict(DEFAULT_SCALE, **(scale or {}))
+    days = scale['days']
+    return {
+        'news': generate_news(seed, news_site_names(scale['news_sites']), scale['posts_per_site'], days, end),
+        'facebook': generate_facebook(seed, scale['facebook_pages'], scale['posts_per_page'],
+                                      scale['comments_per_post'], days, end),
+        'twitter': generate_twitter(seed, scale['twitter_accounts'], scale['tweets_per_account'],
+                                    scale['replies_per_tweet'], days, end)
+    }
+
+def write_corpus(corpus, out_dir='data'):
+    """Write a generated corpus in the layout used by monitor.py"""
+    paths = {
+        'news': os.path.join(out_dir, 'news', 'news_data.json'),
+        'facebook': os.path.join(out_dir, 'facebook', 'facebook_data.json'),
+        'twitter': os.path.join(out_dir, 'twitter', 'twitter_data.json')
+    }
+    for platform, path in paths.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # json.dumps with compact separators runs entirely in the C encoder,
+        # unlike json.dump which streams through the pure-Python iterencode
+        with open(path, 'w') as f:
+            f.write(json.dumps(corpus[platform], separators=(',', ':')))
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic monitoring corpus")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--news-sites', type=int, default=DEFAULT_SCALE['news_sites'])
+    parser.add_argument('--posts-per-site', type=float, default=DEFAULT_SCALE['posts_per_site'])
+    parser.add_argument('--pages', type=int, default=DEFAULT_SCALE['facebook_pages'])
+    parser.add_argument('--posts-per-page', type=float, default=DEFAULT_SCALE['posts_per_page'])
+    parser.add_argument('--comments-per-post', type=int, default=DEFAULT_SCALE['comments_per_post'])
+    parser.add_argument('--accounts', type=int, default=DEFAULT_SCALE['twitter_accounts'])
+    parser.add_argument('--tweets-per-account', type=float, default=DEFAULT_SCALE['tweets_per_account'])
+    parser.add_argument('--replies-per-tweet', type=int, default=DEFAULT_SCALE['replies_per_tweet'])
+    parser.add_argument('--days', type=float, default=DEFAULT_SCALE['days'])
+    parser.add_argument('--end', help="End of the date span (YYYY-MM-DD HH:MM:SS), defaults to now")
+    parser.add_argument('--out-dir', default='data')
+    args = parser.parse_args()
+
+    scale = {
+        'news_sites': args.news_sites,
+        'posts_per_site': args.posts_per_site,
+        'facebook_pages': args.pages,
+        'posts_per_page': args.posts_per_page,
+        'comments_per_post': args.comments_per_post,
+        'twitter_accounts': args.accounts,
+        'tweets_per_account': args.tweets_per_account,
+        'replies_per_tweet': args.replies_per_tweet,
+        'days': args.days
+    }
+    end = datetime.strptime(args.end, "%Y-%m-%d %H:%M:%S") if args.end else None
+
+    started = time.perf_counter()
+    corpus = generate_corpus(args.seed, scale, end)
+    generated = time.perf_counter()
+    write_corpus(corpus, args.out_dir)
+    written = time.perf_counter()
+
+    comments = sum(len(post['comments']) for post in corpus['facebook'])
+    replies = sum(len(tweet['replies']) for tweet in corpus['twitter'])
+    print(f"Generated {len(corpus['news'])} news items, {len(corpus['facebook'])} posts with {comments} comments "
+          f"and {len(corpus['twitter'])} tweets with {replies} replies")
+    print(f"Generation took {generated - started:.2f}s, writing took {written - generated:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -47,10 +47,10 @@ echo "Key files OK"
 
 # Check if Python dependencies are installed
 echo "Checking Python dependencies..."
-python3 -c "import pandas; import numpy; import matplotlib; import requests" 2>/dev/null
+python3 -c "import pandas; import numpy; import matplotlib; import aiohttp" 2>/dev/null
 if [ $? -ne 0 ]; then
   echo "Installing required Python packages..."
-  pip install pandas numpy matplotlib requests
+  pip install pandas numpy matplotlib aiohttp
 fi
 
 echo "Python dependencies OK"
@@ -67,8 +67,8 @@ echo "Node.js dependencies OK"
 # Test data generation
 echo "Testing basic data generation..."
 python3 -c "
-import os
-if not os.path.exists('data/news/news_data.json') or not os.path.exists('data/facebook/facebook_data.json') or not os.path.exists('data/twitter/twitter_data.json'):
+import raw_store
+if not all(raw_store.has_data(platform) for platform in ('news', 'facebook', 'twitter')):
     print('Generating sample data...')
     import monitor
     monitor.run_monitoring()
@@ -79,7 +79,9 @@ else:
 echo "Testing data preparation..."
 python3 -c "
 import os
-if not os.path.exists('public/data/members.json') or not os.path.exists('public/data/sentiment_trends.json') or not os.path.exists('public/data/alerts.json'):
+import export
+files = export.load_manifest()['files']
+if not all(name in files for name in ('members', 'sentiment_trends', 'alerts')):
     print('Preparing dashboard data...')
     import prepare_data
     prepare_data.prepare_dashboard_data()
@@ -0,0 +1,116 @@
+import json
+import os
+
+# Where the per-source high-water marks are stored between runs
+WATERMARKS_PATH = 'data/watermarks.json'
+
+# Field names that differ between platforms
+SOURCE_KEYS = {'news': 'site', 'facebook': 'page', 'twitter': 'account'}
+ID_KEYS = {'news': 'url', 'facebook': 'post_id', 'twitter': 'tweet_id'}
+CHILD_KEYS = {'news': None, 'facebook': 'comments', 'twitter': 'replies'}
+CHILD_ID_KEYS = {'news': None, 'facebook': 'comment_id', 'twitter': 'reply_id'}
+
+def load_watermarks(path=WATERMARKS_PATH):
+    """Load the stored watermarks, {platform: {source: {'last_date', 'boundary_ids', 'last_id', 'last_post_date'}}}"""
+    if not os.path.exists(path):
+        return {platform: {} for platform in SOURCE_KEYS}
+    with open(path, 'r') as f:
+        watermarks = json.load(f)
+    for platform in SOURCE_KEYS:
+        watermarks.setdefault(platform, {})
+    return watermarks
+
+def save_watermarks(watermarks, path=WATERMARKS_PATH):
+    """Persist the watermarks, replacing the previous file atomically"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(tmp_path, path)
+
+def source_since(watermarks, platform, source):
+    """Return the last activity date seen for a source, or None if it was never fetched"""
+    mark = watermarks[platform].get(source)
+    return mark['last_date'] if mark else None
+
+def platform_since(watermarks, platform, sources=None):
+    """Return the oldest watermark across a platform's sources
+
+    None means at least one source has never been fetched and needs a full window.
+    """
+    marks = watermarks[platform]
+    sources = sources if sources is not None else list(marks)
+    if not sources or any(source not in marks for source in sources):
+        return None
+    return min(marks[source]['last_date'] for source in sources)
+
+def _is_new(date, record_id, since, boundary_ids):
+    """True if a record is newer than the watermark, or on it but not yet seen"""
+    return date > since or (date == since and record_id not in boundary_ids)
+
+def select_new(platform, items, watermarks):
+    """Split fetched items into (new items, updates) against each source's watermark
+
+    Updates are items that are already stored, carrying only their new comments
+    or replies so that just those can be appended.
+    """
+    source_key = SOURCE_KEYS[platform]
+    id_key = ID_KEYS[platform]
+    child_key = CHILD_KEYS[platform]
+    child_id_key = CHILD_ID_KEYS[platform]
+    new_items = []
+    updates = []
+
+    for item in items:
+        mark = watermarks[platform].get(item[source_key])
+        if mark is None:
+            new_items.append(item)
+            continue
+
+        since = mark['last_date']
+        boundary_ids = set(mark.get('boundary_ids', []))
+        children = None
+        if child_key:
+            children = [
+                child for child in item.get(child_key, [])
+                if _is_new(child['date'], child[child_id_key], since, boundary_ids)
+            ]
+
+        if _is_new(item['date'], item[id_key], since, boundary_ids):
+            new_items.append(dict(item, **{child_key: children}) if child_key else item)
+        elif children:
+            updates.append(dict(item, **{child_key: children}))
+
+    return new_items, updates
+
+def advance(watermarks, platform, items):
+    """Move each source's watermarks past the items and children in items
+
+    last_date is the newest activity seen and boundary_ids the records seen at
+    exactly that second, so a record sharing the second is still picked up
+    next time without re-reading stored data.
+    """
+    source_key = SOURCE_KEYS[platform]
+    id_key = ID_KEYS[platform]
+    child_key = CHILD_KEYS[platform]
+    child_id_key = CHILD_ID_KEYS[platform]
+    marks = watermarks[platform]
+
+    for item in items:
+        mark = marks.setdefault(item[source_key], {
+            'last_date': '', 'boundary_ids': [], 'last_id': None, 'last_post_date': ''
+        })
+        activity = [(item['date'], item[id_key])]
+        if child_key:
+            activity.extend((child['date'], child[child_id_key]) for child in item.get(child_key, []))
+
+        for date, record_id in activity:
+            if date > mark['last_date']:
+                mark['last_date'] = date
+                mark['boundary_ids'] = [record_id]
+            elif date == mark['last_date'] and record_id not in mark['boundary_ids']:
+                mark['boundary_ids'].append(record_id)
+
+        if item['date'] > mark['last_post_date']:
+            mark['last_post_date'] = item['date']
+            mark['last_id'] = item[id_key]
+    return watermarks